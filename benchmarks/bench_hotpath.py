@@ -0,0 +1,175 @@
+"""Benchmark the notification hot path
+
+Times escaping, formatters, template rendering and inline keyboards, then
+full requests through the app with the bot sending to a local fake Bot API,
+so HTTP, retries and parsing of Telegram's answers are included.
+
+Results can be saved as JSON and compared with an earlier run:
+
+Usage:
+    python benchmarks/bench_hotpath.py [--iterations 20000] [--requests 500]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+
+import yaml
+from jinja2 import Template
+
+from telegrify.core.config import ButtonConfig
+from telegrify.formatters.base import BaseFormatter
+from telegrify.formatters.markdown import MarkdownFormatter
+from telegrify.server.app import create_app
+from telegrify.server.keyboard import build_inline_keyboard
+from telegrify.testing import FakeBotAPI
+from telegrify.utils.escape import escape_markdown_v2, sanitize_text
+
+PAYLOAD = {
+    "title": "Deploy finished",
+    "message": "Version 2.4.1 (build #1234) is live on prod-eu-1! See https://example.com/runs/1234_a",
+    "service": "api-gateway",
+    "duration": 42.5,
+    "details": {"commit": "9f2c1e7", "author": "ci-bot", "tags": ["release", "eu"]},
+}
+
+TEMPLATE = "*{{ title }}*\n{{ message }}\nService: {{ service }} ({{ duration }}s)"
+
+BUTTONS = [
+    [ButtonConfig(text="Open run {{ details.commit }}", url="https://example.com/runs/{{ details.commit }}")],
+    [ButtonConfig(text="Roll back", callback_data="rollback:{{ service }}")],
+]
+
+
+def timeit(func, iterations: int) -> float:
+    """Average time (µs) per call"""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_functions(iterations: int) -> dict[str, float]:
+    text = PAYLOAD["message"]
+    base = BaseFormatter()
+    markdown = MarkdownFormatter()
+    return {
+        "escape_markdown_v2": timeit(lambda: escape_markdown_v2(text), iterations),
+        "sanitize_text": timeit(lambda: sanitize_text(text, "MarkdownV2"), iterations),
+        "BaseFormatter.format": timeit(lambda: base.format(PAYLOAD), iterations),
+        "MarkdownFormatter.format": timeit(lambda: markdown.format(PAYLOAD), iterations),
+        "template_render": timeit(lambda: Template(TEMPLATE).render(**PAYLOAD), iterations),
+        "build_inline_keyboard": timeit(lambda: build_inline_keyboard(BUTTONS, PAYLOAD), iterations),
+    }
+
+
+def build_app(api_url: str):
+    config = {
+        "bot": {
+            "token": "123456:bench",
+            "api_url": api_url,
+            "rate_limit": 0,
+            "chat_rate_limit": 0,
+        },
+        "templates": {"deploy": TEMPLATE},
+        "endpoints": [
+            {"path": "/bench/plain", "chat_id": "1", "formatter": "plain"},
+            {"path": "/bench/markdown", "chat_id": "1", "formatter": "markdown"},
+            {
+                "path": "/bench/template",
+                "chat_id": "1",
+                "template": "deploy",
+                "parse_mode": "MarkdownV2",
+                "buttons": [[button.model_dump(exclude_none=True) for button in row] for row in BUTTONS],
+            },
+        ],
+        "server": {"docs": False},
+        "logging": {"level": "WARNING"},
+    }
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+        yaml.dump(config, f)
+    app = create_app(f.name)
+    logging.getLogger().setLevel(logging.WARNING)
+    return app
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def bench_handlers(requests: int) -> dict[str, float]:
+    """Average time (µs) for a full request, including the send to the fake API"""
+    body = json.dumps(PAYLOAD).encode()
+    results = {}
+    async with FakeBotAPI(record=False) as api:
+        app = build_app(api.api_url)
+        for path in ("/bench/plain", "/bench/markdown", "/bench/template"):
+            statuses = []
+
+            async def receive():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            await app(make_scope(path), receive, send)
+            start = time.perf_counter()
+            for _ in range(requests):
+                await app(make_scope(path), receive, send)
+            elapsed = time.perf_counter() - start
+
+            assert set(statuses) == {200}, f"unexpected statuses: {set(statuses)}"
+            results[f"request {path}"] = elapsed / requests * 1e6
+        await app.state.bot_pool.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000, help="Calls per function")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--output", help="Save results as JSON")
+    parser.add_argument("--compare", help="Earlier JSON results to compare with")
+    args = parser.parse_args()
+
+    results = bench_functions(args.iterations)
+    results.update(asyncio.run(bench_handlers(args.requests)))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"{'benchmark':<28} {'µs':>10} {'baseline':>10} {'change':>8}")
+    for name, us in results.items():
+        line = f"{name:<28} {us:>10.2f}"
+        if name in baseline:
+            line += f" {baseline[name]:>10.2f} {(us / baseline[name] - 1) * 100:>+7.1f}%"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"iterations": args.iterations, "requests": args.requests, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark endpoint routing with many endpoints
+
+Compares per-route registration ("routes") with the single dispatch route
+("dispatch") at 10, 1k and 10k endpoints. Requests target the last
+registered endpoint, which is the worst case for linear route matching.
+
+Usage:
+    python benchmarks/bench_routing.py [--requests 200]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+
+import yaml
+
+from telegrify.server.app import create_app
+
+SIZES = [10, 1_000, 10_000]
+
+
+def build_app(endpoints: int, routing: str):
+    config = {
+        "bot": {"token": "123456:bench", "test_mode": True},
+        "endpoints": [
+            {"path": f"/notify/tenant-{i}", "chat_id": "123456789"} for i in range(endpoints)
+        ],
+        "server": {"routing": routing, "docs": False},
+        "logging": {"level": "WARNING"},
+    }
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+        yaml.dump(config, f)
+    app = create_app(f.name)
+    logging.getLogger().setLevel(logging.WARNING)
+    return app
+
+
+def make_scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+def bench_match(app, path: str, iterations: int) -> float:
+    """Average time (µs) for the router to find the matching route"""
+    from starlette.routing import Match
+
+    scope = make_scope(path)
+    routes = app.router.routes
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for route in routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                break
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def bench_requests(app, path: str, requests: int) -> float:
+    """Average time (µs) for a full in-process request"""
+    body = json.dumps({"message": "benchmark"}).encode()
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(path), receive, send)
+    elapsed = time.perf_counter() - start
+
+    assert set(statuses) == {200}, f"unexpected statuses: {set(statuses)}"
+    return elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    args = parser.parse_args()
+
+    print(f"{'endpoints':>10} {'mode':>9} {'match µs':>10} {'request µs':>11}")
+    for size in SIZES:
+        for routing in ("routes", "dispatch"):
+            app = build_app(size, routing)
+            path = f"/notify/tenant-{size - 1}"
+            match_us = bench_match(app, path, args.requests)
+            request_us = asyncio.run(bench_requests(app, path, args.requests))
+            print(f"{size:>10} {routing:>9} {match_us:>10.2f} {request_us:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark payload schema validation
+
+Times compiling endpoint schemas once and validating typical valid and
+invalid payloads against them, to keep validation in the microsecond range.
+
+Usage:
+    python benchmarks/bench_schema.py [--iterations 100000]
+"""
+
+import argparse
+import time
+
+from telegrify.core.schema import compile_schema
+
+SHORTHAND = {"order_id": "int", "customer": "str", "total": "float", "items_count": "int", "note": "str?"}
+
+JSON_SCHEMA = {
+    "type": "object",
+    "required": ["order_id", "customer", "total", "items"],
+    "properties": {
+        "order_id": {"type": "integer", "minimum": 1},
+        "customer": {"type": "string", "minLength": 1, "maxLength": 100},
+        "total": {"type": "number", "exclusiveMinimum": 0},
+        "status": {"enum": ["new", "paid", "shipped"]},
+        "email": {"type": "string", "pattern": "^[^@]+@[^@]+$"},
+        "items": {
+            "type": "array",
+            "minItems": 1,
+            "items": {"type": "object", "required": ["sku", "qty"], "properties": {"qty": {"type": "integer"}}},
+        },
+    },
+}
+
+VALID = {
+    "order_id": 1234,
+    "customer": "Ada Lovelace",
+    "total": 99.5,
+    "items_count": 3,
+    "status": "paid",
+    "email": "ada@example.com",
+    "items": [{"sku": "A-1", "qty": 1}, {"sku": "B-2", "qty": 2}, {"sku": "C-3", "qty": 1}],
+}
+
+INVALID = {"order_id": "1234", "total": -1, "status": "lost", "items": [{"sku": "A-1", "qty": "one"}]}
+
+
+def timeit(func, iterations: int) -> float:
+    """Average time (µs) per call"""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000, help="Validations per case")
+    args = parser.parse_args()
+
+    print(f"{'case':<28} {'µs':>8}")
+    for name, schema in (("shorthand", SHORTHAND), ("json schema", JSON_SCHEMA)):
+        compile_us = timeit(lambda: compile_schema(schema), max(1, args.iterations // 100))
+        validate = compile_schema(schema)
+        assert validate(VALID) == [] and validate(INVALID)
+        print(f"{name + ' compile':<28} {compile_us:>8.2f}")
+        print(f"{name + ' valid':<28} {timeit(lambda: validate(VALID), args.iterations):>8.2f}")
+        print(f"{name + ' invalid':<28} {timeit(lambda: validate(INVALID), args.iterations):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -99,14 +99,23 @@ class OrderFormatter(IPlugin):
         return "\\n".join(lines)
 '''
     (project_path / "plugins" / "example_formatter.py").write_text(plugin_content)
+    (project_path / "plugins" / "manifest.yaml").write_text(
+        "# Formatters are imported only when an endpoint uses them\n"
+        "formatters:\n"
+        '  order_formatter: "example_formatter:OrderFormatter"\n'
+    )
 
     # Get current telegrify version from development
-    import sys
     import subprocess
+    import sys
     try:
         # Try to get version from current development install
-        result = subprocess.run([sys.executable, "-c", "import telegrify; print(telegrify.__version__)"], 
-                              capture_output=True, text=True, cwd=Path(__file__).parent.parent.parent)
+        result = subprocess.run(
+            [sys.executable, "-c", "import telegrify; print(telegrify.__version__)"],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent.parent.parent,
+        )
         if result.returncode == 0:
             current_version = result.stdout.strip()
         else:
@@ -153,11 +162,11 @@ Telegrify notification service
     )
 
     click.echo("✓ Project created successfully!")
-    click.echo(f"\nNext steps:")
+    click.echo("\nNext steps:")
     click.echo(f"  cd {project_name}")
-    click.echo(f"  # Edit config.yaml with your settings")
-    click.echo(f"  export TELEGRAM_BOT_TOKEN='your-token'")
-    click.echo(f"  telegrify run")
+    click.echo("  # Edit config.yaml with your settings")
+    click.echo("  export TELEGRAM_BOT_TOKEN='your-token'")
+    click.echo("  telegrify run")
 
 
 @cli.command()
@@ -217,6 +226,188 @@ def validate(config: str):
         click.echo(f"✗ Configuration error: {e}", err=True)
 
 
+@cli.command()
+@click.option("--config", default="config.yaml", help="Path to config file")
+def poll(config: str):
+    """Receive updates by long polling (no public webhook URL needed)"""
+    import asyncio
+
+    from telegrify.core.config import AppConfig
+    from telegrify.core.logs import setup_logging
+    from telegrify.server.polling import run_polling
+
+    if not Path(config).exists():
+        click.echo(f"Error: Config file '{config}' not found", err=True)
+        return
+
+    with open(config) as f:
+        config_data = yaml.safe_load(f)
+
+    app_config = AppConfig(**config_data)
+    setup_logging(app_config.logging)
+
+    click.echo("Polling Telegram for updates (Ctrl+C to stop)")
+    try:
+        asyncio.run(run_polling(app_config))
+    except KeyboardInterrupt:
+        click.echo("Stopped")
+
+
+@cli.command("fake-api")
+@click.option("--host", default="127.0.0.1", help="Host to bind")
+@click.option("--port", default=8081, type=int, help="Port to bind")
+@click.option("--latency", default=0.0, type=float, help="Seconds to delay every answer")
+@click.option("--rate-limit-rate", default=0.0, type=float, help="Share of sends answered with 429")
+@click.option("--retry-after", default=1, type=int, help="retry_after returned with 429")
+@click.option("--error-rate", default=0.0, type=float, help="Share of sends answered with 500")
+@click.option(
+    "--reset-rate", default=0.0, type=float, help="Share of sends whose connection is reset"
+)
+@click.option("--seed", default=None, type=int, help="Random seed for fault injection")
+def fake_api(host: str, port: int, **options):
+    """Serve a local fake Telegram Bot API for load tests"""
+    from telegrify.testing import run_fake_api
+
+    click.echo(f"Fake Bot API on http://{host}:{port} (set bot.api_url to use it)")
+    run_fake_api(host=host, port=port, **options)
+
+
+@cli.command()
+@click.argument("url")
+@click.option(
+    "--payload",
+    "payload_file",
+    required=True,
+    type=click.Path(exists=True),
+    help="JSON payload to send",
+)
+@click.option("--requests", default=1000, type=int, help="Total requests")
+@click.option("--concurrency", default=50, type=int, help="Requests in flight")
+@click.option("--api-key", default=None, help="X-API-Key header")
+@click.option("--output", default=None, help="Save results as JSON")
+def bench(url: str, payload_file: str, requests: int, concurrency: int, api_key: str, output: str):
+    """Load a running server and report latency and throughput"""
+    import asyncio
+    import json
+
+    from telegrify.testing import run_load
+
+    with open(payload_file) as f:
+        payload = json.load(f)
+
+    click.echo(f"Sending {requests} requests to {url} ({concurrency} concurrent)")
+    results = asyncio.run(run_load(url, payload, requests, concurrency, api_key))
+    results.update(url=url, concurrency=concurrency)
+
+    latency = results["latency_ms"]
+    click.echo(f"  throughput: {results['throughput']} req/s")
+    click.echo(
+        f"  latency:    p50 {latency['p50']}ms  p90 {latency['p90']}ms  "
+        f"p99 {latency['p99']}ms  max {latency['max']}ms"
+    )
+    click.echo(f"  statuses:   {results['statuses']}")
+    if results["errors"]:
+        click.echo(f"  errors:     {results['errors']}")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        click.echo(f"Results saved to {output}")
+
+
+@cli.command()
+@click.option(
+    "--db",
+    default=".telegrify_deliveries.db",
+    type=click.Path(exists=True),
+    help="Delivery log file",
+)
+@click.option("--chat-id", default=None, help="Only sends to this chat")
+@click.option("--endpoint", default=None, help="Only sends from this endpoint")
+@click.option(
+    "--status", default=None, help="Only sends with this status (sent, failed, edited, unchanged)"
+)
+@click.option(
+    "--payload",
+    "payload_file",
+    default=None,
+    type=click.Path(exists=True),
+    help="Only sends of this JSON payload",
+)
+@click.option(
+    "--since", default=None, help="Start time: Unix time, ISO 8601 or an age like 30m, 2h, 7d"
+)
+@click.option("--until", default=None, help="End time, in the same formats")
+@click.option("--limit", default=50, type=int, help="Max records shown")
+@click.option("--prune", is_flag=True, help="Delete records older than --retention-days instead")
+@click.option("--retention-days", default=30.0, type=float, help="Retention used by --prune")
+@click.option("--json", "as_json", is_flag=True, help="Print records as JSON lines")
+def deliveries(
+    db: str,
+    chat_id,
+    endpoint,
+    status,
+    payload_file,
+    since,
+    until,
+    limit,
+    prune,
+    retention_days,
+    as_json,
+):
+    """Look up sends recorded in the delivery log"""
+    import asyncio
+    import json
+    from datetime import datetime
+
+    from telegrify.core.deliverylog import DeliveryLog, parse_time, payload_digest
+
+    async def run():
+        log = DeliveryLog(db)
+        try:
+            if prune:
+                return await log.prune(retention_days)
+            payload_hash = None
+            if payload_file:
+                with open(payload_file) as f:
+                    payload_hash = payload_digest(json.load(f))
+            return await log.query(
+                chat_id,
+                endpoint,
+                status,
+                payload_hash,
+                parse_time(since) if since else None,
+                parse_time(until) if until else None,
+                limit,
+            )
+        finally:
+            await log.close()
+
+    try:
+        result = asyncio.run(run())
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        return
+
+    if prune:
+        click.echo(f"Deleted {result} records older than {retention_days} days")
+        return
+    for record in result:
+        if as_json:
+            click.echo(json.dumps(record))
+            continue
+        sent_at = datetime.fromtimestamp(record["sent_at"]).isoformat(sep=" ", timespec="seconds")
+        line = (
+            f"{sent_at}  {record['endpoint']}  chat {record['chat_id']}  {record['status']}"
+            f"  message {record['message_id']}  {record['latency_ms']}ms  {record['payload_hash']}"
+        )
+        if record["error"]:
+            line += f"  {record['error']}"
+        click.echo(line)
+    if not result and not as_json:
+        click.echo("No matching deliveries")
+
+
 @cli.group()
 def webhook():
     """Manage Telegram webhook"""
@@ -229,8 +420,9 @@ def webhook():
 def webhook_setup(config: str, url: str):
     """Register webhook with Telegram"""
     import asyncio
-    from telegrify.core.config import AppConfig
+
     from telegrify.core.bot import TelegramBot
+    from telegrify.core.config import AppConfig
 
     if not Path(config).exists():
         click.echo(f"Error: Config file '{config}' not found", err=True)
@@ -243,18 +435,19 @@ def webhook_setup(config: str, url: str):
     webhook_url = url or app_config.bot.webhook_url
 
     if not webhook_url:
-        click.echo("Error: No webhook URL specified. Set bot.webhook_url in config or use --url", err=True)
+        click.echo(
+            "Error: No webhook URL specified. Set bot.webhook_url in config or use --url", err=True
+        )
         return
 
     full_url = f"{webhook_url.rstrip('/')}{app_config.bot.webhook_path}"
-    
+
     async def setup():
-        bot = TelegramBot(app_config.bot.token)
-        result = await bot.set_webhook(full_url)
-        return result
+        async with TelegramBot(app_config.bot.token, api_url=app_config.bot.api_url) as bot:
+            return await bot.set_webhook(full_url)
 
     result = asyncio.run(setup())
-    
+
     if result.get("ok"):
         click.echo(f"✓ Webhook registered: {full_url}")
     else:
@@ -266,8 +459,9 @@ def webhook_setup(config: str, url: str):
 def webhook_info(config: str):
     """Show current webhook status"""
     import asyncio
-    from telegrify.core.config import AppConfig
+
     from telegrify.core.bot import TelegramBot
+    from telegrify.core.config import AppConfig
 
     if not Path(config).exists():
         click.echo(f"Error: Config file '{config}' not found", err=True)
@@ -279,11 +473,11 @@ def webhook_info(config: str):
     app_config = AppConfig(**config_data)
 
     async def get_info():
-        bot = TelegramBot(app_config.bot.token)
-        return await bot.get_webhook_info()
+        async with TelegramBot(app_config.bot.token, api_url=app_config.bot.api_url) as bot:
+            return await bot.get_webhook_info()
 
     result = asyncio.run(get_info())
-    
+
     if result.get("ok"):
         info = result["result"]
         click.echo(f"URL: {info.get('url') or '(not set)'}")
@@ -299,8 +493,9 @@ def webhook_info(config: str):
 def webhook_delete(config: str):
     """Remove webhook"""
     import asyncio
-    from telegrify.core.config import AppConfig
+
     from telegrify.core.bot import TelegramBot
+    from telegrify.core.config import AppConfig
 
     if not Path(config).exists():
         click.echo(f"Error: Config file '{config}' not found", err=True)
@@ -312,11 +507,11 @@ def webhook_delete(config: str):
     app_config = AppConfig(**config_data)
 
     async def delete():
-        bot = TelegramBot(app_config.bot.token)
-        return await bot.delete_webhook()
+        async with TelegramBot(app_config.bot.token, api_url=app_config.bot.api_url) as bot:
+            return await bot.delete_webhook()
 
     result = asyncio.run(delete())
-    
+
     if result.get("ok"):
         click.echo("✓ Webhook deleted")
     else:
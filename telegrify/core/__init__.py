@@ -1,9 +1,9 @@
 """Core functionality"""
 
-from telegrify.core.interfaces import IFormatter, IPlugin
+from telegrify.core.bot import TelegramBot
 from telegrify.core.config import AppConfig, BotConfig, EndpointConfig, ServerConfig
+from telegrify.core.interfaces import IFormatter, IPlugin
 from telegrify.core.registry import PluginRegistry, registry
-from telegrify.core.bot import TelegramBot
 
 __all__ = [
     "IFormatter",
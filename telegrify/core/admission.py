@@ -0,0 +1,114 @@
+"""Admission limits bounding requests in flight and waiting"""
+
+import asyncio
+import math
+import time
+from collections import deque
+
+
+class OverloadedError(Exception):
+    """A request was refused because a limit is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Let up to max_inflight requests run and max_queued wait for a slot
+
+    Requests beyond that, or waiting longer than queue_timeout, are refused
+    with OverloadedError. Waiting requests get slots in arrival order. The retry
+    hint is the time the current drain rate (completions per second, averaged
+    over about DRAIN_WINDOW seconds) needs to clear the queue.
+    """
+
+    DRAIN_WINDOW = 5.0
+    MAX_RETRY_AFTER = 60
+
+    def __init__(self, max_inflight: int, max_queued: int = 0, queue_timeout: float = 10.0):
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.inflight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._drain_rate = 0.0
+        self._drained_at = time.monotonic()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def full(self) -> bool:
+        """No slot is free and the queue is full"""
+        return self.inflight >= self.max_inflight and self.queued >= self.max_queued
+
+    @property
+    def saturation(self) -> float:
+        """Share of running and waiting capacity in use"""
+        return (self.inflight + self.queued) / (self.max_inflight + self.max_queued)
+
+    @property
+    def drain_rate(self) -> float:
+        """Recent completions per second"""
+        age = time.monotonic() - self._drained_at
+        return self._drain_rate * math.exp(-age / self.DRAIN_WINDOW)
+
+    def retry_after(self) -> int:
+        rate = self.drain_rate
+        if rate <= 0:
+            return self.MAX_RETRY_AFTER
+        return max(1, min(self.MAX_RETRY_AFTER, math.ceil((self.queued + 1) / rate)))
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in line if allowed, or raise OverloadedError"""
+        if self.inflight < self.max_inflight and not self._waiters:
+            self.inflight += 1
+            return
+        if self.queued >= self.max_queued:
+            raise OverloadedError(self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            raise OverloadedError(self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the request went away
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Free a slot, handing it to the next waiting request"""
+        now = time.monotonic()
+        decay = math.exp(-(now - self._drained_at) / self.DRAIN_WINDOW)
+        self._drain_rate = self._drain_rate * decay + 1 / self.DRAIN_WINDOW
+        self._drained_at = now
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+
+    def status(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "max_inflight": self.max_inflight,
+            "max_queued": self.max_queued,
+            "saturation": round(self.saturation, 3),
+        }
@@ -1,24 +1,148 @@
 """Telegram bot sender with retry logic"""
 
 import asyncio
+import json
 import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Mapping
 
 import aiohttp
 
+from telegrify.core import timing, tracing
+from telegrify.core.media import FileIdCache, MediaFile, extract_file_id, url_cache_key
+from telegrify.core.metrics import (
+    ESCAPE_DURATION,
+    INFLIGHT_SENDS,
+    TELEGRAM_DURATION,
+    TELEGRAM_RATE_LIMITED,
+    TELEGRAM_RETRIES,
+    metrics,
+)
+from telegrify.core.ratelimit import RateLimiter
 from telegrify.utils.escape import sanitize_text
 
 logger = logging.getLogger(__name__)
 
+# Telegram accepts 2 to 10 items per album
+MEDIA_GROUP_LIMIT = 10
+
+# Album items hashed and looked up in the file_id cache at once
+MEDIA_LOOKUP_CONCURRENCY = 4
+
+# Method and field used to send a single item of each media type
+SINGLE_MEDIA_METHODS = {
+    "photo": ("sendPhoto", "photo"),
+    "video": ("sendVideo", "video"),
+    "document": ("sendDocument", "document"),
+    "audio": ("sendAudio", "audio"),
+}
+
+
+def split_media_group(items: list[dict]) -> list[list[dict]]:
+    """Split media into albums Telegram accepts, keeping their order
+
+    Photos and videos can share an album, while documents and audio are only
+    grouped with their own type. A single leftover item takes one from the
+    previous album so no album is left with one item; an item that cannot
+    be grouped at all is returned on its own.
+    """
+    runs: list[list[dict]] = []
+    previous = None
+    for item in items:
+        kind = "visual" if item["type"] in ("photo", "video") else item["type"]
+        if runs and kind == previous:
+            runs[-1].append(item)
+        else:
+            runs.append([item])
+        previous = kind
+
+    chunks = []
+    for run in runs:
+        parts = [run[i : i + MEDIA_GROUP_LIMIT] for i in range(0, len(run), MEDIA_GROUP_LIMIT)]
+        if len(parts) > 1 and len(parts[-1]) == 1:
+            parts[-1].insert(0, parts[-2].pop())
+        chunks.extend(parts)
+    return chunks
+
+
+# Retry counter of the send in progress, set by count_retries()
+_retries: ContextVar[list[int] | None] = ContextVar("telegrify_retries", default=None)
+
+
+@contextmanager
+def count_retries() -> Iterator[list[int]]:
+    """Count the retries of sends made inside the block in counter[0]"""
+    counter = [0]
+    token = _retries.set(counter)
+    try:
+        yield counter
+    finally:
+        _retries.reset(token)
+
+
+class TelegramAPIError(Exception):
+    """Error response from the Telegram Bot API"""
+
+    def __init__(self, description: str, status: int | None = None, retry_after: int | None = None):
+        super().__init__(description)
+        self.description = description
+        self.status = status
+        self.retry_after = retry_after
+
 
 class TelegramBot:
     """Telegram bot for sending messages"""
 
-    BASE_URL = "https://api.telegram.org/bot"
+    API_URL = "https://api.telegram.org"
 
-    def __init__(self, token: str, test_mode: bool = False):
+    def __init__(
+        self,
+        token: str,
+        test_mode: bool = False,
+        pool_size: int = 100,
+        file_ids: FileIdCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        api_url: str | None = None,
+    ):
         self.token = token
         self.test_mode = test_mode
-        self.base_url = f"{self.BASE_URL}{token}/"
+        self.base_url = f"{(api_url or self.API_URL).rstrip('/')}/bot{token}/"
+        self.pool_size = pool_size
+        self.file_ids = file_ids or FileIdCache()
+        self.rate_limiter = rate_limiter
+        self.inflight = 0
+        self._session: aiohttp.ClientSession | None = None
+        self._session_loop: asyncio.AbstractEventLoop | None = None
+        self._uploads: dict[str, asyncio.Future] = {}
+
+    @property
+    def bot_id(self) -> str:
+        """Numeric bot id from the token"""
+        return self.token.split(":", 1)[0]
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session and the file_id cache"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        await self.file_ids.close()
+
+    async def __aenter__(self) -> "TelegramBot":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
 
     async def send_message(
         self,
@@ -30,10 +154,11 @@ class TelegramBot:
     ) -> dict:
         """Send text message to Telegram"""
         if self.test_mode:
-            logger.info(f"TEST MODE - Would send to {chat_id}: {text}")
+            logger.info("TEST MODE - Would send to %s: %s", chat_id, text)
             return {"ok": True, "result": {"message_id": 0}}
 
-        escaped_text = sanitize_text(text, parse_mode)
+        with timing.stage("sanitize"), ESCAPE_DURATION.time(parse_mode=parse_mode or "none"):
+            escaped_text = sanitize_text(text, parse_mode)
 
         payload = {"chat_id": chat_id, "text": escaped_text}
         if parse_mode:
@@ -43,91 +168,405 @@ class TelegramBot:
 
         return await self._send_with_retry("sendMessage", payload, max_retries)
 
+    async def edit_message_text(
+        self,
+        chat_id: str,
+        message_id: int,
+        text: str,
+        parse_mode: str | None = None,
+        reply_markup: dict | None = None,
+        max_retries: int = 3,
+    ) -> dict:
+        """Replace the text of a sent message"""
+        if self.test_mode:
+            logger.info("TEST MODE - Would edit message %s in %s: %s", message_id, chat_id, text)
+            return {"ok": True, "result": {"message_id": message_id}}
+
+        with timing.stage("sanitize"), ESCAPE_DURATION.time(parse_mode=parse_mode or "none"):
+            escaped_text = sanitize_text(text, parse_mode)
+
+        payload = {"chat_id": chat_id, "message_id": message_id, "text": escaped_text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if reply_markup:
+            payload["reply_markup"] = reply_markup
+
+        return await self._send_with_retry("editMessageText", payload, max_retries)
+
+    async def edit_message_caption(
+        self,
+        chat_id: str,
+        message_id: int,
+        caption: str,
+        parse_mode: str | None = None,
+        reply_markup: dict | None = None,
+        max_retries: int = 3,
+    ) -> dict:
+        """Replace the caption of a sent photo or document"""
+        if self.test_mode:
+            logger.info(
+                "TEST MODE - Would edit caption of %s in %s: %s", message_id, chat_id, caption
+            )
+            return {"ok": True, "result": {"message_id": message_id}}
+
+        payload = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "caption": sanitize_text(caption, parse_mode),
+        }
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if reply_markup:
+            payload["reply_markup"] = reply_markup
+
+        return await self._send_with_retry("editMessageCaption", payload, max_retries)
+
     async def send_photo(
         self,
         chat_id: str,
-        photo_url: str,
+        photo_url: str | MediaFile,
         caption: str | None = None,
         parse_mode: str | None = None,
         max_retries: int = 3,
     ) -> dict:
-        """Send photo to Telegram"""
+        """Send photo to Telegram from a URL, file_id or uploaded MediaFile"""
         if self.test_mode:
-            logger.info(f"TEST MODE - Would send photo to {chat_id}: {photo_url}")
+            logger.info("TEST MODE - Would send photo to %s: %s", chat_id, photo_url)
             return {"ok": True, "result": {"message_id": 0}}
 
-        payload = {"chat_id": chat_id, "photo": photo_url}
+        payload = {"chat_id": chat_id}
         if caption:
             escaped_caption = sanitize_text(caption, parse_mode)
             payload["caption"] = escaped_caption
         if parse_mode:
             payload["parse_mode"] = parse_mode
 
-        return await self._send_with_retry("sendPhoto", payload, max_retries)
+        return await self._send_media("sendPhoto", "photo", photo_url, payload, max_retries)
+
+    async def send_document(
+        self,
+        chat_id: str,
+        document: str | MediaFile,
+        caption: str | None = None,
+        parse_mode: str | None = None,
+        max_retries: int = 3,
+    ) -> dict:
+        """Send document to Telegram from a URL, file_id or uploaded MediaFile"""
+        if self.test_mode:
+            logger.info("TEST MODE - Would send document to %s: %s", chat_id, document)
+            return {"ok": True, "result": {"message_id": 0}}
+
+        payload = {"chat_id": chat_id}
+        if caption:
+            payload["caption"] = sanitize_text(caption, parse_mode)
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+
+        return await self._send_media("sendDocument", "document", document, payload, max_retries)
+
+    async def _send_media(
+        self,
+        method: str,
+        field: str,
+        media: str | MediaFile,
+        payload: dict,
+        max_retries: int,
+    ) -> dict:
+        """Send media, reusing a cached file_id instead of uploading when possible
+
+        Concurrent sends of the same content wait for the first upload and
+        then reuse its file_id.
+        """
+        key = await self._media_key(media)
+        if key is None:
+            return await self._send_with_retry(method, {**payload, field: media}, max_retries)
+
+        while key in self._uploads:
+            await asyncio.shield(self._uploads[key])
+
+        file_id = await self.file_ids.get(key)
+        if file_id is not None:
+            try:
+                return await self._send_with_retry(method, {**payload, field: file_id}, max_retries)
+            except TelegramAPIError as e:
+                if e.status != 400:
+                    raise
+                logger.warning("Cached file_id for %s was rejected, uploading again", key)
+                await self.file_ids.delete(key)
+
+        upload = asyncio.get_running_loop().create_future()
+        self._uploads[key] = upload
+        try:
+            if isinstance(media, MediaFile):
+                files = {field: media}
+                result = await self._send_with_retry(method, payload, max_retries, files=files)
+            else:
+                result = await self._send_with_retry(method, {**payload, field: media}, max_retries)
+            file_id = extract_file_id(result)
+            if file_id:
+                await self.file_ids.set(key, file_id)
+            return result
+        finally:
+            del self._uploads[key]
+            upload.set_result(None)
+
+    async def _media_key(self, media: str | MediaFile) -> str | None:
+        """Key of media in the file_id cache, or None when it is not cached"""
+        if not isinstance(media, MediaFile) and not self.file_ids.cache_urls:
+            return None
+        key = await media.cache_key() if isinstance(media, MediaFile) else url_cache_key(media)
+        # file_ids are only valid for the bot that received the file
+        return f"{self.bot_id}:{key}"
+
+    async def _lookup_media(
+        self, media: str | MediaFile, limit: asyncio.Semaphore
+    ) -> tuple[str | None, str | None]:
+        """Cache key of album media and its cached file_id, if any"""
+        async with limit:
+            key = await self._media_key(media)
+            if key is None:
+                return None, None
+            return key, await self.file_ids.get(key)
+
+    async def _send_album(
+        self,
+        group: list[dict],
+        payload: dict,
+        max_retries: int,
+        lookups: list[asyncio.Future],
+    ) -> list[dict]:
+        """Send one album, using cached file_ids and caching those of uploads"""
+        found = await asyncio.gather(*lookups)
+        while True:
+            media = []
+            files = {}
+            for i, (entry, (_, file_id)) in enumerate(zip(group, found)):
+                entry = dict(entry)
+                if file_id is not None:
+                    entry["media"] = file_id
+                elif isinstance(entry["media"], MediaFile):
+                    files[f"file{i}"] = entry["media"]
+                    entry["media"] = f"attach://file{i}"
+                media.append(entry)
+            try:
+                result = await self._send_with_retry(
+                    "sendMediaGroup", {**payload, "media": media}, max_retries, files=files or None
+                )
+                break
+            except TelegramAPIError as e:
+                rejected = [key for key, file_id in found if file_id is not None]
+                if e.status != 400 or not rejected:
+                    raise
+                logger.warning("Cached file_ids for an album were rejected, uploading again")
+                for key in rejected:
+                    await self.file_ids.delete(key)
+                found = [(key, None) for key, _ in found]
+
+        messages = result["result"]
+        for (key, file_id), message in zip(found, messages):
+            if key is not None and file_id is None:
+                file_id = extract_file_id({"result": message})
+                if file_id:
+                    await self.file_ids.set(key, file_id)
+        return messages
 
     async def send_media_group(
         self,
         chat_id: str,
-        photo_urls: list[str],
+        photo_urls: list[str] | None = None,
         caption: str | None = None,
         parse_mode: str | None = None,
         max_retries: int = 3,
+        media: list[dict] | None = None,
     ) -> dict:
-        """Send multiple photos as media group"""
+        """Send photos, videos, documents or audio as albums
+
+        ``media`` items are dicts with ``type`` and ``media`` (a URL, file_id
+        or MediaFile). Sets larger than Telegram's 10 item limit are split into
+        consecutive albums sent in order, with the caption on the first one.
+        Album items are hashed and looked up in the file_id cache concurrently
+        while earlier albums are sent. The result lists every sent message.
+        """
+        items = [{"type": "photo", "media": url} for url in photo_urls or []] + list(media or [])
+        for item in items:
+            if item.get("type") not in SINGLE_MEDIA_METHODS:
+                raise ValueError(f"Unsupported media type: {item.get('type')}")
+
         if self.test_mode:
-            logger.info(f"TEST MODE - Would send {len(photo_urls)} photos to {chat_id}")
-            return {"ok": True, "result": [{"message_id": 0}]}
-
-        media = []
-        for i, url in enumerate(photo_urls[:10]):  # Telegram limit: 10
-            item = {"type": "photo", "media": url}
-            if i == 0 and caption:
-                escaped_caption = sanitize_text(caption, parse_mode)
-                item["caption"] = escaped_caption
-                if parse_mode:
-                    item["parse_mode"] = parse_mode
-            media.append(item)
+            logger.info("TEST MODE - Would send %d media items to %s", len(items), chat_id)
+            return {"ok": True, "result": [{"message_id": 0} for _ in items]}
 
-        payload = {"chat_id": chat_id, "media": media}
-        return await self._send_with_retry("sendMediaGroup", payload, max_retries)
+        escaped_caption = sanitize_text(caption, parse_mode) if caption else None
+        chunks = split_media_group(items)
+        limit = asyncio.Semaphore(MEDIA_LOOKUP_CONCURRENCY)
+        lookups = [
+            [asyncio.ensure_future(self._lookup_media(item["media"], limit)) for item in chunk]
+            if len(chunk) > 1
+            else []
+            for chunk in chunks
+        ]
+        try:
+            messages = await self._send_albums(
+                chat_id, chunks, lookups, escaped_caption, parse_mode, max_retries
+            )
+        finally:
+            pending = [task for chunk_lookups in lookups for task in chunk_lookups]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return {"ok": True, "result": messages}
 
-    async def _send_with_retry(self, method: str, payload: dict, max_retries: int) -> dict:
-        """Send request with exponential backoff retry"""
-        url = f"{self.base_url}{method}"
+    async def _send_albums(
+        self,
+        chat_id: str,
+        chunks: list[list[dict]],
+        lookups: list[list[asyncio.Future]],
+        escaped_caption: str | None,
+        parse_mode: str | None,
+        max_retries: int,
+    ) -> list[dict]:
+        """Send albums one after another so they arrive in order"""
+        messages = []
+        for index, chunk in enumerate(chunks):
+            chunk_caption = escaped_caption if index == 0 else None
+            if len(chunk) == 1:
+                method, field = SINGLE_MEDIA_METHODS[chunk[0]["type"]]
+                payload = {"chat_id": chat_id}
+                if chunk_caption:
+                    payload["caption"] = chunk_caption
+                    if parse_mode:
+                        payload["parse_mode"] = parse_mode
+                media = chunk[0]["media"]
+                result = await self._send_media(method, field, media, payload, max_retries)
+                messages.append(result["result"])
+                continue
 
+            group = [{"type": item["type"], "media": item["media"]} for item in chunk]
+            if chunk_caption:
+                group[0]["caption"] = chunk_caption
+                if parse_mode:
+                    group[0]["parse_mode"] = parse_mode
+            payload = {"chat_id": chat_id}
+            messages.extend(await self._send_album(group, payload, max_retries, lookups[index]))
+        return messages
+
+    async def _send_with_retry(
+        self,
+        method: str,
+        payload: dict,
+        max_retries: int,
+        files: dict[str, MediaFile] | None = None,
+    ) -> dict:
+        """Send request with exponential backoff retry
+
+        With a rate limiter, each attempt to send to a chat waits for a slot.
+        """
+        chat_id = payload.get("chat_id")
         for attempt in range(max_retries):
+            if attempt:
+                TELEGRAM_RETRIES.inc(method=method)
+                counter = _retries.get()
+                if counter is not None:
+                    counter[0] += 1
+            if self.rate_limiter is not None and chat_id is not None:
+                await self.rate_limiter.acquire(chat_id)
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, json=payload) as response:
-                        result = await response.json()
+                with tracing.span(
+                    f"telegram.{method}",
+                    tracing.SPAN_KIND_CLIENT,
+                    attempt=attempt + 1,
+                    chat_id=str(chat_id),
+                ) as span:
+                    status, headers, result = await self._post(method, payload, files=files)
+                    span.set_attribute("http.status_code", status)
+                    if status != 200:
+                        span.fail(result.get("description", f"HTTP {status}"))
+
+                if status == 200:
+                    return result
 
-                        if response.status == 200:
-                            return result
+                if status == 429:
+                    TELEGRAM_RATE_LIMITED.inc(method=method)
+                    retry_after = int(headers.get("Retry-After", 1))
+                    logger.warning(
+                        "Rate limited. Retrying after %ss",
+                        retry_after,
+                        extra={"method": method, "chat_id": chat_id},
+                    )
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.pause(chat_id, retry_after)
+                    await asyncio.sleep(retry_after)
+                    continue
 
-                        if response.status == 429:
-                            retry_after = int(response.headers.get("Retry-After", 1))
-                            logger.warning(f"Rate limited. Retrying after {retry_after}s")
-                            await asyncio.sleep(retry_after)
-                            continue
+                error_msg = result.get("description", "Unknown error")
+                logger.error(
+                    "Telegram API error: %s",
+                    error_msg,
+                    extra={"method": method, "chat_id": chat_id, "status": status},
+                )
 
-                        error_msg = result.get("description", "Unknown error")
-                        logger.error(f"Telegram API error: {error_msg}")
+                # Other client errors will not succeed on retry
+                if 400 <= status < 500:
+                    raise TelegramAPIError(error_msg, status=status)
 
-                        if attempt < max_retries - 1:
-                            wait_time = 2**attempt
-                            logger.info(f"Retrying in {wait_time}s...")
-                            await asyncio.sleep(wait_time)
-                        else:
-                            raise Exception(f"Failed after {max_retries} attempts: {error_msg}")
+                if attempt < max_retries - 1:
+                    wait_time = 2**attempt
+                    logger.info("Retrying in %ss...", wait_time)
+                    await asyncio.sleep(wait_time)
+                else:
+                    raise TelegramAPIError(
+                        f"Failed after {max_retries} attempts: {error_msg}", status=status
+                    )
 
             except aiohttp.ClientError as e:
-                logger.error(f"Network error: {e}")
+                logger.error("Network error: %s", e, extra={"method": method, "chat_id": chat_id})
                 if attempt < max_retries - 1:
                     await asyncio.sleep(2**attempt)
                 else:
                     raise
 
-        raise Exception(f"Failed to send message after {max_retries} attempts")
+        raise TelegramAPIError(f"Failed to send message after {max_retries} attempts", status=429)
+
+    async def _post(
+        self,
+        method: str,
+        payload: dict,
+        timeout: aiohttp.ClientTimeout | None = None,
+        files: dict[str, MediaFile] | None = None,
+    ) -> tuple[int, Mapping[str, str], dict]:
+        """Perform a single Bot API call, returning status, headers and JSON body
+
+        With files, the request is sent as multipart/form-data and file
+        contents are streamed from their source.
+        """
+        url = f"{self.base_url}{method}"
+        if files:
+            data = aiohttp.FormData()
+            for name, value in payload.items():
+                data.add_field(name, value if isinstance(value, str) else json.dumps(value))
+            for name, media in files.items():
+                data.add_field(
+                    name, media.stream(), filename=media.filename, content_type=media.content_type
+                )
+            body = {"data": data}
+        else:
+            body = {"json": payload}
+        start = time.perf_counter()
+        status = "error"
+        INFLIGHT_SENDS.labels().inc()
+        self.inflight += 1
+        try:
+            with timing.stage("telegram"):
+                session = self._get_session()
+                async with session.post(url, timeout=timeout, **body) as response:
+                    status = response.status
+                    result = await response.json()
+                    return response.status, response.headers, result
+        finally:
+            INFLIGHT_SENDS.labels().dec()
+            self.inflight -= 1
+            if metrics.enabled:
+                TELEGRAM_DURATION.observe(time.perf_counter() - start, method=method, status=status)
 
     async def set_webhook(self, url: str) -> dict:
         """Set webhook URL for receiving updates"""
@@ -140,9 +579,33 @@ class TelegramBot:
 
     async def get_webhook_info(self) -> dict:
         """Get current webhook info"""
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.base_url}getWebhookInfo") as response:
-                return await response.json()
+        async with self._get_session().get(f"{self.base_url}getWebhookInfo") as response:
+            return await response.json()
+
+    async def get_updates(
+        self,
+        offset: int | None = None,
+        timeout: int = 30,
+        limit: int = 100,
+        allowed_updates: list[str] | None = None,
+    ) -> list[dict]:
+        """Long-poll for updates (use instead of a webhook)"""
+        payload = {"timeout": timeout, "limit": limit}
+        if offset is not None:
+            payload["offset"] = offset
+        if allowed_updates is not None:
+            payload["allowed_updates"] = allowed_updates
+
+        status, headers, result = await self._post(
+            "getUpdates", payload, timeout=aiohttp.ClientTimeout(total=timeout + 10)
+        )
+        if status != 200 or not result.get("ok"):
+            raise TelegramAPIError(
+                result.get("description", "Unknown error"),
+                status=status,
+                retry_after=result.get("parameters", {}).get("retry_after"),
+            )
+        return result["result"]
 
     async def answer_callback_query(
         self,
@@ -0,0 +1,152 @@
+"""Spread sends across several bot tokens"""
+
+import asyncio
+import hashlib
+import logging
+
+from telegrify.core.bot import TelegramBot
+from telegrify.core.storage import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+POOL_POLICIES = ("affinity", "least_loaded")
+
+
+class _AssignmentTable(SQLiteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS assignments (
+        pool TEXT NOT NULL,
+        chat_id TEXT NOT NULL,
+        bot_id TEXT NOT NULL,
+        PRIMARY KEY (pool, chat_id)
+    );
+    """
+
+
+class ChatAssignments:
+    """Chat to bot assignments of least_loaded pools, stored in SQLite
+
+    New assignments are written in the background in batches, so choosing a
+    bot never waits on the disk.
+    """
+
+    def __init__(self, path: str):
+        self._table = _AssignmentTable(path)
+        self._unsaved: list[tuple[str, str, str]] = []
+        self._writer: asyncio.Task | None = None
+
+    async def load(self, pool: str) -> dict[str, str]:
+        """Chat id -> bot id for every chat assigned in a pool"""
+        rows = await self._table.execute(
+            "SELECT chat_id, bot_id FROM assignments WHERE pool = ?", (pool,)
+        )
+        return dict(rows)
+
+    def save(self, pool: str, chat_id: str, bot_id: str) -> None:
+        """Queue an assignment to be written"""
+        self._unsaved.append((pool, chat_id, bot_id))
+        if self._writer is None:
+            self._writer = asyncio.get_running_loop().create_task(self._write())
+
+    async def _write(self) -> None:
+        try:
+            while self._unsaved:
+                rows, self._unsaved = self._unsaved, []
+                await self._table.executemany(
+                    "INSERT OR REPLACE INTO assignments (pool, chat_id, bot_id) VALUES (?, ?, ?)",
+                    rows,
+                )
+        except Exception as e:
+            logger.error("Failed to store chat assignments: %s", e)
+        finally:
+            self._writer = None
+
+    async def close(self) -> None:
+        """Write queued assignments and close the database"""
+        if self._writer is not None:
+            await self._writer
+        await self._table.close()
+
+
+class BotPool:
+    """Choose the bot that sends to each chat
+
+    A chat always goes through the same bot, since a bot can only post in
+    groups it was added to and to users who started it. Chats listed in
+    ``pins`` (chat_id -> bot id, the number before ':' in the token) use that
+    bot. Other chats are assigned by policy:
+
+    - ``affinity``: rendezvous hashing of chat_id over bot ids, stable across
+      restarts; adding a token only moves the chats it wins
+    - ``least_loaded``: the bot with the fewest sends in flight on first use,
+      remembered for later sends to the chat, and across restarts when the
+      pool has ``assignments`` (loaded by ``start()``)
+    """
+
+    def __init__(
+        self,
+        bots: list[TelegramBot],
+        policy: str = "affinity",
+        pins: dict[str, str] | None = None,
+        name: str = "default",
+        assignments: ChatAssignments | None = None,
+    ):
+        if not bots:
+            raise ValueError("BotPool needs at least one bot")
+        if policy not in POOL_POLICIES:
+            raise ValueError(f"Unknown pool policy: {policy}")
+        self.bots = bots
+        self.policy = policy
+        self.name = name
+        self.assignments = assignments
+        self._by_id = {bot.bot_id: bot for bot in bots}
+        self._pins: dict[str, TelegramBot] = {}
+        for chat_id, bot_id in (pins or {}).items():
+            if bot_id not in self._by_id:
+                raise ValueError(f"chat {chat_id} is pinned to unknown bot {bot_id}")
+            self._pins[str(chat_id)] = self._by_id[bot_id]
+        self._assigned: dict[str, TelegramBot] = {}
+
+    @property
+    def primary(self) -> TelegramBot:
+        """First bot, used for webhooks and polling"""
+        return self.bots[0]
+
+    async def start(self) -> None:
+        """Restore stored least_loaded assignments to bots still in the pool"""
+        if self.policy != "least_loaded" or self.assignments is None:
+            return
+        for chat_id, bot_id in (await self.assignments.load(self.name)).items():
+            bot = self._by_id.get(bot_id)
+            if bot is not None:
+                self._assigned.setdefault(chat_id, bot)
+
+    def __len__(self) -> int:
+        return len(self.bots)
+
+    def for_chat(self, chat_id: str | int) -> TelegramBot:
+        """Get the bot sending to a chat"""
+        if len(self.bots) == 1:
+            return self.bots[0]
+        key = str(chat_id)
+        pinned = self._pins.get(key)
+        if pinned is not None:
+            return pinned
+        if self.policy == "affinity":
+            return max(self.bots, key=lambda bot: _score(bot.bot_id, key))
+
+        bot = self._assigned.get(key)
+        if bot is not None:
+            return bot
+        bot = self._assigned[key] = min(self.bots, key=lambda bot: bot.inflight)
+        if self.assignments is not None:
+            self.assignments.save(self.name, key, bot.bot_id)
+        return bot
+
+    async def close(self) -> None:
+        for bot in self.bots:
+            await bot.close()
+
+
+def _score(bot_id: str, chat_id: str) -> bytes:
+    return hashlib.blake2b(f"{bot_id}:{chat_id}".encode(), digest_size=8).digest()
@@ -0,0 +1,432 @@
+"""Resumable broadcast jobs for large recipient lists"""
+
+import asyncio
+import csv
+import json
+import logging
+import re
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from telegrify.core.metrics import QUEUE_DEPTH
+from telegrify.core.scheduler import DeliveryScheduler
+from telegrify.core.storage import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+# prepare(payload) -> (deliver(chat_id), priority), rendering the payload once
+PrepareFunc = Callable[[dict], tuple[Callable[[Any], Awaitable[Any]], str]]
+# validate(payload) -> errors, empty when the payload is valid
+ValidateFunc = Callable[[dict], list[dict]]
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class RecipientError(ValueError):
+    """A recipient source is missing or malformed"""
+
+
+class InvalidPayloadError(ValueError):
+    """The payload of a job does not match its endpoint's schema"""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__("Payload does not match the endpoint schema")
+        self.errors = errors
+
+
+class FileRecipients:
+    """Chat ids from a text file (one per line) or a CSV file with a header
+
+    In a CSV file, ``column`` holds the chat id and the other columns are
+    added to the payload for that recipient. The cursor is a byte offset, so
+    resuming seeks straight to the next unread line.
+    """
+
+    def __init__(self, path: Path, column: str = "chat_id"):
+        self.path = path
+        self.column = column
+        with open(path, newline="") as f:
+            first = f.readline()
+        header = next(csv.reader([first]), [])
+        self.header = header if column in header else None
+
+    def count(self) -> int:
+        with open(self.path, "rb") as f:
+            lines = sum(1 for line in f if line.strip() and not line.startswith(b"#"))
+        return lines - 1 if self.header else lines
+
+    def read(self, cursor: int, limit: int) -> tuple[list[tuple[str, dict]], int]:
+        recipients = []
+        with open(self.path, "rb") as f:
+            f.seek(cursor)
+            if cursor == 0 and self.header:
+                f.readline()
+            while len(recipients) < limit:
+                line = f.readline()
+                if not line:
+                    break
+                text = line.decode("utf-8").strip()
+                if not text or text.startswith("#"):
+                    continue
+                if self.header is None:
+                    recipients.append((text, {}))
+                    continue
+                row = dict(zip(self.header, next(csv.reader([text]))))
+                chat_id = row.pop(self.column, "")
+                if chat_id:
+                    recipients.append((chat_id, row))
+            return recipients, f.tell()
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteRecipients:
+    """Chat ids from a column of a SQLite table, read in rowid order
+
+    The other columns are added to the payload for that recipient. The cursor
+    is the last rowid read.
+    """
+
+    def __init__(self, path: Path, table: str, column: str = "chat_id"):
+        if not IDENTIFIER.match(table) or not IDENTIFIER.match(column):
+            raise RecipientError("table and column must be plain identifiers")
+        self.table = table
+        self.column = column
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        try:
+            columns = [row[1] for row in self._conn.execute(f'PRAGMA table_info("{table}")')]
+        except sqlite3.Error as e:
+            raise RecipientError(str(e))
+        if column not in columns:
+            raise RecipientError(f"Table {table} has no column {column}")
+
+    def count(self) -> int:
+        return self._conn.execute(f'SELECT COUNT(*) FROM "{self.table}"').fetchone()[0]
+
+    def read(self, cursor: int, limit: int) -> tuple[list[tuple[str, dict]], int]:
+        rows = self._conn.execute(
+            f'SELECT rowid, * FROM "{self.table}" WHERE rowid > ? ORDER BY rowid LIMIT ?',
+            (cursor, limit),
+        )
+        names = [description[0] for description in rows.description]
+        recipients = []
+        for row in rows.fetchall():
+            cursor = row[0]
+            context = dict(zip(names[1:], row[1:]))
+            chat_id = context.pop(self.column)
+            if chat_id is not None:
+                recipients.append((str(chat_id), context))
+        return recipients, cursor
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class _JobTable(SQLiteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS broadcast_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        endpoint TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        recipients TEXT NOT NULL,
+        status TEXT NOT NULL,
+        total INTEGER,
+        processed INTEGER NOT NULL DEFAULT 0,
+        sent INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        cursor INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        finished_at REAL
+    );
+    """
+
+    COLUMNS = (
+        "id, endpoint, payload, recipients, status, total, processed, sent, failed, cursor, "
+        "last_error, created_at, updated_at, finished_at"
+    )
+
+
+class BroadcastJobs:
+    """Send one notification to a large recipient list in resumable jobs
+
+    Recipients are streamed from a file or SQLite table in chunks. The
+    payload is rendered once per distinct set of per-recipient columns (an
+    LRU of ``max_contexts`` renders), and every send goes through the
+    delivery scheduler and so the rate limiter. Up to ``max_inflight`` sends
+    are queued at once, so one slow chat does not hold up the rest. Progress
+    is checkpointed once every send of a chunk and of the chunks before it has
+    finished; a job interrupted by a restart resumes from its last checkpoint,
+    so sends in progress may be made again.
+    """
+
+    def __init__(
+        self,
+        path: str | None,
+        recipients_dir: str,
+        scheduler: DeliveryScheduler,
+        chunk_size: int = 500,
+        max_contexts: int = 1024,
+        max_inflight: int = 1000,
+    ):
+        self.path = path
+        self.recipients_dir = Path(recipients_dir).resolve()
+        self.scheduler = scheduler
+        self.chunk_size = chunk_size
+        self.max_contexts = max_contexts
+        self.max_inflight = max_inflight
+        self._table = _JobTable(path or ":memory:")
+        self._handlers: dict[str, PrepareFunc] = {}
+        self._validators: dict[str, ValidateFunc] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._started: dict[int, tuple[float, int]] = {}
+        self._gauge = False
+
+    def register(
+        self, endpoint: str, prepare: PrepareFunc, validate: ValidateFunc | None = None
+    ) -> None:
+        """Set the functions rendering and validating payloads for an endpoint"""
+        self._handlers[endpoint] = prepare
+        if validate is not None:
+            self._validators[endpoint] = validate
+
+    def _file(self, name: str) -> Path:
+        path = (self.recipients_dir / name).resolve()
+        if not path.is_relative_to(self.recipients_dir) or not path.is_file():
+            raise RecipientError(f"File not found in recipients_dir: {name}")
+        return path
+
+    def open_source(self, spec: dict) -> FileRecipients | SQLiteRecipients:
+        """Open the recipients described by {"file": ...} or {"sqlite": ..., "table": ...}"""
+        column = spec.get("column", "chat_id")
+        if spec.get("file"):
+            return FileRecipients(self._file(spec["file"]), column)
+        if spec.get("sqlite"):
+            if not spec.get("table"):
+                raise RecipientError("A sqlite source needs a table")
+            return SQLiteRecipients(self._file(spec["sqlite"]), spec["table"], column)
+        raise RecipientError("recipients must name a file or a sqlite database")
+
+    async def create(self, endpoint: str, payload: dict, recipients: dict) -> int:
+        """Start a job sending payload through endpoint, returning its id"""
+        if endpoint not in self._handlers:
+            raise RecipientError(f"Unknown endpoint: {endpoint}")
+        source = await asyncio.to_thread(self.open_source, recipients)
+        try:
+            first, _ = await asyncio.to_thread(source.read, 0, 1)
+        finally:
+            source.close()
+        validate = self._validators.get(endpoint)
+        if validate is not None:
+            # Fail up front on a payload that the first recipient cannot be sent
+            errors = validate({**payload, **(first[0][1] if first else {})})
+            if errors:
+                raise InvalidPayloadError(errors)
+        now = time.time()
+
+        def insert(conn) -> int:
+            with conn:
+                return conn.execute(
+                    "INSERT INTO broadcast_jobs "
+                    "(endpoint, payload, recipients, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'running', ?, ?)",
+                    (endpoint, json.dumps(payload), json.dumps(recipients), now, now),
+                ).lastrowid
+
+        job_id = await self._table.run(insert)
+        self._start(job_id)
+        return job_id
+
+    def _start(self, job_id: int) -> None:
+        if not self._gauge:
+            QUEUE_DEPTH.set_function(lambda: len(self._tasks), queue="broadcast_jobs")
+            self._gauge = True
+        task = asyncio.create_task(self._run(job_id), name=f"telegrify-broadcast-{job_id}")
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def start_if_pending(self) -> None:
+        """Resume running jobs at startup if a jobs file already exists"""
+        if not self.path or not Path(self.path).exists():
+            return
+        rows = await self._table.execute("SELECT id FROM broadcast_jobs WHERE status = 'running'")
+        for (job_id,) in rows:
+            logger.info("Resuming broadcast job %s", job_id)
+            self._start(job_id)
+
+    async def get(self, job_id: int) -> dict | None:
+        """Job progress, with the send rate and ETA while it runs"""
+        rows = await self._table.execute(
+            f"SELECT {_JobTable.COLUMNS} FROM broadcast_jobs WHERE id = ?", (job_id,)
+        )
+        if not rows:
+            return None
+        row = dict(zip((name.strip() for name in _JobTable.COLUMNS.split(",")), rows[0]))
+        job = {
+            "job_id": row["id"],
+            "endpoint": row["endpoint"],
+            "status": row["status"],
+            "total": row["total"],
+            "processed": row["processed"],
+            "sent": row["sent"],
+            "failed": row["failed"],
+            "percent": round(100 * row["processed"] / row["total"], 1) if row["total"] else None,
+            "rate": None,
+            "eta_seconds": None,
+            "last_error": row["last_error"],
+            "created_at": row["created_at"],
+            "finished_at": row["finished_at"],
+        }
+        started = self._started.get(job_id)
+        if started is not None and row["status"] == "running":
+            started_at, processed_at_start = started
+            elapsed = time.monotonic() - started_at
+            done = row["processed"] - processed_at_start
+            if elapsed > 0 and done > 0:
+                job["rate"] = round(done / elapsed, 1)
+                if row["total"] is not None:
+                    remaining = max(0, row["total"] - row["processed"])
+                    job["eta_seconds"] = round(remaining / (done / elapsed), 1)
+        return job
+
+    async def cancel(self, job_id: int) -> bool:
+        """Stop a running job, returning False if it is not running"""
+        now = time.time()
+
+        def update(conn) -> int:
+            with conn:
+                return conn.execute(
+                    "UPDATE broadcast_jobs SET status = 'cancelled', updated_at = ?, "
+                    "finished_at = ? WHERE id = ? AND status = 'running'",
+                    (now, now, job_id),
+                ).rowcount
+
+        cancelled = await self._table.run(update)
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+        return bool(cancelled)
+
+    async def _run(self, job_id: int) -> None:
+        rows = await self._table.execute(
+            "SELECT endpoint, payload, recipients, total, processed, sent, failed, cursor "
+            "FROM broadcast_jobs WHERE id = ?",
+            (job_id,),
+        )
+        endpoint, payload, recipients, total, processed, sent, failed, cursor = rows[0]
+        payload = json.loads(payload)
+        source = None
+        try:
+            prepare = self._handlers.get(endpoint)
+            if prepare is None:
+                raise RecipientError(f"Endpoint {endpoint} is not configured")
+            source = await asyncio.to_thread(self.open_source, json.loads(recipients))
+            if total is None:
+                total = await asyncio.to_thread(source.count)
+                await self._table.execute(
+                    "UPDATE broadcast_jobs SET total = ? WHERE id = ?", (total, job_id)
+                )
+            self._started[job_id] = (time.monotonic(), processed)
+
+            validate = self._validators.get(endpoint)
+            rendered: OrderedDict[tuple, tuple | str] = OrderedDict()
+            window = asyncio.Semaphore(self.max_inflight)
+            # Chunks with sends in flight, oldest first: (futures, cursor after the chunk)
+            chunks: deque[tuple[list[asyncio.Future], Any]] = deque()
+            last_error = None
+
+            async def checkpoint(wait: bool) -> None:
+                """Record chunks whose sends have all finished, waiting for them all if wait"""
+                nonlocal processed, sent, failed, cursor, last_error
+                while chunks and (wait or all(future.done() for future in chunks[0][0])):
+                    futures, cursor = chunks.popleft()
+                    if wait:
+                        await asyncio.wait(futures)
+                    for future in futures:
+                        if future.cancelled():
+                            failed += 1
+                            last_error = "Send cancelled"
+                        elif future.exception() is not None:
+                            failed += 1
+                            last_error = str(future.exception())
+                        else:
+                            sent += 1
+                    processed += len(futures)
+                    await self._table.execute(
+                        "UPDATE broadcast_jobs SET processed = ?, sent = ?, failed = ?, "
+                        "cursor = ?, last_error = ?, updated_at = ? "
+                        "WHERE id = ? AND status = 'running'",
+                        (processed, sent, failed, cursor, last_error, time.time(), job_id),
+                    )
+
+            read_cursor = cursor
+            while True:
+                batch, next_cursor = await asyncio.to_thread(
+                    source.read, read_cursor, self.chunk_size
+                )
+                if not batch:
+                    break
+                futures = []
+                for chat_id, context in batch:
+                    key = tuple(sorted(context.items()))
+                    prepared = rendered.get(key)
+                    if prepared is None:
+                        merged = {**payload, **context}
+                        errors = validate(merged) if validate is not None else None
+                        prepared = f"Invalid payload: {errors}" if errors else prepare(merged)
+                        rendered[key] = prepared
+                        if len(rendered) > self.max_contexts:
+                            rendered.popitem(last=False)
+                    else:
+                        rendered.move_to_end(key)
+                    if isinstance(prepared, str):
+                        future = asyncio.get_running_loop().create_future()
+                        future.set_exception(ValueError(prepared))
+                        futures.append(future)
+                        continue
+                    deliver, priority = prepared
+                    await window.acquire()
+                    future = self.scheduler.submit(
+                        chat_id, lambda d=deliver, c=chat_id: d(c), priority
+                    )
+                    future.add_done_callback(lambda _: window.release())
+                    futures.append(future)
+                chunks.append((futures, next_cursor))
+                read_cursor = next_cursor
+                await checkpoint(wait=False)
+            await checkpoint(wait=True)
+
+            await self._finish(job_id, "done")
+            logger.info("Broadcast job %s finished: %d sent, %d failed", job_id, sent, failed)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Broadcast job %s failed: %s", job_id, e, exc_info=True)
+            await self._finish(job_id, "failed", str(e))
+        finally:
+            self._started.pop(job_id, None)
+            if source is not None:
+                source.close()
+
+    async def _finish(self, job_id: int, status: str, error: str | None = None) -> None:
+        now = time.time()
+        await self._table.execute(
+            "UPDATE broadcast_jobs SET status = ?, last_error = COALESCE(?, last_error), "
+            "updated_at = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+            (status, error, now, now, job_id),
+        )
+
+    async def stop(self) -> None:
+        """Stop running jobs; they resume from their last checkpoint on the next start"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._gauge:
+            QUEUE_DEPTH.remove_function(queue="broadcast_jobs")
+        await self._table.close()
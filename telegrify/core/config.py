@@ -21,7 +21,10 @@ def resolve_env_var(value: Any) -> Any:
         else:
             resolved = os.getenv(env_var)
             if resolved is None:
-                raise ValueError(f"Environment variable '{env_var}' is not set. Please set it in .env file or export {env_var}=your_value")
+                raise ValueError(
+                    f"Environment variable '{env_var}' is not set. "
+                    f"Please set it in .env file or export {env_var}=your_value"
+                )
         return resolved
     elif isinstance(value, list):
         return [resolve_env_var(item) for item in value]
@@ -32,7 +35,7 @@ def resolve_env_var(value: Any) -> Any:
 
 class EnvVarMixin:
     """Mixin to add env var resolution to all fields"""
-    
+
     @model_validator(mode="before")
     @classmethod
     def resolve_env_vars(cls, values):
@@ -46,13 +49,92 @@ class BotConfig(BaseModel, EnvVarMixin):
 
     token: str = Field(..., description="Telegram bot token")
     test_mode: bool = Field(default=False, description="Enable test mode")
+    api_url: str = Field(default="https://api.telegram.org", description="Bot API server URL")
     webhook_url: str | None = Field(default=None, description="Public URL for webhook")
     webhook_path: str = Field(default="/bot/webhook", description="Webhook endpoint path")
+    polling: bool = Field(
+        default=False, description="Receive updates by long polling instead of a webhook"
+    )
+    poll_timeout: int = Field(
+        default=30, ge=0, description="getUpdates long-poll timeout in seconds"
+    )
+    offset_file: str | None = Field(
+        default=".telegrify_offset", description="File persisting the getUpdates offset"
+    )
+    connection_pool_size: int = Field(
+        default=100, ge=1, description="Max open connections to the Bot API"
+    )
+    update_workers: int = Field(default=4, ge=1, description="Workers processing incoming updates")
+    update_queue_size: int = Field(
+        default=1000, ge=1, description="Max updates waiting for a worker"
+    )
+    update_dedup_window: int = Field(
+        default=10000, ge=1, description="Recent update_ids remembered for deduplication"
+    )
+    file_id_cache: str | None = Field(
+        default=None, description="SQLite file persisting uploaded media file_ids"
+    )
+    cache_url_file_ids: bool = Field(
+        default=True, description="Reuse the file_id of media sent by URL"
+    )
+    rate_limit: float = Field(
+        default=30.0, ge=0, description="Max messages per second across all chats (0 disables)"
+    )
+    chat_rate_limit: float = Field(
+        default=1.0, ge=0, description="Max messages per second to one chat (0 disables)"
+    )
+    chat_burst: int = Field(
+        default=3,
+        ge=1,
+        description="Messages a chat may receive in a burst before chat_rate_limit applies",
+    )
+    message_store: str | None = Field(
+        default=None, description="SQLite file persisting messages tracked for edit-in-place"
+    )
+    tokens: list[str] = Field(
+        default_factory=list, description="Additional bot tokens sharing the sending load"
+    )
+    pool_policy: str = Field(
+        default="affinity", description="Bot choice for a chat: 'affinity' or 'least_loaded'"
+    )
+    chat_pins: dict[str, str] = Field(
+        default_factory=dict, description="Chat IDs pinned to a bot id (token prefix)"
+    )
+    pool_assignments: str | None = Field(
+        default=".telegrify_pool_assignments.db",
+        description="SQLite file keeping least_loaded chat assignments across restarts",
+    )
+
+    @field_validator("pool_policy")
+    @classmethod
+    def validate_pool_policy(cls, v: str) -> str:
+        if v not in ("affinity", "least_loaded"):
+            raise ValueError(f"pool_policy must be 'affinity' or 'least_loaded', got '{v}'")
+        return v
+
+
+class BotPoolConfig(BaseModel, EnvVarMixin):
+    """Named group of bots that endpoints can send with"""
+
+    tokens: list[str] = Field(..., min_length=1, description="Bot tokens in the pool")
+    pool_policy: str = Field(
+        default="affinity", description="Bot choice for a chat: 'affinity' or 'least_loaded'"
+    )
+    chat_pins: dict[str, str] = Field(
+        default_factory=dict, description="Chat IDs pinned to a bot id (token prefix)"
+    )
+
+    @field_validator("pool_policy")
+    @classmethod
+    def validate_pool_policy(cls, v: str) -> str:
+        if v not in ("affinity", "least_loaded"):
+            raise ValueError(f"pool_policy must be 'affinity' or 'least_loaded', got '{v}'")
+        return v
 
 
 class ButtonConfig(BaseModel, EnvVarMixin):
     """Configuration for inline keyboard button"""
-    
+
     text: str = Field(..., description="Button text")
     url: str | None = Field(default=None, description="URL to open")
     callback_data: str | None = Field(default=None, description="Callback data")
@@ -69,8 +151,61 @@ class EndpointConfig(BaseModel, EnvVarMixin):
     parse_mode: str | None = Field(default=None, description="Telegram parse mode")
     plugin_config: dict[str, Any] = Field(default_factory=dict)
     labels: dict[str, str] = Field(default_factory=dict, description="Custom labels for keys")
-    field_map: dict[str, str] = Field(default_factory=dict, description="Map payload fields to internal fields")
-    buttons: list[list[ButtonConfig]] = Field(default_factory=list, description="Inline keyboard buttons (rows)")
+    field_map: dict[str, str] = Field(
+        default_factory=dict, description="Map payload fields to internal fields"
+    )
+    buttons: list[list[ButtonConfig]] = Field(
+        default_factory=list, description="Inline keyboard buttons (rows)"
+    )
+    media_dir: str | None = Field(
+        default=None, description="Directory local image_file/document_file paths are read from"
+    )
+    uploads: bool = Field(default=False, description="Accept raw media uploads at {path}/upload")
+    bot: str | None = Field(default=None, description="Named bot pool from `bots` to send with")
+    correlation_key: str | None = Field(
+        default=None,
+        description="Payload field whose value identifies a message to edit on later notifications",
+    )
+    priority: str = Field(
+        default="normal", description="Delivery priority: 'high', 'normal' or 'low'"
+    )
+    max_inflight: int | None = Field(
+        default=None,
+        ge=1,
+        description="Requests to this endpoint handled at once (unlimited if unset)",
+    )
+    max_queued: int = Field(
+        default=0, ge=0, description="Requests waiting for a free slot before new ones get 429"
+    )
+    request_limit: int | None = Field(
+        default=None,
+        ge=1,
+        description="Requests accepted per limits.window (overrides limits.per_endpoint)",
+    )
+    schema_: dict[str, Any] | None = Field(
+        default=None,
+        alias="schema",
+        description=(
+            "Payload schema checked before formatting: a {field: type} mapping, "
+            "or a JSON Schema with a $schema key"
+        ),
+    )
+    delivery_report_url: str | None = Field(
+        default=None, description="URL receiving the outcome of every send"
+    )
+    delivery_report_batch_size: int = Field(
+        default=50, ge=1, description="Delivery reports sent per POST"
+    )
+    delivery_report_interval: float = Field(
+        default=1.0, gt=0, description="Max seconds to wait for a report batch to fill"
+    )
+
+    @field_validator("priority")
+    @classmethod
+    def validate_priority(cls, v: str) -> str:
+        if v not in ("high", "normal", "low"):
+            raise ValueError(f"priority must be 'high', 'normal' or 'low', got '{v}'")
+        return v
 
     @field_validator("path")
     @classmethod
@@ -84,18 +219,22 @@ class EndpointConfig(BaseModel, EnvVarMixin):
     def validate_chat_id(cls, v: str | None) -> str | None:
         if v is None:
             return v
-        
+
         import logging
         logger = logging.getLogger(__name__)
-        
+
         if v.startswith("@"):
             return v
         try:
             chat_id_int = int(v)
             if chat_id_int > 0 and len(v) > 10:
-                logger.warning(f"chat_id '{v}' looks like a channel ID but is positive. Did you mean '-100{v}'?")
+                logger.warning(
+                    "chat_id '%s' looks like a channel ID but is positive. Did you mean '-100%s'?",
+                    v,
+                    v,
+                )
         except ValueError:
-            logger.warning(f"chat_id '{v}' is not a valid numeric ID or @username")
+            logger.warning("chat_id '%s' is not a valid numeric ID or @username", v)
         return v
 
     def get_chat_ids(self) -> list[str]:
@@ -113,6 +252,56 @@ class ServerConfig(BaseModel, EnvVarMixin):
     port: int = Field(default=8000, description="Server port")
     api_key: str | None = Field(default=None, description="API key for authentication")
     cors_origins: list[str] = Field(default=["*"], description="CORS allowed origins")
+    routing: str = Field(
+        default="routes", description="Endpoint routing mode: 'routes' or 'dispatch'"
+    )
+    docs: bool = Field(
+        default=True, description="Serve OpenAPI docs (/docs, /redoc, /openapi.json)"
+    )
+    admin_key: str | None = Field(
+        default=None, description="Key for admin endpoints (disabled if unset)"
+    )
+    server_timing: bool = Field(
+        default=False, description="Report stage timings in a Server-Timing header"
+    )
+    max_inflight: int | None = Field(
+        default=None, ge=1, description="Notification requests handled at once (unlimited if unset)"
+    )
+    max_queued: int = Field(
+        default=0, ge=0, description="Requests waiting for a free slot before new ones get 503"
+    )
+    queue_timeout: float = Field(
+        default=10.0, gt=0, description="Seconds a request may wait for a slot"
+    )
+
+    @field_validator("routing")
+    @classmethod
+    def validate_routing(cls, v: str) -> str:
+        if v not in ("routes", "dispatch"):
+            raise ValueError(f"routing must be 'routes' or 'dispatch', got '{v}'")
+        return v
+
+
+class LimitsConfig(BaseModel, EnvVarMixin):
+    """Incoming request rate limits"""
+
+    window: float = Field(default=60.0, gt=0, description="Sliding window in seconds")
+    per_endpoint: int | None = Field(
+        default=None, ge=1, description="Requests per window to each endpoint"
+    )
+    per_api_key: int | None = Field(
+        default=None, ge=1, description="Requests per window for each X-API-Key value"
+    )
+    per_ip: int | None = Field(
+        default=None, ge=1, description="Requests per window from each client IP"
+    )
+    trust_forwarded_for: bool = Field(
+        default=False, description="Take the client IP from X-Forwarded-For (behind a proxy)"
+    )
+    sketch_width: int = Field(
+        default=4096, ge=64, description="Counters per sketch row; more reduces over-counting"
+    )
+    sketch_depth: int = Field(default=4, ge=1, le=8, description="Sketch rows (hash functions)")
 
 
 class LoggingConfig(BaseModel, EnvVarMixin):
@@ -121,22 +310,171 @@ class LoggingConfig(BaseModel, EnvVarMixin):
     level: str = Field(default="INFO", description="Log level")
     format: str = Field(
         default="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        description="Log format",
+        description="Log format (may use %(request_id)s)",
+    )
+    structured: bool = Field(
+        default=False, description="Write one JSON object per line instead of `format`"
+    )
+    sample_rate: float = Field(
+        default=1.0,
+        ge=0,
+        le=1,
+        description="Share of high-volume info records (one per send) that are kept",
+    )
+
+
+class TracingConfig(BaseModel, EnvVarMixin):
+    """Request tracing configuration"""
+
+    enabled: bool = Field(
+        default=False, description="Record trace spans for requests, sends and webhook updates"
+    )
+    exporter: str = Field(
+        default="stdout", description="Where spans are written: 'stdout' or 'file'"
+    )
+    file: str = Field(
+        default="telegrify-traces.jsonl", description="OTLP JSON lines file for the 'file' exporter"
+    )
+    service_name: str = Field(default="telegrify", description="service.name resource attribute")
+    max_buffer: int = Field(
+        default=2048, ge=1, description="Finished spans waiting to be written before dropping"
+    )
+    batch_size: int = Field(default=256, ge=1, description="Spans written per line")
+    flush_interval: float = Field(
+        default=2.0, gt=0, description="Max seconds before buffered spans are written"
+    )
+
+    @field_validator("exporter")
+    @classmethod
+    def validate_exporter(cls, v: str) -> str:
+        if v not in ("stdout", "file"):
+            raise ValueError(f"exporter must be 'stdout' or 'file', got '{v}'")
+        return v
+
+
+class MetricsConfig(BaseModel, EnvVarMixin):
+    """Metrics configuration"""
+
+    enabled: bool = Field(
+        default=False, description="Collect metrics and serve them for Prometheus"
+    )
+    path: str = Field(default="/metrics", description="Metrics endpoint path")
+
+
+class ForwardingConfig(BaseModel, EnvVarMixin):
+    """Outgoing HTTP forwarding configuration (e.g. callback URLs)"""
+
+    timeout: float = Field(default=10.0, gt=0, description="Total timeout per POST in seconds")
+    per_host_limit: int = Field(
+        default=10, ge=1, description="Max concurrent connections per target host"
+    )
+    pool_size: int = Field(default=100, ge=1, description="Max concurrent connections overall")
+    max_retries: int = Field(default=3, ge=1, description="Attempts per POST")
+    retry_backoff: float = Field(
+        default=0.5, ge=0, description="Initial retry delay in seconds (doubles per attempt)"
+    )
+    max_pending: int = Field(
+        default=1000, ge=1, description="Max events waiting for delivery before dropping"
+    )
+
+
+class DeliveryConfig(BaseModel, EnvVarMixin):
+    """Outgoing message delivery configuration"""
+
+    workers: int = Field(default=8, ge=1, description="Chats sent to in parallel")
+    schedule_file: str | None = Field(
+        default=".telegrify_schedule.db",
+        description="SQLite file holding notifications scheduled with send_at/delay",
+    )
+    schedule_horizon: float = Field(
+        default=60.0,
+        gt=0,
+        description="Seconds ahead that scheduled notifications are loaded into memory",
+    )
+    priority_policy: str = Field(
+        default="weighted", description="How priorities share workers: 'weighted' or 'strict'"
+    )
+    priority_weights: dict[str, int] = Field(
+        default_factory=lambda: {"high": 8, "normal": 3, "low": 1},
+        description="Share of sends (and rate limit) each priority gets when all are backlogged",
+    )
+
+    @field_validator("priority_policy")
+    @classmethod
+    def validate_priority_policy(cls, v: str) -> str:
+        if v not in ("weighted", "strict"):
+            raise ValueError(f"priority_policy must be 'weighted' or 'strict', got '{v}'")
+        return v
+
+    @field_validator("priority_weights")
+    @classmethod
+    def validate_priority_weights(cls, v: dict[str, int]) -> dict[str, int]:
+        for priority, weight in v.items():
+            if priority not in ("high", "normal", "low"):
+                raise ValueError(f"Unknown priority '{priority}' in priority_weights")
+            if weight < 1:
+                raise ValueError(f"priority_weights['{priority}'] must be at least 1")
+        return v
+
+
+class DeliveryLogConfig(BaseModel, EnvVarMixin):
+    """Record of every send for looking up what was delivered"""
+
+    enabled: bool = Field(default=False, description="Record every send in a SQLite delivery log")
+    file: str = Field(
+        default=".telegrify_deliveries.db", description="SQLite file holding the delivery log"
+    )
+    retention_days: float = Field(
+        default=30.0, gt=0, description="Days records are kept before pruning"
+    )
+    batch_size: int = Field(default=500, ge=1, description="Records written per transaction")
+    flush_interval: float = Field(
+        default=1.0, gt=0, description="Max seconds before buffered records are written"
+    )
+    max_pending: int = Field(
+        default=10000, ge=1, description="Max records waiting to be written before dropping"
+    )
+
+
+class BroadcastConfig(BaseModel, EnvVarMixin):
+    """Broadcast jobs sending one notification to a large recipient list"""
+
+    recipients_dir: str | None = Field(
+        default=None,
+        description="Directory recipient files and databases are read from (no jobs if unset)",
+    )
+    jobs_file: str = Field(
+        default=".telegrify_jobs.db", description="SQLite file holding job progress"
+    )
+    chunk_size: int = Field(
+        default=500, ge=1, description="Recipients read and sent per checkpoint"
+    )
+    max_contexts: int = Field(
+        default=1024, ge=1, description="Distinct per-recipient renders cached at once"
+    )
+    max_inflight: int = Field(
+        default=1000, ge=1, description="Sends of a job queued or running at once"
     )
 
 
 class CallbackConfig(BaseModel, EnvVarMixin):
     """Configuration for button callback handlers"""
-    
-    data: str = Field(..., description="Callback data to match")
-    response: str | None = Field(default=None, description="Text response to send")
+
+    data: str = Field(..., description="Callback data to match, may contain {param} placeholders")
+    response: str | None = Field(
+        default=None, description="Text response to send (supports Jinja2)"
+    )
     url: str | None = Field(default=None, description="URL to POST callback to")
+    batch_size: int = Field(default=1, ge=1, description="Callback events sent per POST to url")
+    batch_interval: float = Field(
+        default=1.0, gt=0, description="Max seconds to wait for a batch to fill"
+    )
 
 
 class CommandConfig(BaseModel, EnvVarMixin):
     """Configuration for bot command handlers"""
-    
-    command: str = Field(..., description="Command to match (e.g., /start, /help)")
+
+    command: str = Field(..., description="Command to match (e.g., /start, /order {order_id})")
     response: str | None = Field(default=None, description="Text response (supports Jinja2)")
     parse_mode: str | None = Field(default=None, description="Parse mode for response")
     buttons: list[list[ButtonConfig]] = Field(default_factory=list, description="Optional buttons")
@@ -148,7 +486,24 @@ class AppConfig(BaseModel, EnvVarMixin):
     bot: BotConfig
     endpoints: list[EndpointConfig]
     templates: dict[str, str] = Field(default_factory=dict, description="Message templates")
-    callbacks: list[CallbackConfig] = Field(default_factory=list, description="Button callback handlers")
+    callbacks: list[CallbackConfig] = Field(
+        default_factory=list, description="Button callback handlers"
+    )
     commands: list[CommandConfig] = Field(default_factory=list, description="Bot command handlers")
     server: ServerConfig = Field(default_factory=ServerConfig)
+    limits: LimitsConfig = Field(default_factory=LimitsConfig)
     logging: LoggingConfig = Field(default_factory=LoggingConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+    tracing: TracingConfig = Field(default_factory=TracingConfig)
+    forwarding: ForwardingConfig = Field(default_factory=ForwardingConfig)
+    delivery: DeliveryConfig = Field(default_factory=DeliveryConfig)
+    broadcast: BroadcastConfig = Field(default_factory=BroadcastConfig)
+    delivery_log: DeliveryLogConfig = Field(default_factory=DeliveryLogConfig)
+    bots: dict[str, BotPoolConfig] = Field(default_factory=dict, description="Named bot pools")
+
+    @model_validator(mode="after")
+    def validate_endpoint_bots(self) -> "AppConfig":
+        for endpoint in self.endpoints:
+            if endpoint.bot and endpoint.bot not in self.bots:
+                raise ValueError(f"Endpoint {endpoint.path} uses unknown bot '{endpoint.bot}'")
+        return self
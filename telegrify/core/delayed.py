@@ -0,0 +1,241 @@
+"""Durable timer for notifications scheduled in the future"""
+
+import asyncio
+import contextvars
+import heapq
+import json
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from telegrify.core import logs, tracing
+from telegrify.core.metrics import QUEUE_DEPTH
+from telegrify.core.storage import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+DeliverFunc = Callable[[dict], Awaitable[Any]]
+
+
+def parse_due_time(
+    send_at: Any = None, delay: Any = None, now: float | None = None
+) -> float | None:
+    """Convert send_at (ISO 8601 or Unix time) or delay (seconds) to a Unix timestamp
+
+    Raises ValueError for values that are not a time.
+    """
+    now = time.time() if now is None else now
+    if send_at is not None and send_at != "":
+        if isinstance(send_at, (int, float)) and not isinstance(send_at, bool):
+            return float(send_at)
+        moment = datetime.fromisoformat(str(send_at).replace("Z", "+00:00"))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp()
+    if delay is not None and delay != "":
+        # float(True) would read ``"delay": true`` as one second
+        if isinstance(delay, bool):
+            raise ValueError(f"Invalid delay: {delay}")
+        seconds = float(delay)
+        if not math.isfinite(seconds) or seconds < 0:
+            raise ValueError(f"Invalid delay: {delay}")
+        return now + seconds
+    return None
+
+
+class _ScheduleTable(SQLiteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scheduled (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        due REAL NOT NULL,
+        endpoint TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        request_id TEXT,
+        traceparent TEXT
+    );
+    CREATE INDEX IF NOT EXISTS scheduled_due ON scheduled (due);
+    """
+
+
+class DelayedDelivery:
+    """Hold notifications in SQLite and deliver them when they are due
+
+    Only jobs due within the next ``horizon`` seconds are kept in memory, as
+    (due, id) pairs in a heap; payloads stay on disk until delivery. A single
+    timer task sleeps until the earliest job or the end of the horizon, so
+    idle pending jobs cost no wake-ups. Jobs are deleted after delivery and
+    picked up again after a restart. Each job is delivered under the request
+    id and trace of the request that scheduled it.
+    """
+
+    # Jobs loaded into memory per refill
+    BATCH_SIZE = 10000
+
+    def __init__(self, path: str | None = None, horizon: float = 60.0, concurrency: int = 100):
+        self.path = path
+        self.horizon = horizon
+        self._table = _ScheduleTable(path or ":memory:")
+        self._handlers: dict[str, DeliverFunc] = {}
+        self._heap: list[tuple[float, int]] = []
+        self._loaded: set[int] = set()
+        self._horizon_end = 0.0
+        self._pending = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._starting: asyncio.Task | None = None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._deliveries: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Jobs waiting to be delivered"""
+        return self._pending
+
+    def register(self, endpoint: str, deliver: DeliverFunc) -> None:
+        """Set the function delivering payloads scheduled for an endpoint"""
+        self._handlers[endpoint] = deliver
+
+    async def start(self) -> None:
+        """Start the timer, resuming jobs stored before a restart"""
+        if self._starting is None:
+            # The timer outlives the request that started it, so it must not inherit its context
+            self._starting = contextvars.Context().run(asyncio.create_task, self._start())
+        await asyncio.shield(self._starting)
+
+    async def _start(self) -> None:
+        rows = await self._table.execute("SELECT COUNT(*) FROM scheduled")
+        self._pending = rows[0][0]
+        if self._pending:
+            logger.info("Resuming %d scheduled notifications", self._pending)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="telegrify-delayed")
+        QUEUE_DEPTH.set_function(lambda: self._pending, queue="scheduled")
+
+    async def start_if_pending(self) -> None:
+        """Start the timer at startup only if a schedule file already exists"""
+        if self.path and Path(self.path).exists():
+            await self.start()
+
+    async def add(self, endpoint: str, payload: dict, due: float) -> int:
+        """Schedule payload for delivery to endpoint at due, returning the job id"""
+        await self.start()
+        request_id = logs.current_request_id()
+        parent = tracing.traceparent(tracing.current_span())
+
+        def insert(conn) -> int:
+            with conn:
+                return conn.execute(
+                    "INSERT INTO scheduled (due, endpoint, payload, request_id, traceparent) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (due, endpoint, json.dumps(payload), request_id, parent),
+                ).lastrowid
+
+        job_id = await self._table.run(insert)
+        self._pending += 1
+        if due < self._horizon_end:
+            self._push(due, job_id)
+            self._wakeup.set()
+        return job_id
+
+    def _push(self, due: float, job_id: int) -> None:
+        """Add a job to the in-memory heap unless it is already loaded or being delivered"""
+        if job_id not in self._loaded:
+            self._loaded.add(job_id)
+            heapq.heappush(self._heap, (due, job_id))
+
+    async def _refill(self, now: float) -> None:
+        # Jobs added while loading are pushed by add(); _push skips duplicates
+        self._horizon_end = now + self.horizon
+        limit = self.BATCH_SIZE + len(self._loaded)
+        rows = await self._table.execute(
+            "SELECT due, id FROM scheduled WHERE due < ? ORDER BY due LIMIT ?",
+            (self._horizon_end, limit),
+        )
+        for due, job_id in rows:
+            self._push(due, job_id)
+        if len(rows) == limit:
+            # More jobs are due in this window than fit in one batch
+            self._horizon_end = min(self._horizon_end, rows[-1][0])
+
+    async def _run(self) -> None:
+        while True:
+            now = time.time()
+            if now >= self._horizon_end:
+                await self._refill(now)
+
+            due_ids = []
+            while self._heap and self._heap[0][0] <= now:
+                due_ids.append(heapq.heappop(self._heap)[1])
+            if due_ids:
+                await self._dispatch(due_ids)
+
+            next_due = self._heap[0][0] if self._heap else math.inf
+            timeout = min(next_due, self._horizon_end) - time.time()
+            self._wakeup.clear()
+            if timeout > 0:
+                timer = asyncio.get_running_loop().call_later(timeout, self._wakeup.set)
+                try:
+                    await self._wakeup.wait()
+                finally:
+                    timer.cancel()
+
+    async def _dispatch(self, job_ids: list[int]) -> None:
+        for start in range(0, len(job_ids), 500):
+            chunk = job_ids[start : start + 500]
+            rows = await self._table.execute(
+                f"SELECT id, endpoint, payload, request_id, traceparent FROM scheduled "
+                f"WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for missing in set(chunk) - {row[0] for row in rows}:
+                self._loaded.discard(missing)
+            for job_id, endpoint, payload, request_id, parent in rows:
+                await self._slots.acquire()
+                task = asyncio.create_task(
+                    self._deliver(job_id, endpoint, json.loads(payload), request_id, parent)
+                )
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(
+        self, job_id: int, endpoint: str, payload: dict, request_id: str | None, parent: str | None
+    ) -> None:
+        logs.set_request_id(request_id)
+        try:
+            handler = self._handlers.get(endpoint)
+            if handler is None:
+                logger.warning(
+                    "Dropping scheduled notification %s: endpoint %s is not configured",
+                    job_id,
+                    endpoint,
+                )
+            else:
+                parent_span = tracing.from_traceparent(parent)
+                await tracing.run_in(
+                    parent_span, "delayed.deliver", handler(payload), job_id=job_id
+                )
+        except Exception as e:
+            logger.error("Scheduled notification %s to %s failed: %s", job_id, endpoint, e)
+        finally:
+            self._slots.release()
+            await self._table.execute("DELETE FROM scheduled WHERE id = ?", (job_id,))
+            # Dispatched jobs stay marked as loaded until deleted so a refill cannot load them again
+            self._loaded.discard(job_id)
+            self._pending -= 1
+
+    async def stop(self) -> None:
+        """Stop the timer and wait for deliveries in progress
+
+        Jobs that are not yet due stay stored for the next start.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            QUEUE_DEPTH.remove_function(queue="scheduled")
+        if self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+        await self._table.close()
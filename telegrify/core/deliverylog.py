@@ -0,0 +1,244 @@
+"""Delivery log recording every send in SQLite"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Any
+
+from telegrify.core.metrics import QUEUE_DEPTH, metrics
+from telegrify.core.storage import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_LOG_RECORDS = metrics.counter(
+    "telegrify_delivery_log_records_total", "Delivery log records by outcome", ("outcome",)
+)
+
+COLUMNS = (
+    "sent_at",
+    "endpoint",
+    "chat_id",
+    "message_id",
+    "status",
+    "latency_ms",
+    "payload_hash",
+    "error",
+)
+
+RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhd])$")
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def payload_digest(payload: dict[str, Any]) -> str:
+    """Short hash identifying a payload regardless of key order"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode()).hexdigest()[:16]
+
+
+def parse_time(value: str | float, now: float | None = None) -> float:
+    """Convert Unix time, ISO 8601 or an age like "30m" or "2d" to Unix time"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    match = RELATIVE_TIME.match(value)
+    if match:
+        return (time.time() if now is None else now) - float(match.group(1)) * UNITS[match.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class DeliveryLog(SQLiteStore):
+    """Record of every send, written to SQLite in batches
+
+    ``record`` only appends to an in-memory buffer. A background task writes
+    the buffer in one transaction every ``flush_interval`` seconds, or sooner
+    once ``batch_size`` records are waiting, and deletes records older than
+    ``retention_days`` once an hour. When writes fall behind, records past
+    ``max_pending`` are dropped rather than slowing down sends.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS deliveries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sent_at REAL NOT NULL,
+        endpoint TEXT NOT NULL,
+        chat_id TEXT NOT NULL,
+        message_id INTEGER,
+        status TEXT NOT NULL,
+        latency_ms REAL,
+        payload_hash TEXT,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS deliveries_chat ON deliveries (chat_id, sent_at);
+    CREATE INDEX IF NOT EXISTS deliveries_endpoint ON deliveries (endpoint, sent_at);
+    CREATE INDEX IF NOT EXISTS deliveries_sent_at ON deliveries (sent_at);
+    CREATE INDEX IF NOT EXISTS deliveries_payload ON deliveries (payload_hash);
+    """
+
+    PRUNE_INTERVAL = 3600.0
+
+    def __init__(
+        self,
+        path: str,
+        retention_days: float | None = 30.0,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+    ):
+        super().__init__(path)
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._buffer: list[tuple] = []
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def from_config(cls, config) -> "DeliveryLog":
+        return cls(
+            config.file,
+            retention_days=config.retention_days,
+            batch_size=config.batch_size,
+            flush_interval=config.flush_interval,
+            max_pending=config.max_pending,
+        )
+
+    @property
+    def pending(self) -> int:
+        """Records waiting to be written"""
+        return len(self._buffer)
+
+    async def start(self) -> None:
+        """Start the background writer"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._writer(), name="telegrify-delivery-log")
+            QUEUE_DEPTH.set_function(lambda: len(self._buffer), queue="delivery_log")
+
+    def record(
+        self,
+        endpoint: str,
+        chat_id: Any,
+        status: str,
+        message_id: int | None = None,
+        latency: float | None = None,
+        payload_hash: str | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Queue a record of one send; latency is in seconds"""
+        if len(self._buffer) >= self.max_pending:
+            DELIVERY_LOG_RECORDS.inc(outcome="dropped")
+            return
+        self._buffer.append(
+            (
+                time.time(),
+                endpoint,
+                str(chat_id),
+                message_id,
+                status,
+                None if latency is None else round(latency * 1000, 3),
+                payload_hash,
+                error,
+            )
+        )
+        if len(self._buffer) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    async def _writer(self) -> None:
+        next_prune = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                if self.retention_days and time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + self.PRUNE_INTERVAL
+                    await self.prune()
+            except Exception as e:
+                logger.error("Delivery log write failed: %s", e)
+
+    async def flush(self) -> None:
+        """Write all buffered records in one transaction"""
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        try:
+            await self.executemany(
+                f"INSERT INTO deliveries ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+        except Exception:
+            DELIVERY_LOG_RECORDS.inc(len(rows), outcome="dropped")
+            raise
+        DELIVERY_LOG_RECORDS.inc(len(rows), outcome="written")
+
+    async def prune(self, retention_days: float | None = None) -> int:
+        """Delete records older than the retention period, returning how many"""
+        cutoff = time.time() - (retention_days or self.retention_days) * 86400
+
+        def delete(conn) -> int:
+            with conn:
+                return conn.execute("DELETE FROM deliveries WHERE sent_at < ?", (cutoff,)).rowcount
+
+        deleted = await self.run(delete)
+        if deleted:
+            logger.info("Pruned %d delivery log records", deleted)
+        return deleted
+
+    async def query(
+        self,
+        chat_id: Any = None,
+        endpoint: str | None = None,
+        status: str | None = None,
+        payload_hash: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int = 100,
+    ) -> list[dict]:
+        """Most recent records matching every given filter"""
+        where, params = [], []
+        for column, value in (
+            ("chat_id", None if chat_id is None else str(chat_id)),
+            ("endpoint", endpoint),
+            ("status", status),
+            ("payload_hash", payload_hash),
+        ):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("sent_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("sent_at < ?")
+            params.append(until)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM deliveries"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        sql += " ORDER BY sent_at DESC LIMIT ?"
+        rows = await self.execute(sql, [*params, limit])
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    async def stop(self) -> None:
+        """Write pending records and close the database"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            QUEUE_DEPTH.remove_function(queue="delivery_log")
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Delivery log write failed: %s", e)
+        await self.close()
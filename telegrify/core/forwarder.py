@@ -0,0 +1,171 @@
+"""Forwarding of events to external HTTP endpoints"""
+
+import asyncio
+import logging
+from typing import Any
+
+import aiohttp
+
+from telegrify.core.metrics import QUEUE_DEPTH, metrics
+
+logger = logging.getLogger(__name__)
+
+FORWARDED = metrics.counter(
+    "telegrify_forwarded_total", "Events forwarded to external URLs by outcome", ("outcome",)
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class _Batch:
+    """Events waiting to be posted together to one URL"""
+
+    def __init__(self, size: int, interval: float):
+        self.size = size
+        self.interval = interval
+        self.events: list[dict] = []
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class Forwarder:
+    """POST events to external URLs through a shared, bounded connection pool
+
+    Events are sent in background tasks so the caller never waits on the
+    target. Concurrency per target host is capped by the connector, the
+    number of pending events is capped by ``max_pending`` (excess events are
+    dropped with a warning), and failed posts are retried with exponential
+    backoff. Events for a URL can optionally be batched into one POST of
+    ``{"events": [...]}``.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        per_host_limit: int = 10,
+        pool_size: int = 100,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        max_pending: int = 1000,
+    ):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.per_host_limit = per_host_limit
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_pending = max_pending
+        self._session: aiohttp.ClientSession | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._batches: dict[str, _Batch] = {}
+        self._pending = 0
+
+    @classmethod
+    def from_config(cls, config) -> "Forwarder":
+        return cls(
+            timeout=config.timeout,
+            per_host_limit=config.per_host_limit,
+            pool_size=config.pool_size,
+            max_retries=config.max_retries,
+            retry_backoff=config.retry_backoff,
+            max_pending=config.max_pending,
+        )
+
+    @property
+    def pending(self) -> int:
+        """Events accepted but not yet delivered or dropped"""
+        return self._pending
+
+    async def start(self) -> None:
+        """Report the pending events in the queue depth gauge"""
+        QUEUE_DEPTH.set_function(lambda: self._pending, queue="forwarding")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size, limit_per_host=self.per_host_limit
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def submit(
+        self, url: str, event: dict[str, Any], batch_size: int = 1, batch_interval: float = 1.0
+    ) -> bool:
+        """Queue event for delivery, returning False if it was dropped"""
+        if self._pending >= self.max_pending:
+            logger.warning("Forwarding queue full, dropping event for %s", url)
+            FORWARDED.inc(outcome="dropped")
+            return False
+
+        self._pending += 1
+        if batch_size <= 1:
+            self._spawn(url, event, 1)
+            return True
+
+        batch = self._batches.get(url)
+        if batch is None:
+            batch = self._batches[url] = _Batch(batch_size, batch_interval)
+        batch.events.append(event)
+        if len(batch.events) >= batch.size:
+            self._flush(url)
+        elif batch.timer is None:
+            loop = asyncio.get_running_loop()
+            batch.timer = loop.call_later(batch.interval, self._flush, url)
+        return True
+
+    def _flush(self, url: str) -> None:
+        batch = self._batches.pop(url, None)
+        if batch is None or not batch.events:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self._spawn(url, {"events": batch.events}, len(batch.events))
+
+    def _spawn(self, url: str, body: dict, count: int) -> None:
+        task = asyncio.create_task(self._deliver(url, body, count))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, url: str, body: dict, count: int) -> None:
+        try:
+            delivered = await self.post(url, body)
+            FORWARDED.inc(count, outcome="sent" if delivered else "failed")
+        finally:
+            self._pending -= count
+
+    async def post(self, url: str, body: dict) -> bool:
+        """POST body to url with retries, returning whether it was accepted"""
+        for attempt in range(self.max_retries):
+            delay = self.retry_backoff * 2**attempt
+            try:
+                async with self._get_session().post(url, json=body) as response:
+                    if response.status < 400:
+                        return True
+                    if response.status not in RETRY_STATUSES:
+                        logger.error("Forwarding to %s rejected with HTTP %d", url, response.status)
+                        return False
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+                    logger.warning("Forwarding to %s failed with HTTP %d", url, response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Forwarding to %s failed: %r", url, e)
+
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(delay)
+
+        logger.error("Giving up forwarding to %s after %d attempts", url, self.max_retries)
+        return False
+
+    async def flush(self) -> None:
+        """Send all batched events and wait for pending deliveries"""
+        for url in list(self._batches):
+            self._flush(url)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def close(self) -> None:
+        """Deliver pending events and close the connection pool"""
+        await self.flush()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        QUEUE_DEPTH.remove_function(queue="forwarding")
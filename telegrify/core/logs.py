@@ -0,0 +1,147 @@
+"""Logging through a background thread, with request ids and JSON output
+
+Records are put on a queue by the caller and formatted and written by a
+``QueueListener`` thread, so logging never blocks the event loop on the
+output stream. Every record gets the id of the request it was logged in.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Awaitable, TypeVar
+
+T = TypeVar("T")
+
+_request_id: ContextVar[str | None] = ContextVar("telegrify_request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed with extra=
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "request_id",
+    "sample",
+}
+
+MAX_REQUEST_ID_LENGTH = 64
+
+_listener: QueueListener | None = None
+
+
+def new_request_id(incoming: str | None = None) -> str:
+    """Use a client's X-Request-ID if it is reasonable, otherwise make one"""
+    if incoming and len(incoming) <= MAX_REQUEST_ID_LENGTH and incoming.isprintable():
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+def set_request_id(request_id: str | None) -> None:
+    """Set the request id attached to records logged from this context"""
+    _request_id.set(request_id)
+
+
+def current_request_id() -> str | None:
+    return _request_id.get()
+
+
+async def with_request_id(request_id: str | None, awaitable: Awaitable[T]) -> T:
+    """Await work handed to another task under the id of the request it serves"""
+    token = _request_id.set(request_id)
+    try:
+        return await awaitable
+    finally:
+        _request_id.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the request id, and sample high-volume records
+
+    Records logged with ``extra={"sample": True}`` at INFO or below are kept
+    with probability ``sample_rate``.
+    """
+
+    def __init__(self, sample_rate: float = 1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sampled = getattr(record, "sample", False) and record.levelno <= logging.INFO
+        if self.sample_rate < 1.0 and sampled:
+            if random.random() >= self.sample_rate:
+                return False
+        record.request_id = _request_id.get() or "-"
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", "-")
+        if request_id != "-":
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge args into the message; formatting happens on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(config) -> None:
+    """Route records through a queue to a stderr handler on a background thread
+
+    Replaces the handler installed by an earlier call, so it can run once per
+    app created in the same process.
+    """
+    global _listener
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter() if config.structured else logging.Formatter(config.format))
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, config.level))
+    stop_logging()
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter(config.sample_rate))
+    root.addHandler(queue_handler)
+    _listener = QueueListener(log_queue, handler)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Write queued records and stop the background thread"""
+    global _listener
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, _QueueHandler)]:
+        root.removeHandler(existing)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,178 @@
+"""Uploaded media and the file_id cache"""
+
+import asyncio
+import hashlib
+import mimetypes
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO
+
+from telegrify.core.storage import SQLiteStore
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MediaFile:
+    """Media to upload from a local path, bytes or a seekable binary stream
+
+    Files and streams are read in chunks while uploading and hashing, so they
+    are never loaded into memory as a whole. ``stream()`` can be called again
+    for each retry.
+    """
+
+    def __init__(
+        self,
+        source: str | Path | bytes | BinaryIO,
+        filename: str | None = None,
+        content_type: str | None = None,
+    ):
+        if isinstance(source, str):
+            source = Path(source)
+        self.source = source
+        if filename is None:
+            filename = source.name if isinstance(source, Path) else "file"
+        self.filename = filename
+        self.content_type = (
+            content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+        self._digest: str | None = None
+        self._digest_lock = asyncio.Lock()
+        # Each reader keeps its own offset; the lock pairs its seek with its read
+        self._read_lock = threading.Lock()
+
+    def _chunks(self):
+        if isinstance(self.source, bytes):
+            yield self.source
+            return
+        if isinstance(self.source, Path):
+            with open(self.source, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    yield chunk
+            return
+        offset = 0
+        while True:
+            with self._read_lock:
+                self.source.seek(offset)
+                chunk = self.source.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            offset += len(chunk)
+            yield chunk
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Yield the content in chunks, reading from disk off the event loop"""
+        if isinstance(self.source, bytes):
+            yield self.source
+            return
+        chunks = self._chunks()
+        sentinel = object()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, sentinel)
+            if chunk is sentinel:
+                return
+            yield chunk
+
+    async def digest(self) -> str:
+        """SHA-256 of the content, computed once"""
+        async with self._digest_lock:
+            if self._digest is None:
+                self._digest = await self._compute_digest()
+        return self._digest
+
+    async def _compute_digest(self) -> str:
+        if isinstance(self.source, bytes):
+            return hashlib.sha256(self.source).hexdigest()
+
+        def compute() -> str:
+            sha = hashlib.sha256()
+            for chunk in self._chunks():
+                sha.update(chunk)
+            return sha.hexdigest()
+
+        return await asyncio.to_thread(compute)
+
+    async def cache_key(self) -> str:
+        """Key of this content in the file_id cache"""
+        return f"sha256:{await self.digest()}"
+
+
+def url_cache_key(url: str) -> str:
+    """Key of media sent by URL in the file_id cache"""
+    return f"url:{url}"
+
+
+class _FileIdTable(SQLiteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS file_ids (
+        key TEXT PRIMARY KEY,
+        file_id TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    """
+
+
+class FileIdCache:
+    """Map content hashes and URLs to the file_id Telegram assigned
+
+    Lookups are served from an in-memory LRU; with a path, entries are also
+    stored in SQLite so they survive restarts. Set ``cache_urls`` to False
+    when the content behind a URL changes between sends.
+    """
+
+    def __init__(self, path: str | None = None, max_memory: int = 10000, cache_urls: bool = True):
+        self.max_memory = max_memory
+        self.cache_urls = cache_urls
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._table = _FileIdTable(path) if path else None
+
+    def _remember(self, key: str, file_id: str) -> None:
+        self._memory[key] = file_id
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> str | None:
+        file_id = self._memory.get(key)
+        if file_id is not None:
+            self._memory.move_to_end(key)
+            return file_id
+        if self._table is None:
+            return None
+        rows = await self._table.execute("SELECT file_id FROM file_ids WHERE key = ?", (key,))
+        if not rows:
+            return None
+        self._remember(key, rows[0][0])
+        return rows[0][0]
+
+    async def set(self, key: str, file_id: str) -> None:
+        self._remember(key, file_id)
+        if self._table is not None:
+            await self._table.execute(
+                "INSERT OR REPLACE INTO file_ids (key, file_id, created_at) VALUES (?, ?, ?)",
+                (key, file_id, time.time()),
+            )
+
+    async def delete(self, key: str) -> None:
+        self._memory.pop(key, None)
+        if self._table is not None:
+            await self._table.execute("DELETE FROM file_ids WHERE key = ?", (key,))
+
+    async def close(self) -> None:
+        if self._table is not None:
+            await self._table.close()
+
+
+def extract_file_id(result: dict) -> str | None:
+    """Get the file_id of the media in a sent message"""
+    message = result.get("result")
+    if not isinstance(message, dict):
+        return None
+    if message.get("photo"):
+        # Sizes are ordered smallest to largest
+        return message["photo"][-1].get("file_id")
+    for kind in ("document", "video", "animation", "audio", "voice"):
+        if kind in message:
+            return message[kind].get("file_id")
+    return None
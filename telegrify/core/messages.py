@@ -0,0 +1,90 @@
+"""Messages tracked by correlation key for edit-in-place updates"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from telegrify.core.storage import SQLiteStore
+
+
+class TrackedMessage(NamedTuple):
+    """A sent message that later notifications edit"""
+
+    message_id: int
+    kind: str  # "text" or "caption"
+    digest: str
+
+
+def content_digest(
+    text: str, parse_mode: str | None = None, reply_markup: dict | None = None
+) -> str:
+    """Hash of what a message shows, used to skip edits that change nothing"""
+    content = json.dumps([text, parse_mode, reply_markup], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class _MessageTable(SQLiteStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tracked_messages (
+        key TEXT PRIMARY KEY,
+        message_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    """
+
+
+class MessageStore:
+    """Map correlation keys to the message they created
+
+    Lookups are served from an in-memory LRU; with a path, entries are also
+    stored in SQLite so edits keep working after a restart.
+    """
+
+    def __init__(self, path: str | None = None, max_memory: int = 10000):
+        self.max_memory = max_memory
+        self._memory: OrderedDict[str, TrackedMessage] = OrderedDict()
+        self._table = _MessageTable(path) if path else None
+
+    def _remember(self, key: str, message: TrackedMessage) -> None:
+        self._memory[key] = message
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> TrackedMessage | None:
+        message = self._memory.get(key)
+        if message is not None:
+            self._memory.move_to_end(key)
+            return message
+        if self._table is None:
+            return None
+        rows = await self._table.execute(
+            "SELECT message_id, kind, digest FROM tracked_messages WHERE key = ?", (key,)
+        )
+        if not rows:
+            return None
+        message = TrackedMessage(*rows[0])
+        self._remember(key, message)
+        return message
+
+    async def set(self, key: str, message: TrackedMessage) -> None:
+        self._remember(key, message)
+        if self._table is not None:
+            await self._table.execute(
+                "INSERT OR REPLACE INTO tracked_messages "
+                "(key, message_id, kind, digest, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (key, *message, time.time()),
+            )
+
+    async def delete(self, key: str) -> None:
+        self._memory.pop(key, None)
+        if self._table is not None:
+            await self._table.execute("DELETE FROM tracked_messages WHERE key = ?", (key,))
+
+    async def close(self) -> None:
+        if self._table is not None:
+            await self._table.close()
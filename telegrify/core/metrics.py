@@ -0,0 +1,298 @@
+"""In-process metrics with Prometheus text exposition
+
+Metric updates are plain dict and list operations performed on the event loop
+thread, so the hot path takes no locks. Collection is disabled by default;
+while disabled every update returns immediately.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _NullChild:
+    """Metric child used while collection is disabled"""
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def dec(self, amount: float = 1.0) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        yield
+
+
+_NULL_CHILD = _NullChild()
+
+
+class Metric:
+    """Base class for labelled metrics"""
+
+    kind = "untyped"
+
+    def __init__(
+        self, registry: "MetricsRegistry", name: str, help: str, labelnames: tuple[str, ...]
+    ):
+        self._registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, **labels: str):
+        """Get the child metric for a set of label values"""
+        if not self._registry.enabled:
+            return _NULL_CHILD
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        self._children.clear()
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self.labels(**labels).inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for key, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def _new_child(self):
+        return _Value()
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        """Read the gauge value from a callback when metrics are rendered"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._functions[key] = function
+
+    def remove_function(self, **labels: str) -> None:
+        """Stop reading the gauge value from a callback"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._functions.pop(key, None)
+
+    def _samples(self) -> Iterator[str]:
+        for key, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+        for key, function in self._functions.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(function())}"
+
+    def clear(self) -> None:
+        super().clear()
+        self._functions.clear()
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels: str) -> None:
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels: str):
+        """Context manager observing the elapsed time of its block"""
+        return self.labels(**labels).time()
+
+    def _samples(self) -> Iterator[str]:
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Registry of metrics rendered in Prometheus text format"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self, name, help, labelnames, buckets=buckets))
+
+    def get(self, name: str) -> Metric | None:
+        """Get metric by name"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def reset(self) -> None:
+        """Drop all recorded values"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+metrics = MetricsRegistry()
+
+REQUESTS = metrics.counter(
+    "telegrify_requests_total",
+    "Notification requests by endpoint and outcome",
+    ("endpoint", "status"),
+)
+REQUEST_DURATION = metrics.histogram(
+    "telegrify_request_duration_seconds", "Notification request handling time", ("endpoint",)
+)
+FORMAT_DURATION = metrics.histogram(
+    "telegrify_format_duration_seconds", "Time spent in formatters", ("endpoint", "formatter")
+)
+TEMPLATE_DURATION = metrics.histogram(
+    "telegrify_template_render_duration_seconds",
+    "Time spent rendering Jinja2 templates",
+    ("endpoint",),
+)
+ESCAPE_DURATION = metrics.histogram(
+    "telegrify_escape_duration_seconds",
+    "Time spent escaping text for a parse mode",
+    ("parse_mode",),
+)
+TELEGRAM_DURATION = metrics.histogram(
+    "telegrify_telegram_request_duration_seconds",
+    "Telegram Bot API call latency by method and HTTP status",
+    ("method", "status"),
+)
+TELEGRAM_RETRIES = metrics.counter(
+    "telegrify_telegram_retries_total", "Telegram Bot API calls retried", ("method",)
+)
+TELEGRAM_RATE_LIMITED = metrics.counter(
+    "telegrify_telegram_rate_limited_total", "Telegram Bot API 429 responses", ("method",)
+)
+INFLIGHT_SENDS = metrics.gauge(
+    "telegrify_inflight_sends", "Telegram Bot API calls currently in flight"
+)
+QUEUE_DEPTH = metrics.gauge(
+    "telegrify_queue_depth", "Items waiting in internal queues", ("queue",)
+)
+REQUESTS_SHED = metrics.counter(
+    "telegrify_requests_shed_total", "Requests rejected by admission limits", ("endpoint", "reason")
+)
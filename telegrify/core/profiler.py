@@ -0,0 +1,103 @@
+"""On-demand profiling of the event loop thread"""
+
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Sample the stack of one thread at a fixed interval
+
+    Stacks are aggregated in collapsed format (``frame;frame;frame count``),
+    which flame graph tools accept directly. Nothing runs until ``start()``.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telegrify-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Render samples in collapsed-stack format"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class Profiler:
+    """Run one profiling session at a time against the running event loop"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def sample(self, seconds: float, interval: float = 0.005) -> str:
+        """Sample the event loop thread for a number of seconds (collapsed stacks)"""
+        async with self._lock:
+            sampler = SamplingProfiler(threading.get_ident(), interval)
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                await asyncio.to_thread(sampler.stop)
+            return sampler.collapsed()
+
+    async def trace(self, seconds: float) -> bytes:
+        """Run cProfile on the event loop thread for a number of seconds (pstats dump)"""
+        async with self._lock:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+            profile.create_stats()
+            return marshal.dumps(profile.stats)
+
+
+class _LoadedStats:
+    """Adapter letting pstats.Stats read an in-memory dump"""
+
+    def __init__(self, dump: bytes):
+        self.stats = marshal.loads(dump)
+
+    def create_stats(self) -> None:
+        pass
+
+
+def pstats_summary(dump: bytes, limit: int = 30) -> str:
+    """Render a pstats dump as text sorted by cumulative time"""
+    stream = io.StringIO()
+    pstats.Stats(_LoadedStats(dump), stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
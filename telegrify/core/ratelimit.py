@@ -0,0 +1,91 @@
+"""Outgoing rate limiting for the Bot API"""
+
+import asyncio
+
+
+class _Bucket:
+    """Token bucket tracked as a theoretical arrival time (GCRA)"""
+
+    __slots__ = ("interval", "tolerance", "tat")
+
+    def __init__(self, rate: float, burst: int):
+        self.interval = 1.0 / rate
+        self.tolerance = self.interval * (burst - 1)
+        self.tat = 0.0
+
+    def earliest(self, now: float) -> float:
+        """Earliest time the next request conforms"""
+        return max(now, self.tat - self.tolerance)
+
+    def take(self, at: float) -> None:
+        self.tat = max(self.tat, at) + self.interval
+
+
+class RateLimiter:
+    """Keep sends within Telegram's global and per-chat limits
+
+    A request reserves a slot in the global bucket and in its chat's bucket
+    and sleeps until both allow it. Reservations are made in call order, so
+    sends to a chat are released in the order they were requested. A rate of
+    0 disables that limit.
+    """
+
+    # Idle chat buckets are dropped once this many are tracked
+    MAX_IDLE_CHATS = 10000
+
+    def __init__(self, rate: float = 30.0, chat_rate: float = 1.0, chat_burst: int = 3):
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._global = _Bucket(rate, max(1, int(rate))) if rate else None
+        self._chats: dict[str, _Bucket] = {}
+
+    @classmethod
+    def from_config(cls, config) -> "RateLimiter":
+        return cls(
+            rate=config.rate_limit,
+            chat_rate=config.chat_rate_limit,
+            chat_burst=config.chat_burst,
+        )
+
+    def _chat_bucket(self, chat_id: str | int, now: float) -> _Bucket | None:
+        if not self.chat_rate:
+            return None
+        key = str(chat_id)
+        bucket = self._chats.get(key)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_IDLE_CHATS:
+                self._chats = {k: b for k, b in self._chats.items() if b.tat > now}
+            bucket = self._chats[key] = _Bucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def reserve(self, chat_id: str | int | None = None) -> float:
+        """Reserve the next slot, returning seconds to wait before sending"""
+        now = asyncio.get_running_loop().time()
+        buckets = [self._global] if self._global else []
+        if chat_id is not None:
+            chat = self._chat_bucket(chat_id, now)
+            if chat is not None:
+                buckets.append(chat)
+        at = max((bucket.earliest(now) for bucket in buckets), default=now)
+        for bucket in buckets:
+            bucket.take(at)
+        return at - now
+
+    async def acquire(self, chat_id: str | int | None = None) -> None:
+        """Wait until a send to chat_id is allowed"""
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, chat_id: str | int | None, seconds: float) -> None:
+        """Hold back sends after Telegram asked to retry later"""
+        now = asyncio.get_running_loop().time()
+        until = now + seconds
+        if chat_id is not None:
+            chat = self._chat_bucket(chat_id, now)
+            if chat is not None:
+                chat.tat = max(chat.tat, until + chat.tolerance)
+                return
+        if self._global is not None:
+            self._global.tat = max(self._global.tat, until + self._global.tolerance)
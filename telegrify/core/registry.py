@@ -2,29 +2,89 @@
 
 import importlib
 import inspect
+import logging
 import sys
+from importlib.metadata import entry_points
 from pathlib import Path
-from typing import Union
+from typing import Iterable, Union
+
+import yaml
 
 from telegrify.core.interfaces import IFormatter, IPlugin
 
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "telegrify.formatters"
+MANIFEST_NAME = "manifest.yaml"
+
 
 class PluginRegistry:
-    """Registry for managing formatters and plugins"""
+    """Registry for managing formatters and plugins
+
+    Formatters can be registered as instances or lazily, as a
+    ``"module:Class"`` spec from a package entry point or a plugins manifest.
+    Lazy formatters are imported and instantiated on first use, so only the
+    formatters endpoints use cost startup time and memory.
+    """
 
     def __init__(self):
         self._formatters: dict[str, Union[IFormatter, IPlugin]] = {}
+        self._lazy: dict[str, str] = {}
+        self._scan_dirs: list[Path] = []
 
     def register_formatter(self, name: str, formatter: Union[IFormatter, IPlugin]) -> None:
         """Register a formatter or plugin"""
         self._formatters[name] = formatter
 
+    def register_lazy(self, name: str, target: str) -> None:
+        """Register a formatter to import from a "module:Class" spec on first use"""
+        if name not in self._formatters:
+            self._lazy[name] = target
+
     def get_formatter(self, name: str) -> Union[IFormatter, IPlugin] | None:
-        """Get formatter by name"""
-        return self._formatters.get(name)
+        """Get formatter by name, loading it if it was registered lazily"""
+        formatter = self._formatters.get(name)
+        if formatter is None and (name in self._lazy or self._scan_dirs):
+            formatter = self._load(name)
+        return formatter
+
+    def load(self, names: Iterable[str]) -> list[str]:
+        """Load the named formatters now, returning the names that are not available"""
+        return [name for name in dict.fromkeys(names) if self.get_formatter(name) is None]
+
+    def _load(self, name: str) -> Union[IFormatter, IPlugin] | None:
+        target = self._lazy.pop(name, None)
+        if target is None:
+            return self._scan(name)
+        module_name, _, attr = target.partition(":")
+        try:
+            obj = getattr(importlib.import_module(module_name), attr)
+            formatter = obj() if inspect.isclass(obj) else obj
+        except Exception as e:
+            logger.error("Failed to load formatter '%s' from %s: %s", name, target, e)
+            return None
+        if not isinstance(formatter, (IFormatter, IPlugin)):
+            logger.error("Formatter '%s' from %s is not an IFormatter or IPlugin", name, target)
+            return None
+        self.register_formatter(name, formatter)
+        return formatter
+
+    def discover_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """Register formatters that installed packages declare as entry points
+
+        Nothing is imported until a formatter is used.
+        """
+        for entry_point in entry_points(group=group):
+            self.register_lazy(entry_point.name, entry_point.value)
 
     def discover_plugins(self, plugins_dir: str = "plugins") -> None:
-        """Auto-discover plugins from plugins directory"""
+        """Find plugins in a plugins directory
+
+        With a ``manifest.yaml`` mapping formatter names to ``"module:Class"``
+        (modules inside the directory), formatters are registered lazily.
+        Without one, plugin files are imported only when an unknown formatter
+        is requested, and only until it is found.
+        """
         plugins_path = Path(plugins_dir)
 
         if not plugins_path.exists():
@@ -33,30 +93,48 @@ class PluginRegistry:
         if str(plugins_path.parent) not in sys.path:
             sys.path.insert(0, str(plugins_path.parent))
 
-        for file_path in plugins_path.glob("*.py"):
-            if file_path.name.startswith("_"):
-                continue
-
-            module_name = f"{plugins_path.name}.{file_path.stem}"
-
-            try:
-                module = importlib.import_module(module_name)
-
-                for name, obj in inspect.getmembers(module, inspect.isclass):
-                    if obj in (IFormatter, IPlugin):
-                        continue
-
-                    if issubclass(obj, (IFormatter, IPlugin)):
-                        instance = obj()
-                        plugin_name = instance.name if hasattr(instance, "name") else name.lower()
-                        self.register_formatter(plugin_name, instance)
+        manifest = plugins_path / MANIFEST_NAME
+        if not manifest.exists():
+            self._scan_dirs.append(plugins_path)
+            return
 
-            except Exception as e:
-                print(f"Warning: Failed to load plugin from {file_path}: {e}")
+        try:
+            with open(manifest) as f:
+                entries = (yaml.safe_load(f) or {}).get("formatters", {})
+        except Exception as e:
+            logger.warning("Failed to read plugin manifest %s: %s", manifest, e)
+            return
+        for name, target in entries.items():
+            self.register_lazy(name, f"{plugins_path.name}.{target}")
+
+    def _scan(self, wanted: str) -> Union[IFormatter, IPlugin] | None:
+        """Import plugin files without a manifest until one provides wanted"""
+        while self._scan_dirs:
+            plugins_path = self._scan_dirs[0]
+            for file_path in sorted(plugins_path.glob("*.py")):
+                if file_path.name.startswith("_"):
+                    continue
+                module_name = f"{plugins_path.name}.{file_path.stem}"
+                try:
+                    # Returns the cached module if another registry imported it already
+                    module = importlib.import_module(module_name)
+                    for name, obj in inspect.getmembers(module, inspect.isclass):
+                        if obj in (IFormatter, IPlugin) or obj.__module__ != module.__name__:
+                            continue
+                        if issubclass(obj, (IFormatter, IPlugin)):
+                            instance = obj()
+                            plugin_name = getattr(instance, "name", name.lower())
+                            self._formatters.setdefault(plugin_name, instance)
+                except Exception as e:
+                    logger.warning("Failed to load plugin from %s: %s", file_path, e)
+                if wanted in self._formatters:
+                    return self._formatters[wanted]
+            self._scan_dirs.pop(0)
+        return None
 
     def list_formatters(self) -> list[str]:
-        """List all registered formatters"""
-        return list(self._formatters.keys())
+        """List all registered formatters, including ones not loaded yet"""
+        return [*self._formatters, *self._lazy]
 
 
 registry = PluginRegistry()
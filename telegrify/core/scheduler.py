@@ -0,0 +1,197 @@
+"""Delivery scheduler keeping per-chat order while sending to chats in parallel"""
+
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from telegrify.core.metrics import QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+SendFunc = Callable[[], Awaitable[Any]]
+
+PRIORITIES = ("high", "normal", "low")
+PRIORITY_POLICIES = ("weighted", "strict")
+DEFAULT_PRIORITY_WEIGHTS = {"high": 8, "normal": 3, "low": 1}
+
+
+class _Job:
+    __slots__ = ("send", "future")
+
+    def __init__(self, send: SendFunc, future: asyncio.Future):
+        self.send = send
+        self.future = future
+
+
+class DeliveryScheduler:
+    """Shard sends by chat onto workers
+
+    Each chat has a FIFO lane of pending sends. A chat with pending work sits
+    in exactly one worker shard (chosen by hash of chat_id), and only one of
+    its sends runs at a time, so messages to a chat leave in submission order,
+    including while a send is being retried. After each send the chat moves
+    to the back of the shard, so a hot chat cannot starve the others, and idle
+    workers steal ready chats from the busiest shard to rebalance load.
+
+    Sends have a priority (``high``, ``normal`` or ``low``), and each priority
+    has its own lanes and shards, so order is kept among sends of the same
+    priority to a chat. A free worker picks the priority to serve next:
+
+    - ``weighted``: smooth weighted round robin over priorities with ready
+      chats, so when all are backlogged each gets ``weights[priority]`` of
+      every ``sum(weights)`` sends, and with it that share of the rate limit
+    - ``strict``: always the highest priority with ready chats
+
+    Either way a high priority send is picked within a few sends of a worker
+    becoming free, however long the other lanes are.
+    """
+
+    def __init__(
+        self, workers: int = 8, policy: str = "weighted", weights: dict[str, int] | None = None
+    ):
+        if policy not in PRIORITY_POLICIES:
+            raise ValueError(f"Unknown priority policy: {policy}")
+        self.workers = workers
+        self.policy = policy
+        self.weights = {**DEFAULT_PRIORITY_WEIGHTS, **(weights or {})}
+        self._lanes: dict[tuple[str, str], deque[_Job]] = {}
+        self._shards: dict[str, list[deque[str]]] = {
+            priority: [deque() for _ in range(workers)] for priority in PRIORITIES
+        }
+        self._ready_count = dict.fromkeys(PRIORITIES, 0)
+        self._credit = dict.fromkeys(PRIORITIES, 0)
+        self._ready: asyncio.Semaphore | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._queued = 0
+        self._idle: asyncio.Event | None = None
+
+    @property
+    def queued(self) -> int:
+        """Sends waiting for a worker"""
+        return self._queued
+
+    @property
+    def chats(self) -> int:
+        """Chat lanes with pending or running sends"""
+        return len(self._lanes)
+
+    @classmethod
+    def from_config(cls, config) -> "DeliveryScheduler":
+        return cls(
+            workers=config.workers,
+            policy=config.priority_policy,
+            weights=config.priority_weights,
+        )
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._ready = asyncio.Semaphore(0)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # Workers outlive the request that started them, so they must not
+        # inherit its context; each job brings the context it needs
+        self._tasks = [
+            contextvars.Context().run(
+                asyncio.create_task, self._worker(i), name=f"telegrify-delivery-{i}"
+            )
+            for i in range(self.workers)
+        ]
+        QUEUE_DEPTH.set_function(lambda: self._queued, queue="delivery")
+
+    def submit(
+        self, chat_id: str | int, send: SendFunc, priority: str = "normal"
+    ) -> asyncio.Future:
+        """Queue a send for a chat, returning a future with its result"""
+        if priority not in self._ready_count:
+            raise ValueError(f"Unknown priority: {priority}")
+        self._ensure_started()
+        key = str(chat_id)
+        future = asyncio.get_running_loop().create_future()
+        lane = self._lanes.get((priority, key))
+        if lane is None:
+            lane = self._lanes[(priority, key)] = deque()
+            self._schedule(priority, key, hash(key) % self.workers)
+        lane.append(_Job(send, future))
+        self._queued += 1
+        self._idle.clear()
+        return future
+
+    async def send(self, chat_id: str | int, send: SendFunc, priority: str = "normal") -> Any:
+        """Queue a send and wait for its result"""
+        return await self.submit(chat_id, send, priority)
+
+    def _schedule(self, priority: str, key: str, shard: int) -> None:
+        self._shards[priority][shard].append(key)
+        self._ready_count[priority] += 1
+        self._ready.release()
+
+    def _pick_priority(self) -> str:
+        ready = [priority for priority in PRIORITIES if self._ready_count[priority]]
+        if self.policy == "strict" or len(ready) == 1:
+            return ready[0]
+        for priority in PRIORITIES:
+            # Credit is only earned while waiting, so an idle priority cannot bank a burst
+            if priority in ready:
+                self._credit[priority] += self.weights[priority]
+            else:
+                self._credit[priority] = 0
+        chosen = max(ready, key=self._credit.__getitem__)
+        self._credit[chosen] -= sum(self.weights[priority] for priority in ready)
+        return chosen
+
+    def _take(self, index: int) -> tuple[str, str]:
+        priority = self._pick_priority()
+        self._ready_count[priority] -= 1
+        shards = self._shards[priority]
+        own = shards[index]
+        if own:
+            return priority, own.popleft()
+        busiest = max(shards, key=len)
+        return priority, busiest.popleft()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            await self._ready.acquire()
+            priority, key = self._take(index)
+            lane = self._lanes[(priority, key)]
+            job = lane.popleft()
+            self._queued -= 1
+            try:
+                result = await job.send()
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+
+            if lane:
+                # A stolen chat stays with the worker that took it
+                self._schedule(priority, key, index)
+            else:
+                del self._lanes[(priority, key)]
+                if not self._lanes:
+                    self._idle.set()
+
+    async def join(self) -> None:
+        """Wait until all submitted sends have finished"""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def stop(self) -> None:
+        """Finish pending sends and stop workers"""
+        if not self._tasks:
+            return
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        QUEUE_DEPTH.remove_function(queue="delivery")
@@ -0,0 +1,288 @@
+"""Payload schemas compiled into validators"""
+
+import re
+from typing import Any, Callable
+
+Check = Callable[[Any, tuple, list], None]
+Validator = Callable[[Any], list[dict]]
+
+TYPES: dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: (
+        (isinstance(v, int) and not isinstance(v, bool))
+        or (isinstance(v, float) and v.is_integer())
+    ),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+}
+
+SHORTHAND_TYPES = {
+    "str": "string",
+    "string": "string",
+    "int": "integer",
+    "integer": "integer",
+    "float": "number",
+    "number": "number",
+    "bool": "boolean",
+    "boolean": "boolean",
+    "list": "array",
+    "array": "array",
+    "dict": "object",
+    "object": "object",
+    "any": None,
+}
+
+# Keywords that only describe a schema and need no check
+ANNOTATIONS = {
+    "$schema",
+    "$id",
+    "title",
+    "description",
+    "default",
+    "examples",
+    "format",
+    "$comment",
+}
+
+KEYWORDS = {
+    "type",
+    "enum",
+    "const",
+    "properties",
+    "required",
+    "additionalProperties",
+    "items",
+    "minItems",
+    "maxItems",
+    "minLength",
+    "maxLength",
+    "pattern",
+    "minimum",
+    "maximum",
+    "exclusiveMinimum",
+    "exclusiveMaximum",
+}
+
+
+class SchemaError(ValueError):
+    """The schema itself is invalid or uses unsupported keywords"""
+
+
+def expand_shorthand(fields: dict[str, str]) -> dict:
+    """Turn {"field": "int", "note": "str?"} into a JSON Schema ("?" marks optional)"""
+    properties, required = {}, []
+    for name, type_name in fields.items():
+        if not isinstance(type_name, str):
+            raise SchemaError(
+                f"Type of field '{name}' must be a string, got {type_name!r} "
+                '(add "$schema" to write a JSON Schema instead)'
+            )
+        optional = type_name.endswith("?")
+        type_name = type_name.rstrip("?").strip().lower()
+        if type_name not in SHORTHAND_TYPES:
+            raise SchemaError(f"Unknown type '{type_name}' for field '{name}'")
+        json_type = SHORTHAND_TYPES[type_name]
+        properties[name] = {"type": json_type} if json_type else {}
+        if not optional:
+            required.append(name)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def compile_schema(schema: dict) -> Validator:
+    """Compile a schema once into a function returning a list of errors
+
+    ``schema`` is a JSON Schema when it has a top-level ``$schema`` key, and
+    otherwise a shorthand mapping of field names to types. The JSON Schema
+    subset covers type, enum, const, properties, required,
+    additionalProperties, items, min/maxItems, min/maxLength, pattern and
+    the numeric bounds; other keywords raise SchemaError. Errors look like
+    FastAPI's: ``{"loc": [...], "msg": ..., "type": ...}``.
+    """
+    if not isinstance(schema, dict):
+        raise SchemaError("Schema must be an object")
+    if "$schema" not in schema:
+        schema = expand_shorthand(schema)
+    check = _compile(schema, ("body",))
+
+    def validate(payload: Any) -> list[dict]:
+        errors: list[dict] = []
+        check(payload, ("body",), errors)
+        return errors
+
+    return validate
+
+
+def _error(errors: list, loc: tuple, msg: str, kind: str) -> None:
+    errors.append({"loc": list(loc), "msg": msg, "type": kind})
+
+
+def _path(where: tuple) -> str:
+    return ".".join(map(str, where))
+
+
+def _compile(node: dict, where: tuple) -> Check:
+    if not isinstance(node, dict):
+        raise SchemaError(f"Schema at {_path(where)} must be an object")
+    unknown = set(node) - ANNOTATIONS - KEYWORDS
+    if unknown:
+        raise SchemaError(
+            f"Unsupported schema keywords at {_path(where)}: {', '.join(sorted(unknown))}"
+        )
+
+    checks: list[Check] = []
+    type_check = _compile_type(node.get("type"), where) if "type" in node else None
+
+    if "enum" in node:
+        allowed = node["enum"]
+
+        def check_enum(value, loc, errors):
+            if value not in allowed:
+                _error(errors, loc, f"Value must be one of {allowed}", "enum")
+
+        checks.append(check_enum)
+    if "const" in node:
+        const = node["const"]
+
+        def check_const(value, loc, errors):
+            if value != const:
+                _error(errors, loc, f"Value must be {const!r}", "const")
+
+        checks.append(check_const)
+
+    checks.extend(_compile_bounds(node))
+    checks.extend(_compile_string(node))
+    if any(key in node for key in ("properties", "required", "additionalProperties")):
+        checks.append(_compile_object(node, where))
+    if any(key in node for key in ("items", "minItems", "maxItems")):
+        checks.append(_compile_array(node, where))
+
+    if type_check is None and len(checks) == 1:
+        return checks[0]
+
+    def check(value, loc, errors):
+        if type_check is not None and not type_check(value, loc, errors):
+            return
+        for each in checks:
+            each(value, loc, errors)
+
+    return check
+
+
+def _compile_type(types, where: tuple) -> Callable[[Any, tuple, list], bool]:
+    if not isinstance(types, (str, list)):
+        raise SchemaError(f"type must be a string or a list at {_path(where)}")
+    names = [types] if isinstance(types, str) else types
+    for name in names:
+        if name not in TYPES:
+            raise SchemaError(f"Unknown type '{name}' at {_path(where)}")
+    tests = [TYPES[name] for name in names]
+    expected = " or ".join(names)
+
+    def check_type(value, loc, errors) -> bool:
+        for test in tests:
+            if test(value):
+                return True
+        _error(errors, loc, f"Expected {expected}", f"type_error.{names[0]}")
+        return False
+
+    return check_type
+
+
+def _compile_bounds(node: dict) -> list[Check]:
+    checks = []
+    for keyword, fails, text in (
+        ("minimum", lambda v, b: v < b, "greater than or equal to"),
+        ("maximum", lambda v, b: v > b, "less than or equal to"),
+        ("exclusiveMinimum", lambda v, b: v <= b, "greater than"),
+        ("exclusiveMaximum", lambda v, b: v >= b, "less than"),
+    ):
+        if keyword not in node:
+            continue
+        bound = node[keyword]
+
+        def check_bound(value, loc, errors, bound=bound, fails=fails, text=text, keyword=keyword):
+            if TYPES["number"](value) and fails(value, bound):
+                _error(errors, loc, f"Value must be {text} {bound}", keyword)
+
+        checks.append(check_bound)
+    return checks
+
+
+def _compile_string(node: dict) -> list[Check]:
+    checks = []
+    min_length, max_length = node.get("minLength"), node.get("maxLength")
+    if min_length is not None or max_length is not None:
+
+        def check_length(value, loc, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                message = f"String must have at least {min_length} characters"
+                _error(errors, loc, message, "minLength")
+            if max_length is not None and len(value) > max_length:
+                message = f"String must have at most {max_length} characters"
+                _error(errors, loc, message, "maxLength")
+
+        checks.append(check_length)
+    if "pattern" in node:
+        try:
+            pattern = re.compile(node["pattern"])
+        except re.error as e:
+            raise SchemaError(f"Invalid pattern {node['pattern']!r}: {e}")
+
+        def check_pattern(value, loc, errors):
+            if isinstance(value, str) and not pattern.search(value):
+                _error(errors, loc, f"String does not match {pattern.pattern!r}", "pattern")
+
+        checks.append(check_pattern)
+    return checks
+
+
+def _compile_object(node: dict, where: tuple) -> Check:
+    subschemas = node.get("properties", {})
+    if not isinstance(subschemas, dict):
+        raise SchemaError(f"properties must be an object at {_path(where)}")
+    properties = [(name, _compile(sub, where + (name,))) for name, sub in subschemas.items()]
+    required = list(node.get("required", []))
+    additional = node.get("additionalProperties", True)
+    if not isinstance(additional, bool):
+        raise SchemaError(f"additionalProperties must be true or false at {_path(where)}")
+    known = {name for name, _ in properties}
+
+    def check_object(value, loc, errors):
+        if not isinstance(value, dict):
+            return
+        for name in required:
+            if name not in value:
+                _error(errors, loc + (name,), "Field required", "missing")
+        for name, check in properties:
+            if name in value:
+                check(value[name], loc + (name,), errors)
+        if not additional:
+            for name in value:
+                if name not in known:
+                    _error(errors, loc + (name,), "Extra field not allowed", "additionalProperties")
+
+    return check_object
+
+
+def _compile_array(node: dict, where: tuple) -> Check:
+    item_check = _compile(node["items"], where + ("items",)) if "items" in node else None
+    min_items, max_items = node.get("minItems"), node.get("maxItems")
+
+    def check_array(value, loc, errors):
+        if not isinstance(value, list):
+            return
+        if min_items is not None and len(value) < min_items:
+            _error(errors, loc, f"Array must have at least {min_items} items", "minItems")
+        if max_items is not None and len(value) > max_items:
+            _error(errors, loc, f"Array must have at most {max_items} items", "maxItems")
+        if item_check is not None:
+            for index, item in enumerate(value):
+                item_check(item, loc + (index,), errors)
+
+    return check_array
+
@@ -0,0 +1,70 @@
+"""SQLite persistence helpers"""
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+class SQLiteStore:
+    """SQLite database accessed from a single background thread
+
+    All statements run on one dedicated thread, so the event loop never
+    blocks on disk I/O and SQLite sees a single writer. Subclasses set
+    ``SCHEMA`` to the statements creating their tables and indexes.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telegrify-sqlite")
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            if self.SCHEMA:
+                self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    async def run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        """Run func(connection) on the database thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connection()))
+
+    async def execute(self, sql: str, params: Iterable[Any] = ()) -> list[tuple]:
+        """Execute a statement and commit, returning fetched rows"""
+
+        def execute(conn: sqlite3.Connection) -> list[tuple]:
+            with conn:
+                return conn.execute(sql, tuple(params)).fetchall()
+
+        return await self.run(execute)
+
+    async def executemany(self, sql: str, rows: Iterable[Iterable[Any]]) -> None:
+        """Execute a statement for many rows in one transaction"""
+
+        def executemany(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.executemany(sql, [tuple(row) for row in rows])
+
+        await self.run(executemany)
+
+    async def close(self) -> None:
+        """Close the connection and stop the database thread"""
+
+        def close(conn: sqlite3.Connection) -> None:
+            conn.close()
+
+        if self._conn is not None:
+            await self.run(close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,99 @@
+"""Incoming request rate limiting in fixed memory"""
+
+import hashlib
+import math
+import time
+
+
+class SlidingWindowSketch:
+    """Approximate request counts per key over a sliding window
+
+    Counts live in two count-min sketches (``depth`` rows of ``width``
+    counters), one for the current window and one for the previous. The
+    sliding count is the current count plus the previous one weighted by how
+    much of it still overlaps the window. When a window ends the older sketch
+    is dropped, so memory stays the same however many keys are seen.
+    Estimates can be slightly high when keys collide, never low.
+    """
+
+    def __init__(self, window: float = 60.0, width: int = 4096, depth: int = 4):
+        self.window = window
+        self.width = width
+        self.depth = depth
+        self._index = 0
+        self._current = self._empty()
+        self._previous = self._empty()
+
+    def _empty(self) -> list[list[int]]:
+        return [[0] * self.width for _ in range(self.depth)]
+
+    def _rotate(self, now: float) -> float:
+        """Move to the window containing now, returning the elapsed share of it"""
+        index = int(now // self.window)
+        if index != self._index:
+            self._previous = self._current if index == self._index + 1 else self._empty()
+            self._current = self._empty()
+            self._index = index
+        return now / self.window - index
+
+    def _slots(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[4 * row : 4 * row + 4], "little") % self.width
+            for row in range(self.depth)
+        ]
+
+    def _counts(self, slots: list[int]) -> tuple[int, int]:
+        current = min(row[slot] for row, slot in zip(self._current, slots))
+        previous = min(row[slot] for row, slot in zip(self._previous, slots))
+        return current, previous
+
+    def count(self, key: str, now: float | None = None) -> float:
+        """Estimated requests for key in the last window"""
+        elapsed = self._rotate(time.monotonic() if now is None else now)
+        current, previous = self._counts(self._slots(key))
+        return current + previous * (1 - elapsed)
+
+    def add(self, key: str, now: float | None = None) -> None:
+        self._rotate(time.monotonic() if now is None else now)
+        slots = self._slots(key)
+        # Conservative update: only raise the counters at the key's minimum
+        target = min(row[slot] for row, slot in zip(self._current, slots)) + 1
+        for row, slot in zip(self._current, slots):
+            if row[slot] < target:
+                row[slot] = target
+
+    def retry_after(self, key: str, limit: int, now: float | None = None) -> float:
+        """Seconds until one more request for key fits within limit"""
+        now = time.monotonic() if now is None else now
+        elapsed = self._rotate(now)
+        current, previous = self._counts(self._slots(key))
+        room = limit - 1
+        if current > room:
+            # Wait for the next window, then for enough of this one to slide out
+            return self.window * (1 - elapsed) + self.window * (1 - room / current)
+        if previous:
+            return max(0.0, self.window * (1 - (room - current) / previous - elapsed))
+        return 0.0
+
+
+class InboundLimiter:
+    """Check a request against limits on several keys at once"""
+
+    def __init__(self, window: float = 60.0, width: int = 4096, depth: int = 4):
+        self.sketch = SlidingWindowSketch(window, width, depth)
+
+    def acquire(self, checks: list[tuple[str, int]]) -> tuple[str, int] | None:
+        """Count a request against each (key, limit)
+
+        Returns None when every key is within its limit. Otherwise nothing is
+        counted and the first key over its limit is returned with the seconds
+        to wait.
+        """
+        now = time.monotonic()
+        for key, limit in checks:
+            if self.sketch.count(key, now) + 1 > limit:
+                return key, max(1, math.ceil(self.sketch.retry_after(key, limit, now)))
+        for key, _ in checks:
+            self.sketch.add(key, now)
+        return None
@@ -0,0 +1,102 @@
+"""Per-request stage timing reported through the Server-Timing header
+
+Timing is only recorded while a request has started a timing context; outside
+of one, ``stage()`` returns a shared no-op context manager.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Awaitable, TypeVar
+
+T = TypeVar("T")
+
+_timings: ContextVar["RequestTimings | None"] = ContextVar("telegrify_timings", default=None)
+
+
+class RequestTimings:
+    """Stage durations recorded during a single request"""
+
+    __slots__ = ("started", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        """Add duration to a stage (repeated stages are summed)"""
+        self.stages[name] = self.stages.get(name, 0.0) + duration
+
+    def mark(self, name: str) -> None:
+        """Record the time elapsed since the request started as a stage"""
+        self.add(name, time.perf_counter() - self.started)
+
+    def header(self) -> str:
+        """Format stages as a Server-Timing header value (milliseconds)"""
+        entries = [f"{name};dur={duration * 1000:.3f}" for name, duration in self.stages.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.3f}")
+        return ", ".join(entries)
+
+
+class _Stage:
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name: str, timings: RequestTimings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def start_request() -> RequestTimings:
+    """Start recording stage timings for the current request context"""
+    timings = RequestTimings()
+    _timings.set(timings)
+    return timings
+
+
+def current() -> RequestTimings | None:
+    """Get timings of the current request, if recording"""
+    return _timings.get()
+
+
+async def with_timings(timings: RequestTimings | None, awaitable: Awaitable[T]) -> T:
+    """Await work handed to another task, recording stages into timings"""
+    token = _timings.set(timings)
+    try:
+        return await awaitable
+    finally:
+        _timings.reset(token)
+
+
+def stage(name: str):
+    """Context manager timing a named stage of the current request"""
+    timings = _timings.get()
+    if timings is None:
+        return _NULL_STAGE
+    return _Stage(name, timings)
+
+
+def mark(name: str) -> None:
+    """Record time since the request started as a stage, if recording"""
+    timings = _timings.get()
+    if timings is not None:
+        timings.mark(name)
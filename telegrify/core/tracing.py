@@ -0,0 +1,291 @@
+"""Request tracing spans exported as OTLP JSON
+
+Tracing is off until ``configure()`` installs an exporter; until then
+``span()`` returns a shared no-op context manager. Finished spans are handed
+to a background thread through a bounded queue (spans are dropped when it is
+full) and written as OTLP/JSON lines, one ``ExportTraceServiceRequest`` per
+batch, to stdout or a file that OpenTelemetry tools can read.
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, TypeVar
+
+from telegrify.core import logs
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current: ContextVar["Span | None"] = ContextVar("telegrify_span", default=None)
+_exporter: "SpanExporter | None" = None
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = (
+        "name",
+        "kind",
+        "attributes",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start",
+        "end",
+        "error",
+        "_token",
+    )
+
+    def __init__(self, name: str, kind: int, attributes: dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def fail(self, message: str) -> None:
+        """Mark the span as failed without raising"""
+        self.error = message
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        if parent is None:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+            self.parent_id = None
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        request_id = logs.current_request_id()
+        if request_id is not None:
+            self.attributes.setdefault("request.id", request_id)
+        self._token = _current.set(self)
+        self.start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end = time.time_ns()
+        _current.reset(self._token)
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.error = f"{exc_type.__name__}: {exc}"
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(self)
+        return False
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "status": (
+                {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK}
+            ),
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def fail(self, message: str) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Span | _NullSpan:
+    """Context manager timing a span, a child of the current one if any"""
+    if _exporter is None:
+        return _NULL_SPAN
+    return Span(name, kind, attributes)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+async def run_in(
+    parent: Span | None,
+    name: str,
+    awaitable: Awaitable[T],
+    kind: int = SPAN_KIND_INTERNAL,
+    **attributes: Any,
+) -> T:
+    """Await work handed to another task in a child span of parent, or a new trace without one"""
+    token = _current.set(parent)
+    try:
+        with span(name, kind, **attributes):
+            return await awaitable
+    finally:
+        _current.reset(token)
+
+
+def traceparent(span: Span | None) -> str | None:
+    """W3C traceparent value identifying span, to continue its trace later"""
+    if span is None:
+        return None
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+def from_traceparent(value: str | None) -> Span | None:
+    """Parent for spans continuing the trace identified by a traceparent value"""
+    try:
+        _, trace_id, span_id, _ = (value or "").split("-")
+    except ValueError:
+        return None
+    parent = Span("remote", SPAN_KIND_INTERNAL, {})
+    parent.trace_id = trace_id
+    parent.span_id = span_id
+    return parent
+
+
+class SpanExporter:
+    """Write finished spans as OTLP JSON lines from a background thread"""
+
+    def __init__(
+        self,
+        output: str = "-",
+        max_buffer: int = 2048,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+        service_name: str = "telegrify",
+    ):
+        self.output = output
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.resource = {
+            "attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]
+        }
+        self.dropped = 0
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=max_buffer)
+        self._thread = threading.Thread(target=self._run, name="telegrify-tracing", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stream = sys.stdout if self.output == "-" else open(self.output, "a")
+        try:
+            running = True
+            while running:
+                batch: list[Span] = []
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        running = False
+                        break
+                    batch.append(item)
+                if batch:
+                    self._write(stream, batch)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+    def _write(self, stream, batch: list[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "telegrify"},
+                            "spans": [each.to_otlp() for each in batch],
+                        }
+                    ],
+                }
+            ]
+        }
+        try:
+            stream.write(json.dumps(body) + "\n")
+            stream.flush()
+        except (OSError, ValueError) as e:
+            logger.error("Failed to write %d spans: %s", len(batch), e)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Write buffered spans and stop the thread"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self.dropped:
+            logger.warning("Dropped %d spans because the trace buffer was full", self.dropped)
+
+
+def configure(config) -> None:
+    """Start exporting spans if tracing is enabled, replacing an earlier exporter"""
+    global _exporter
+    previous, _exporter = _exporter, None
+    if previous is not None:
+        previous.shutdown()
+    if config.enabled:
+        _exporter = SpanExporter(
+            "-" if config.exporter == "stdout" else config.file,
+            max_buffer=config.max_buffer,
+            batch_size=config.batch_size,
+            flush_interval=config.flush_interval,
+            service_name=config.service_name,
+        )
+
+
+async def shutdown() -> None:
+    """Stop tracing and write buffered spans"""
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if exporter is not None:
+        await asyncio.to_thread(exporter.shutdown)
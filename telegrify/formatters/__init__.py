@@ -1,6 +1,6 @@
 """Built-in formatters"""
 
-from telegrify.formatters.plain import PlainFormatter
 from telegrify.formatters.markdown import MarkdownFormatter
+from telegrify.formatters.plain import PlainFormatter
 
 __all__ = ["PlainFormatter", "MarkdownFormatter"]
@@ -0,0 +1,93 @@
+"""Admin-only operational endpoints"""
+
+import logging
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from telegrify.core.deliverylog import parse_time
+from telegrify.core.profiler import Profiler, pstats_summary
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = 60.0
+
+
+def setup_admin_routes(app: FastAPI, admin_key: str) -> None:
+    """Setup admin endpoints protected by the admin key"""
+    profiler = Profiler()
+    app.state.profiler = profiler
+
+    def check_admin_key(x_admin_key: str | None) -> None:
+        if x_admin_key != admin_key:
+            raise HTTPException(
+                status_code=401,
+                detail={"error": "invalid_admin_key", "message": "Invalid or missing admin key"},
+            )
+
+    @app.post("/admin/profile", include_in_schema=False)
+    async def profile(
+        seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+        format: str = Query("collapsed", pattern="^(collapsed|pstats|text)$"),
+        interval: float = Query(0.005, ge=0.001, le=1.0),
+        x_admin_key: str | None = Header(None),
+    ):
+        """Profile the event loop for a number of seconds"""
+        check_admin_key(x_admin_key)
+
+        if profiler.running:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "error": "profiler_busy",
+                    "message": "A profiling session is already running",
+                },
+            )
+
+        logger.info("Profiling event loop for %ss (%s)", seconds, format)
+
+        if format == "collapsed":
+            return PlainTextResponse(await profiler.sample(seconds, interval))
+
+        dump = await profiler.trace(seconds)
+        if format == "text":
+            return PlainTextResponse(pstats_summary(dump))
+        return Response(
+            dump,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="telegrify.pstats"'},
+        )
+
+    logger.info("Registered admin endpoint: /admin/profile")
+
+    delivery_log = getattr(app.state, "delivery_log", None)
+    if delivery_log is None:
+        return
+
+    @app.get("/admin/deliveries", include_in_schema=False)
+    async def deliveries(
+        chat_id: str | None = Query(None),
+        endpoint: str | None = Query(None),
+        status: str | None = Query(None),
+        payload_hash: str | None = Query(None),
+        since: str | None = Query(None),
+        until: str | None = Query(None),
+        limit: int = Query(100, ge=1, le=1000),
+        x_admin_key: str | None = Header(None),
+    ):
+        """Look up recorded sends, most recent first"""
+        check_admin_key(x_admin_key)
+        try:
+            since_time = parse_time(since) if since else None
+            until_time = parse_time(until) if until else None
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400, detail={"error": "invalid_time", "message": str(e)}
+            )
+        await delivery_log.flush()
+        records = await delivery_log.query(
+            chat_id, endpoint, status, payload_hash, since_time, until_time, limit
+        )
+        return {"deliveries": records}
+
+    logger.info("Registered admin endpoint: /admin/deliveries")
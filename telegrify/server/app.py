@@ -1,34 +1,73 @@
 """FastAPI application factory"""
 
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import yaml
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from telegrify.core import tracing
+from telegrify.core.admission import AdmissionGate
 from telegrify.core.bot import TelegramBot
+from telegrify.core.botpool import BotPool, ChatAssignments
+from telegrify.core.broadcast import BroadcastJobs
 from telegrify.core.config import AppConfig
+from telegrify.core.delayed import DelayedDelivery
+from telegrify.core.deliverylog import DeliveryLog
+from telegrify.core.forwarder import Forwarder
+from telegrify.core.logs import setup_logging
+from telegrify.core.media import FileIdCache
+from telegrify.core.messages import MessageStore
+from telegrify.core.metrics import metrics
+from telegrify.core.ratelimit import RateLimiter
 from telegrify.core.registry import PluginRegistry
+from telegrify.core.scheduler import DeliveryScheduler
+from telegrify.core.throttle import InboundLimiter
 from telegrify.formatters import MarkdownFormatter, PlainFormatter
+from telegrify.server.admin import setup_admin_routes
+from telegrify.server.jobs import setup_job_routes
+from telegrify.server.middleware import (
+    AdmissionMiddleware,
+    InboundRateLimitMiddleware,
+    RequestIdMiddleware,
+    ServerTimingMiddleware,
+)
+from telegrify.server.polling import create_poller
 from telegrify.server.routes import setup_routes
 
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup and shutdown hooks registered by server components"""
+    for hook in app.state.startup_hooks:
+        await hook()
+    yield
+    for hook in reversed(app.state.shutdown_hooks):
+        try:
+            await hook()
+        except Exception as e:
+            logger.error("Shutdown hook failed: %s", e, exc_info=True)
+
+
 def create_app(config_path: str = "config.yaml") -> FastAPI:
     """Create and configure FastAPI application"""
     config = load_config(config_path)
 
-    logging.basicConfig(
-        level=getattr(logging, config.logging.level),
-        format=config.logging.format,
-    )
+    setup_logging(config.logging)
 
     app = FastAPI(
         title="Telegrify",
         description="Simple Telegram notification framework",
         version="1.0.0",
+        docs_url="/docs" if config.server.docs else None,
+        redoc_url="/redoc" if config.server.docs else None,
+        openapi_url="/openapi.json" if config.server.docs else None,
+        lifespan=lifespan,
     )
 
     # Add CORS middleware
@@ -40,25 +79,118 @@ def create_app(config_path: str = "config.yaml") -> FastAPI:
         allow_headers=["*"],
     )
 
-    bot = TelegramBot(token=config.bot.token, test_mode=config.bot.test_mode)
+    if config.server.server_timing:
+        app.add_middleware(ServerTimingMiddleware)
+
+    global_gate, endpoint_gates = create_admission_gates(config)
+    app.state.admission = global_gate
+    app.state.endpoint_gates = endpoint_gates
+    if global_gate is not None or any(endpoint_gates.values()):
+        app.add_middleware(AdmissionMiddleware, gates=endpoint_gates, global_gate=global_gate)
+
+    # Added last so it runs first: rate limited requests never wait for admission
+    limits = config.limits
+    endpoint_limits = {ep.path: ep.request_limit or limits.per_endpoint for ep in config.endpoints}
+    if limits.per_ip or limits.per_api_key or any(endpoint_limits.values()):
+        app.add_middleware(
+            InboundRateLimitMiddleware,
+            limiter=InboundLimiter(limits.window, limits.sketch_width, limits.sketch_depth),
+            endpoint_limits=endpoint_limits,
+            per_api_key=limits.per_api_key,
+            per_ip=limits.per_ip,
+            trust_forwarded_for=limits.trust_forwarded_for,
+        )
+
+    # Outermost, so records logged while shedding a request carry its id too
+    app.add_middleware(RequestIdMiddleware)
+
+    bot_pool, bot_pools, all_bots = create_bot_pools(config)
+    bot = bot_pool.primary
 
     registry = PluginRegistry()
     registry.register_formatter("plain", PlainFormatter())
     registry.register_formatter("markdown", MarkdownFormatter())
 
+    registry.discover_entry_points()
     plugins_dir = Path.cwd() / "plugins"
     if plugins_dir.exists():
-        logger.info("Discovering plugins...")
         registry.discover_plugins(str(plugins_dir))
-        logger.info(f"Loaded formatters: {', '.join(registry.list_formatters())}")
+
+    # Only formatters that endpoints use are imported
+    used = [
+        ep.formatter
+        for ep in config.endpoints
+        if not (ep.template and ep.template in config.templates)
+    ]
+    for name in registry.load(used):
+        logger.warning("Formatter '%s' is used by an endpoint but was not found", name)
+    logger.info("Available formatters: %s", ", ".join(registry.list_formatters()))
 
     # Store in app state
     app.state.config = config
     app.state.bot = bot
+    app.state.bot_pool = bot_pool
+    app.state.bot_pools = bot_pools
     app.state.registry = registry
     app.state.templates = config.templates
+    app.state.forwarder = Forwarder.from_config(config.forwarding)
+    # Pools restore stored least_loaded assignments before the first send
+    app.state.startup_hooks = [app.state.forwarder.start, bot_pool.start]
+    app.state.startup_hooks.extend(pool.start for pool in bot_pools.values())
+    app.state.scheduler = DeliveryScheduler.from_config(config.delivery)
+    app.state.messages = MessageStore(config.bot.message_store)
+    app.state.shutdown_hooks = [
+        *(each.close for each in all_bots),
+        app.state.forwarder.close,
+        app.state.messages.close,
+        app.state.scheduler.stop,
+    ]
+    if bot_pool.assignments is not None:
+        # Closed after every component that sends, once no more chats can be assigned
+        app.state.shutdown_hooks.insert(0, bot_pool.assignments.close)
+    app.state.delayed = DelayedDelivery(
+        config.delivery.schedule_file, horizon=config.delivery.schedule_horizon
+    )
+    app.state.startup_hooks.append(app.state.delayed.start_if_pending)
+    app.state.shutdown_hooks.append(app.state.delayed.stop)
+    app.state.delivery_log = None
+    if config.delivery_log.enabled:
+        app.state.delivery_log = DeliveryLog.from_config(config.delivery_log)
+        app.state.startup_hooks.append(app.state.delivery_log.start)
+        # Stopped after every other component has finished sending
+        app.state.shutdown_hooks.insert(0, app.state.delivery_log.stop)
+    if config.tracing.enabled:
+
+        async def start_tracing():
+            tracing.configure(config.tracing)
+
+        # Started first and stopped last, after the delivery log, so spans
+        # from the rest of startup and shutdown are written too
+        app.state.startup_hooks.insert(0, start_tracing)
+        app.state.shutdown_hooks.insert(0, tracing.shutdown)
+    app.state.broadcasts = None
+    if config.broadcast.recipients_dir:
+        app.state.broadcasts = BroadcastJobs(
+            config.broadcast.jobs_file,
+            config.broadcast.recipients_dir,
+            app.state.scheduler,
+            chunk_size=config.broadcast.chunk_size,
+            max_contexts=config.broadcast.max_contexts,
+            max_inflight=config.broadcast.max_inflight,
+        )
+        app.state.startup_hooks.append(app.state.broadcasts.start_if_pending)
+        # Before the scheduler stops, so running chunks are cancelled first
+        app.state.shutdown_hooks.append(app.state.broadcasts.stop)
 
     setup_routes(app)
+    if app.state.broadcasts is not None:
+        setup_job_routes(app, app.state.broadcasts, config.server.api_key)
+
+    if config.bot.polling:
+        setup_polling(app, bot, config)
+
+    if config.server.admin_key:
+        setup_admin_routes(app, config.server.admin_key)
 
     # Root endpoint
     @app.get("/")
@@ -70,23 +202,123 @@ def create_app(config_path: str = "config.yaml") -> FastAPI:
             "status": "healthy",
             "endpoints": len(config.endpoints),
             "formatters": registry.list_formatters(),
-            "docs": "/docs",
+            "docs": "/docs" if config.server.docs else None,
             "health": "/health",
         }
 
     @app.get("/health")
     async def health_check():
-        return {
+        body = {
             "status": "healthy",
             "endpoints": len(config.endpoints),
             "formatters": registry.list_formatters(),
         }
+        if global_gate is not None:
+            body["saturation"] = global_gate.status()
+        busy = {path: gate.status() for path, gate in endpoint_gates.items() if gate is not None}
+        if busy:
+            body["endpoint_saturation"] = busy
+        if global_gate is not None and global_gate.full:
+            # Let load balancers steer traffic elsewhere until requests drain
+            body["status"] = "saturated"
+            retry_after = str(global_gate.retry_after())
+            return JSONResponse(body, status_code=503, headers={"Retry-After": retry_after})
+        return body
+
+    metrics.enabled = config.metrics.enabled
+    if config.metrics.enabled:
 
-    logger.info(f"Telegrify server initialized with {len(config.endpoints)} endpoints")
+        @app.get(config.metrics.path, include_in_schema=False)
+        async def metrics_endpoint():
+            return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    logger.info("Telegrify server initialized with %d endpoints", len(config.endpoints))
 
     return app
 
 
+def create_admission_gates(
+    config: AppConfig,
+) -> tuple[AdmissionGate | None, dict[str, AdmissionGate | None]]:
+    """Build the global admission gate and a gate (or None) for every endpoint"""
+    server = config.server
+    global_gate = None
+    if server.max_inflight:
+        global_gate = AdmissionGate(server.max_inflight, server.max_queued, server.queue_timeout)
+    endpoint_gates = {
+        ep.path: (
+            AdmissionGate(ep.max_inflight, ep.max_queued, server.queue_timeout)
+            if ep.max_inflight
+            else None
+        )
+        for ep in config.endpoints
+    }
+    return global_gate, endpoint_gates
+
+
+def create_bot_pools(config: AppConfig) -> tuple[BotPool, dict[str, BotPool], list[TelegramBot]]:
+    """Build the default bot pool, the named pools and the list of all bots
+
+    Each token gets one bot with its own rate limiter and connection pool,
+    even when it appears in several pools. least_loaded pools share one
+    store of chat assignments.
+    """
+    file_ids = FileIdCache(config.bot.file_id_cache, cache_urls=config.bot.cache_url_file_ids)
+    bots: dict[str, TelegramBot] = {}
+
+    def get_bot(token: str) -> TelegramBot:
+        if token not in bots:
+            bots[token] = TelegramBot(
+                token=token,
+                test_mode=config.bot.test_mode,
+                pool_size=config.bot.connection_pool_size,
+                file_ids=file_ids,
+                rate_limiter=RateLimiter.from_config(config.bot),
+                api_url=config.bot.api_url,
+            )
+        return bots[token]
+
+    policies = [config.bot.pool_policy, *(pool.pool_policy for pool in config.bots.values())]
+    assignments = None
+    if config.bot.pool_assignments and "least_loaded" in policies:
+        assignments = ChatAssignments(config.bot.pool_assignments)
+
+    default = BotPool(
+        [get_bot(token) for token in dict.fromkeys([config.bot.token, *config.bot.tokens])],
+        config.bot.pool_policy,
+        config.bot.chat_pins,
+        assignments=assignments,
+    )
+    named = {
+        name: BotPool(
+            [get_bot(token) for token in dict.fromkeys(pool.tokens)],
+            pool.pool_policy,
+            pool.chat_pins,
+            name=name,
+            assignments=assignments,
+        )
+        for name, pool in config.bots.items()
+    }
+    if len(bots) > 1:
+        logger.info("Sending with %d bots", len(bots))
+    return default, named, list(bots.values())
+
+
+def setup_polling(app: FastAPI, bot: TelegramBot, config: AppConfig) -> None:
+    """Poll for updates in the background while the server runs"""
+    poller = create_poller(bot, config, app.state.forwarder)
+    app.state.poller = poller
+
+    async def start_polling():
+        # getUpdates is rejected while a webhook is set
+        await bot.delete_webhook()
+        await poller.start()
+
+    app.state.startup_hooks.append(start_polling)
+    app.state.shutdown_hooks.append(poller.stop)
+    logger.info("Long polling enabled")
+
+
 def load_config(config_path: str) -> AppConfig:
     """Load and validate configuration from YAML file"""
     config_file = Path(config_path)
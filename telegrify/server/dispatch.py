@@ -0,0 +1,92 @@
+"""Lookup tables for command and callback handlers"""
+
+import re
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def compile_pattern(pattern: str) -> tuple[str, re.Pattern | None]:
+    """Split pattern into its literal prefix and a regex for its placeholders
+
+    ``approve:{order_id}`` becomes the prefix ``approve:`` and a regex capturing
+    ``order_id``. Patterns without placeholders return ``None`` as regex.
+    """
+    parts = _PLACEHOLDER.split(pattern)
+    if len(parts) == 1:
+        return pattern, None
+
+    regex = []
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            regex.append(re.escape(part))
+        else:
+            regex.append(f"(?P<{part}>.+?)")
+    return parts[0], re.compile("".join(regex), re.DOTALL)
+
+
+class _TrieNode:
+    __slots__ = ("children", "patterns")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.patterns: list[tuple[re.Pattern, object]] = []
+
+
+class HandlerTable(Generic[T]):
+    """Resolve handlers by exact value or by parameterized pattern
+
+    Exact values are looked up in a dict. Patterns are indexed in a trie by
+    their literal prefix, so a lookup only tries the patterns whose prefix
+    matches the value, longest prefix first.
+    """
+
+    def __init__(self):
+        self._exact: dict[str, T] = {}
+        self._root = _TrieNode()
+        self._patterns = 0
+
+    def __len__(self) -> int:
+        return len(self._exact) + self._patterns
+
+    def add(self, pattern: str, handler: T) -> None:
+        """Register handler for an exact value or a ``{param}`` pattern"""
+        prefix, regex = compile_pattern(pattern)
+        if regex is None:
+            self._exact.setdefault(pattern, handler)
+            return
+
+        node = self._root
+        for char in prefix:
+            node = node.children.setdefault(char, _TrieNode())
+        node.patterns.append((regex, handler))
+        self._patterns += 1
+
+    def match(self, value: str) -> tuple[T, dict[str, str]] | None:
+        """Find handler for value, returning it with extracted parameters"""
+        handler = self._exact.get(value)
+        if handler is not None:
+            return handler, {}
+
+        if not self._patterns:
+            return None
+
+        candidates = []
+        node = self._root
+        if node.patterns:
+            candidates.append(node)
+        for char in value:
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.patterns:
+                candidates.append(node)
+
+        for node in reversed(candidates):
+            for regex, handler in node.patterns:
+                found = regex.fullmatch(value)
+                if found:
+                    return handler, found.groupdict()
+        return None
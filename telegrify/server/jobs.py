@@ -0,0 +1,76 @@
+"""Broadcast job endpoints"""
+
+import logging
+from typing import Any
+
+from fastapi import FastAPI, Header, HTTPException
+
+from telegrify.core.broadcast import BroadcastJobs, InvalidPayloadError, RecipientError
+
+logger = logging.getLogger(__name__)
+
+
+def setup_job_routes(app: FastAPI, jobs: BroadcastJobs, api_key: str | None) -> None:
+    """Setup endpoints starting broadcast jobs and reporting their progress"""
+
+    def check_api_key(x_api_key: str | None) -> None:
+        if api_key and x_api_key != api_key:
+            raise HTTPException(
+                status_code=401,
+                detail={"error": "invalid_api_key", "message": "Invalid or missing API key"},
+            )
+
+    async def get_job(job_id: int) -> dict:
+        job = await jobs.get(job_id)
+        if job is None:
+            raise HTTPException(
+                status_code=404, detail={"error": "job_not_found", "message": f"No job {job_id}"}
+            )
+        return job
+
+    @app.post("/jobs")
+    async def create_job(body: dict[str, Any], x_api_key: str | None = Header(None)):
+        """Start sending an endpoint's notification to every recipient in a file or table"""
+        check_api_key(x_api_key)
+        endpoint = body.get("endpoint")
+        payload = body.get("payload", {})
+        recipients = body.get("recipients")
+        if not isinstance(payload, dict) or not isinstance(recipients, dict):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "invalid_job",
+                    "message": "payload and recipients must be objects",
+                },
+            )
+        try:
+            job_id = await jobs.create(endpoint, payload, recipients)
+        except RecipientError as e:
+            raise HTTPException(status_code=400, detail={"error": "invalid_job", "message": str(e)})
+        except InvalidPayloadError as e:
+            raise HTTPException(
+                status_code=422,
+                detail={"error": "invalid_payload", "message": str(e), "errors": e.errors},
+            )
+        logger.info("Started broadcast job %s for %s", job_id, endpoint)
+        return {"job_id": job_id, "status": "running"}
+
+    @app.get("/jobs/{job_id}")
+    async def job_status(job_id: int, x_api_key: str | None = Header(None)):
+        """Report a job's progress, send rate and estimated time left"""
+        check_api_key(x_api_key)
+        return await get_job(job_id)
+
+    @app.delete("/jobs/{job_id}")
+    async def cancel_job(job_id: int, x_api_key: str | None = Header(None)):
+        """Stop a running job"""
+        check_api_key(x_api_key)
+        await get_job(job_id)
+        if not await jobs.cancel(job_id):
+            raise HTTPException(
+                status_code=409,
+                detail={"error": "job_not_running", "message": f"Job {job_id} is not running"},
+            )
+        return await get_job(job_id)
+
+    logger.info("Registered broadcast job endpoints: /jobs")
@@ -0,0 +1,30 @@
+"""Inline keyboard rendering"""
+
+from jinja2 import Template
+
+
+def build_inline_keyboard(buttons: list, payload: dict = None) -> dict | None:
+    """Build inline keyboard markup from button config with template support"""
+    if not buttons:
+        return None
+
+    keyboard = []
+    for row in buttons:
+        keyboard_row = []
+        for btn in row:
+            # Render templates if payload provided
+            text = Template(btn.text).render(**payload) if payload else btn.text
+            button = {"text": text}
+
+            if btn.url:
+                url = Template(btn.url).render(**payload) if payload else btn.url
+                button["url"] = url
+            elif btn.callback_data:
+                callback = btn.callback_data
+                if payload:
+                    callback = Template(callback).render(**payload)
+                button["callback_data"] = callback
+            keyboard_row.append(button)
+        keyboard.append(keyboard_row)
+
+    return {"inline_keyboard": keyboard}
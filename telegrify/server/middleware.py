@@ -0,0 +1,204 @@
+"""ASGI middleware"""
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from telegrify.core import logs, timing
+from telegrify.core.admission import AdmissionGate, OverloadedError
+from telegrify.core.metrics import REQUESTS_SHED
+from telegrify.core.throttle import InboundLimiter
+
+
+def match_endpoint(paths, path: str) -> str | None:
+    """Endpoint path a request path belongs to, including its /upload route
+
+    A trailing slash is ignored, as in EndpointRouter.resolve.
+    """
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    if path in paths:
+        return path
+    if path.endswith("/upload") and path[: -len("/upload")] in paths:
+        return path[: -len("/upload")]
+    return None
+
+
+class RequestIdMiddleware:
+    """Tag each request with an id for its log records, returned in X-Request-ID
+
+    A client-supplied X-Request-ID is kept so logs can be matched across
+    services.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = logs.new_request_id(incoming)
+        logs.set_request_id(request_id)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
+
+
+class ServerTimingMiddleware:
+    """Record stage timings for each request and return them in a Server-Timing header"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = timing.start_request()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and timings.stages:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+class AdmissionMiddleware:
+    """Refuse endpoint requests past in-flight and queue limits before reading the body
+
+    ``gates`` maps every endpoint path to its gate, or None when it has no
+    limit of its own. A full endpoint gate answers 429 (that endpoint is over
+    its quota) and a full global gate answers 503 (the server is overloaded),
+    both with a Retry-After header from the gate's drain rate.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        gates: dict[str, AdmissionGate | None],
+        global_gate: AdmissionGate | None = None,
+    ):
+        self.app = app
+        self.gates = gates
+        self.global_gate = global_gate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        endpoint = match_endpoint(self.gates, scope["path"]) if scope["type"] == "http" else None
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        acquired = []
+        try:
+            for gate, status, reason in (
+                (self.gates[endpoint], 429, "endpoint_busy"),
+                (self.global_gate, 503, "overloaded"),
+            ):
+                if gate is None:
+                    continue
+                try:
+                    await gate.acquire()
+                except OverloadedError as e:
+                    REQUESTS_SHED.inc(endpoint=endpoint, reason=reason)
+                    response = JSONResponse(
+                        {
+                            "detail": {
+                                "error": reason,
+                                "message": "Too many requests in progress, retry later",
+                            }
+                        },
+                        status_code=status,
+                        headers={"Retry-After": str(e.retry_after)},
+                    )
+                    await response(scope, receive, send)
+                    return
+                acquired.append(gate)
+            await self.app(scope, receive, send)
+        finally:
+            for gate in acquired:
+                gate.release()
+
+
+class InboundRateLimitMiddleware:
+    """Limit requests per endpoint, API key and client IP before reading the body
+
+    ``endpoint_limits`` maps every endpoint path to its limit per window, or
+    None. Requests over a limit get 429 with a Retry-After header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: InboundLimiter,
+        endpoint_limits: dict[str, int | None],
+        per_api_key: int | None = None,
+        per_ip: int | None = None,
+        trust_forwarded_for: bool = False,
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.endpoint_limits = endpoint_limits
+        self.per_api_key = per_api_key
+        self.per_ip = per_ip
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def _client_ip(self, scope: Scope, headers: dict[bytes, bytes]) -> str:
+        forwarded = headers.get(b"x-forwarded-for") if self.trust_forwarded_for else None
+        if forwarded:
+            return forwarded.split(b",")[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        endpoint = None
+        if scope["type"] == "http":
+            endpoint = match_endpoint(self.endpoint_limits, scope["path"])
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        checks = []
+        if self.endpoint_limits[endpoint]:
+            checks.append((f"endpoint:{endpoint}", self.endpoint_limits[endpoint]))
+        api_key = headers.get(b"x-api-key")
+        if self.per_api_key and api_key:
+            checks.append((f"api_key:{api_key.decode('latin-1')}", self.per_api_key))
+        if self.per_ip:
+            checks.append((f"ip:{self._client_ip(scope, headers)}", self.per_ip))
+
+        rejected = self.limiter.acquire(checks)
+        if rejected is None:
+            await self.app(scope, receive, send)
+            return
+
+        key, retry_after = rejected
+        kind = key.split(":", 1)[0]
+        REQUESTS_SHED.inc(endpoint=endpoint, reason=f"{kind}_rate_limit")
+        response = JSONResponse(
+            {
+                "detail": {
+                    "error": "rate_limited",
+                    "message": f"Too many requests per {kind}, retry later",
+                }
+            },
+            status_code=429,
+            headers={"Retry-After": str(retry_after)},
+        )
+        await response(scope, receive, send)
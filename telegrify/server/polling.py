@@ -0,0 +1,151 @@
+"""Long-polling getUpdates as an alternative to webhooks"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+import aiohttp
+
+from telegrify.core.bot import TelegramAPIError, TelegramBot
+from telegrify.core.forwarder import Forwarder
+from telegrify.core.ratelimit import RateLimiter
+from telegrify.server.updates import UpdateDeduplicator, UpdateHandler, UpdateWorkerPool
+
+logger = logging.getLogger(__name__)
+
+
+class OffsetStore:
+    """Persist the getUpdates offset in a small file"""
+
+    def __init__(self, path: str | None):
+        self.path = Path(path) if path else None
+
+    def load(self) -> int | None:
+        if self.path is None or not self.path.exists():
+            return None
+        try:
+            return int(self.path.read_text().strip())
+        except ValueError:
+            logger.warning("Ignoring invalid offset file: %s", self.path)
+            return None
+
+    def save(self, offset: int) -> None:
+        if self.path is None:
+            return
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(str(offset))
+        os.replace(tmp_path, self.path)
+
+
+class UpdatePoller:
+    """Fetch updates with getUpdates and feed them to the update worker pool
+
+    Submitting to the pool waits while a worker queue is full, which pauses
+    polling until the workers catch up. Failed polls are retried after
+    ``retry_delay`` seconds, doubling up to a minute.
+    """
+
+    def __init__(
+        self,
+        bot: TelegramBot,
+        pool: UpdateWorkerPool,
+        offset_store: OffsetStore,
+        seen: UpdateDeduplicator | None = None,
+        timeout: int = 30,
+        limit: int = 100,
+        retry_delay: float = 1.0,
+    ):
+        self.bot = bot
+        self.pool = pool
+        self.offset_store = offset_store
+        self.seen = seen or UpdateDeduplicator()
+        self.timeout = timeout
+        self.limit = limit
+        self.retry_delay = retry_delay
+        self.offset = offset_store.load()
+        self._task: asyncio.Task | None = None
+
+    async def poll_once(self) -> int:
+        """Fetch one batch of updates and queue them, returning the batch size"""
+        updates = await self.bot.get_updates(
+            offset=self.offset, timeout=self.timeout, limit=self.limit
+        )
+        for update in updates:
+            update_id = update["update_id"]
+            if update_id not in self.seen:
+                await self.pool.submit(update)
+                self.seen.add(update_id)
+            self.offset = update_id + 1
+        if updates:
+            self.offset_store.save(self.offset)
+        return len(updates)
+
+    async def run(self) -> None:
+        """Poll until cancelled, backing off on errors"""
+        logger.info("Polling Telegram for updates")
+        backoff = self.retry_delay
+        while True:
+            try:
+                await self.poll_once()
+                backoff = self.retry_delay
+            except asyncio.CancelledError:
+                raise
+            except TelegramAPIError as e:
+                delay = e.retry_after or backoff
+                logger.error("getUpdates failed: %s. Retrying in %ss", e, delay)
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, 60.0)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error("getUpdates network error: %s. Retrying in %ss", e, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    async def start(self) -> None:
+        """Start polling in a background task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="telegrify-poller")
+
+    async def stop(self) -> None:
+        """Stop polling and finish queued updates"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.pool.stop()
+
+
+def create_poller(bot: TelegramBot, config, forwarder: Forwarder | None = None) -> UpdatePoller:
+    """Build a poller dispatching updates to the configured handlers"""
+    pool = UpdateWorkerPool(
+        UpdateHandler(bot, config, forwarder),
+        workers=config.bot.update_workers,
+        queue_size=config.bot.update_queue_size,
+    )
+    return UpdatePoller(
+        bot,
+        pool,
+        OffsetStore(config.bot.offset_file),
+        seen=UpdateDeduplicator(config.bot.update_dedup_window),
+        timeout=config.bot.poll_timeout,
+    )
+
+
+async def run_polling(config) -> None:
+    """Run long polling until cancelled (used by ``telegrify poll``)"""
+    bot = TelegramBot(
+        config.bot.token,
+        test_mode=config.bot.test_mode,
+        rate_limiter=RateLimiter.from_config(config.bot),
+        api_url=config.bot.api_url,
+    )
+    forwarder = Forwarder.from_config(config.forwarding)
+    poller = create_poller(bot, config, forwarder)
+    try:
+        # getUpdates is rejected while a webhook is set
+        await bot.delete_webhook()
+        await poller.run()
+    finally:
+        await poller.stop()
+        await forwarder.close()
+        await bot.close()
@@ -1,56 +1,103 @@
 """Dynamic route registration for notification endpoints"""
 
+import asyncio
 import logging
-from typing import Any
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
 
-import aiohttp
-from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
 from jinja2 import Template
 
+from telegrify.core import logs, timing, tracing
+from telegrify.core.bot import TelegramAPIError, count_retries
+from telegrify.core.botpool import BotPool
+from telegrify.core.broadcast import BroadcastJobs
 from telegrify.core.config import EndpointConfig
+from telegrify.core.delayed import DelayedDelivery, parse_due_time
+from telegrify.core.deliverylog import DeliveryLog, payload_digest
+from telegrify.core.forwarder import Forwarder
 from telegrify.core.interfaces import IPlugin
-from telegrify.utils import escape_markdown_v2
+from telegrify.core.media import MediaFile
+from telegrify.core.messages import MessageStore, TrackedMessage, content_digest
+from telegrify.core.metrics import (
+    FORMAT_DURATION,
+    REQUEST_DURATION,
+    REQUESTS,
+    TEMPLATE_DURATION,
+    metrics,
+)
+from telegrify.core.scheduler import PRIORITIES, DeliveryScheduler
+from telegrify.core.schema import compile_schema
+from telegrify.server.keyboard import build_inline_keyboard
+from telegrify.server.router import EndpointRouter
+from telegrify.server.updates import UpdateDeduplicator, UpdateHandler, UpdateWorkerPool
 
 logger = logging.getLogger(__name__)
 
-
-def build_inline_keyboard(buttons: list, payload: dict = None) -> dict | None:
-    """Build inline keyboard markup from button config with template support"""
-    if not buttons:
-        return None
-    
-    keyboard = []
-    for row in buttons:
-        keyboard_row = []
-        for btn in row:
-            # Render templates if payload provided
-            text = Template(btn.text).render(**payload) if payload else btn.text
-            button = {"text": text}
-            
-            if btn.url:
-                url = Template(btn.url).render(**payload) if payload else btn.url
-                button["url"] = url
-            elif btn.callback_data:
-                callback = Template(btn.callback_data).render(**payload) if payload else btn.callback_data
-                button["callback_data"] = callback
-            keyboard_row.append(button)
-        keyboard.append(keyboard_row)
-    
-    return {"inline_keyboard": keyboard}
+# Bot API limit for files uploaded with multipart/form-data
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+UPLOAD_SPOOL_SIZE = 1024 * 1024
 
 
 def setup_routes(app: FastAPI) -> None:
     """Setup dynamic routes based on configuration"""
     config = app.state.config
     bot = app.state.bot
+    bot_pools = app.state.bot_pools
     registry = app.state.registry
     templates = app.state.templates
+    scheduler = app.state.scheduler
+    messages = app.state.messages
+    delayed = app.state.delayed
+    broadcasts = app.state.broadcasts
+    delivery_log = app.state.delivery_log
+    forwarder = app.state.forwarder
+
+    if config.server.routing == "dispatch":
+        router = EndpointRouter()
+        for endpoint_config in config.endpoints:
+            handler, upload_handler = build_endpoint_handlers(
+                endpoint_config,
+                bot_pools[endpoint_config.bot] if endpoint_config.bot else app.state.bot_pool,
+                registry,
+                config.server.api_key,
+                templates,
+                scheduler,
+                messages,
+                delayed,
+                broadcasts,
+                delivery_log,
+                forwarder,
+            )
+            router.add(endpoint_config.path, handler)
+            if upload_handler is not None:
+                router.add(f"{endpoint_config.path}/upload", upload_handler, raw=True)
+        app.router.routes.insert(0, router)
+        app.state.endpoint_router = router
+        logger.info("Registered %d endpoints behind a single dispatch route", len(router))
+    else:
+        for endpoint_config in config.endpoints:
+            create_endpoint_handler(
+                app,
+                endpoint_config,
+                bot_pools[endpoint_config.bot] if endpoint_config.bot else app.state.bot_pool,
+                registry,
+                config.server.api_key,
+                templates,
+                scheduler,
+                messages,
+                delayed,
+                broadcasts,
+                delivery_log,
+                forwarder,
+            )
 
-    for endpoint_config in config.endpoints:
-        create_endpoint_handler(app, endpoint_config, bot, registry, config.server.api_key, templates)
-    
     # Setup webhook endpoint if configured
-    if config.bot.webhook_url:
+    if config.bot.webhook_url and not config.bot.polling:
         setup_webhook_handler(app, bot, config)
 
 
@@ -61,8 +108,67 @@ def create_endpoint_handler(
     registry,
     api_key: str | None,
     templates: dict[str, str],
+    scheduler: DeliveryScheduler | None = None,
+    messages: MessageStore | None = None,
+    delayed: DelayedDelivery | None = None,
+    broadcasts: BroadcastJobs | None = None,
+    delivery_log: DeliveryLog | None = None,
+    forwarder: Forwarder | None = None,
 ) -> None:
-    """Create handler for a specific endpoint"""
+    """Create handler for a specific endpoint and register it as its own route"""
+    handler, upload_handler = build_endpoint_handlers(
+        endpoint_config,
+        bot,
+        registry,
+        api_key,
+        templates,
+        scheduler,
+        messages,
+        delayed,
+        broadcasts,
+        delivery_log,
+        forwarder,
+    )
+    app.post(endpoint_config.path)(handler)
+    if upload_handler is not None:
+        app.post(f"{endpoint_config.path}/upload")(upload_handler)
+    logger.info("Registered endpoint: %s", endpoint_config.path)
+
+
+def build_endpoint_handlers(
+    endpoint_config: EndpointConfig,
+    bot,
+    registry,
+    api_key: str | None,
+    templates: dict[str, str],
+    scheduler: DeliveryScheduler | None = None,
+    messages: MessageStore | None = None,
+    delayed: DelayedDelivery | None = None,
+    broadcasts: BroadcastJobs | None = None,
+    delivery_log: DeliveryLog | None = None,
+    forwarder: Forwarder | None = None,
+) -> tuple[Callable[..., Awaitable[dict]], Callable[..., Awaitable[dict]] | None]:
+    """Build the notification pipeline for a specific endpoint
+
+    Returns the JSON handler and, when uploads are enabled, the handler for
+    raw media bodies. With a scheduler, sends to different chats run
+    concurrently while each chat keeps the order in which notifications
+    arrived. With a BotPool, each chat is sent to by the bot the pool picks
+    for it. Endpoints with a correlation_key edit the message sent for a
+    correlation id instead of sending a new one. Payloads with a future
+    send_at or delay are handed to the delayed delivery queue. An endpoint
+    schema is compiled here and checked before formatting. Broadcast jobs
+    render and send through the same pipeline. With a delivery log, every
+    send is recorded there; with a delivery_report_url, its outcome is also
+    posted back to the producer in batches through the forwarder.
+    """
+    pool = bot if isinstance(bot, BotPool) else BotPool([bot])
+    scheduler = scheduler or DeliveryScheduler(workers=1)
+    messages = messages or MessageStore()
+    validate_payload = compile_schema(endpoint_config.schema_) if endpoint_config.schema_ else None
+    report_url = endpoint_config.delivery_report_url
+    if report_url is not None and forwarder is None:
+        forwarder = Forwarder()
 
     def get_field(payload: dict, field: str, default=None):
         """Get field value using field_map or direct access"""
@@ -83,83 +189,424 @@ def create_endpoint_handler(
         # Escaping is handled by sanitize_text in bot.py, so pass payload as-is to Jinja2
         return Template(template_str).render(**payload)
 
+    def media_file(name: str) -> MediaFile:
+        """Open a local file, refusing paths outside the endpoint's media_dir"""
+        if not endpoint_config.media_dir:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "media_dir_not_configured",
+                    "message": "Local files are not enabled for this endpoint",
+                },
+            )
+        base = Path(endpoint_config.media_dir).resolve()
+        path = (base / name).resolve()
+        if not path.is_relative_to(base) or not path.is_file():
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "invalid_media_path",
+                    "message": f"File not found in media_dir: {name}",
+                },
+            )
+        return MediaFile(path)
+
     async def handler(
         payload: dict[str, Any],
         x_api_key: str | None = Header(None),
+    ):
+        return await run(payload, x_api_key)
+
+    async def upload_handler(
+        request: Request,
+        x_api_key: str | None = Header(None),
     ):
         if api_key and x_api_key != api_key:
-            raise HTTPException(status_code=401, detail={"error": "invalid_api_key", "message": "Invalid or missing API key"})
+            raise HTTPException(
+                status_code=401,
+                detail={"error": "invalid_api_key", "message": "Invalid or missing API key"},
+            )
+
+        payload = dict(request.query_params)
+        content_type = request.headers.get("content-type", "application/octet-stream")
+        default_kind = "photo" if content_type.startswith("image/") else "document"
+        kind = payload.pop("type", None) or default_kind
+        if kind not in ("photo", "document"):
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "invalid_media_type",
+                    "message": "type must be 'photo' or 'document'",
+                },
+            )
+
+        # Spool the body to disk past 1 MB instead of buffering it whole
+        with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE) as body:
+            size = 0
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail={
+                            "error": "upload_too_large",
+                            "message": "Uploads are limited to 50 MB",
+                        },
+                    )
+                if size > UPLOAD_SPOOL_SIZE:
+                    await asyncio.to_thread(body.write, chunk)
+                else:
+                    body.write(chunk)
+            if not size:
+                raise HTTPException(
+                    status_code=400,
+                    detail={"error": "empty_upload", "message": "Request body is empty"},
+                )
+
+            filename = payload.pop("filename", kind)
+            media = MediaFile(body, filename=filename, content_type=content_type)
+            return await run(payload, x_api_key, upload=(kind, media))
+
+    async def run(
+        payload: dict[str, Any],
+        x_api_key: str | None,
+        upload: tuple[str, MediaFile] | None = None,
+        scheduled: bool = False,
+    ) -> dict:
+        with tracing.span(
+            "notify", tracing.SPAN_KIND_SERVER, endpoint=endpoint_config.path, scheduled=scheduled
+        ):
+            if not metrics.enabled:
+                return await process(payload, x_api_key, upload, scheduled)
+
+            start = time.perf_counter()
+            status = "error"
+            try:
+                response = await process(payload, x_api_key, upload, scheduled)
+                status = response["status"]
+                return response
+            except HTTPException as e:
+                status = str(e.status_code)
+                raise
+            finally:
+                REQUESTS.inc(endpoint=endpoint_config.path, status=status)
+                REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint_config.path)
+
+    def payload_priority(payload: dict[str, Any]) -> str:
+        priority = get_field(payload, "priority") or endpoint_config.priority
+        if priority not in PRIORITIES:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "invalid_priority",
+                    "message": f"priority must be one of {', '.join(PRIORITIES)}",
+                },
+            )
+        return priority
+
+    def prepare(
+        payload: dict[str, Any], upload: tuple[str, MediaFile] | None = None
+    ) -> Callable[[Any], Awaitable[dict]]:
+        """Render a payload once, returning the function that delivers it to a chat"""
+        # Use template if specified, otherwise use formatter
+        parse_mode = get_field(payload, "parse_mode") or endpoint_config.parse_mode
+
+        if endpoint_config.template and endpoint_config.template in templates:
+            template = templates[endpoint_config.template]
+            with (
+                timing.stage("template"),
+                TEMPLATE_DURATION.time(endpoint=endpoint_config.path),
+                tracing.span("template", template=endpoint_config.template),
+            ):
+                formatted_message = render_template(template, payload, parse_mode)
+        else:
+            formatter = registry.get_formatter(endpoint_config.formatter)
+            if not formatter:
+                raise HTTPException(
+                    status_code=500,
+                    detail={
+                        "error": "formatter_not_found",
+                        "message": f"Formatter '{endpoint_config.formatter}' not found",
+                    },
+                )
+
+            if hasattr(formatter, "labels"):
+                formatter.labels = endpoint_config.labels
+
+            with timing.stage("format"), FORMAT_DURATION.time(
+                endpoint=endpoint_config.path, formatter=endpoint_config.formatter
+            ), tracing.span("format", formatter=endpoint_config.formatter):
+                if isinstance(formatter, IPlugin):
+                    formatted_message = formatter.format(payload, endpoint_config.plugin_config)
+                else:
+                    formatted_message = formatter.format(payload)
+
+        image_url = get_field(payload, "image_url")
+        image_urls = get_field(payload, "image_urls", [])
+        media_items = [
+            {"type": "photo", "media": item}
+            if isinstance(item, str)
+            else {"type": item.get("type", "photo"), "media": item.get("media") or item.get("url")}
+            for item in get_field(payload, "media", None) or []
+        ]
+        document_url = get_field(payload, "document_url")
+        if upload is None:
+            image_file = get_field(payload, "image_file")
+            document_file = get_field(payload, "document_file")
+            if image_file:
+                upload = ("photo", media_file(image_file))
+            elif document_file:
+                upload = ("document", media_file(document_file))
+
+        # Build inline keyboard if buttons configured
+        with timing.stage("keyboard"):
+            reply_markup = build_inline_keyboard(endpoint_config.buttons, payload)
+
+        def send_to(chat_id):
+            bot = pool.for_chat(chat_id)
+            if upload is not None:
+                kind, media = upload
+                send_media = bot.send_photo if kind == "photo" else bot.send_document
+                return send_media(chat_id, media, caption=formatted_message, parse_mode=parse_mode)
+            if image_urls or media_items:
+                return bot.send_media_group(
+                    chat_id=chat_id,
+                    photo_urls=image_urls,
+                    media=media_items,
+                    caption=formatted_message,
+                    parse_mode=parse_mode,
+                )
+            elif image_url:
+                return bot.send_photo(
+                    chat_id=chat_id,
+                    photo_url=image_url,
+                    caption=formatted_message,
+                    parse_mode=parse_mode,
+                )
+            elif document_url:
+                return bot.send_document(
+                    chat_id=chat_id,
+                    document=document_url,
+                    caption=formatted_message,
+                    parse_mode=parse_mode,
+                )
+            return bot.send_message(
+                chat_id=chat_id,
+                text=formatted_message,
+                parse_mode=parse_mode,
+                reply_markup=reply_markup,
+            )
+
+        correlation_id = None
+        if endpoint_config.correlation_key:
+            correlation_id = get_field(payload, endpoint_config.correlation_key)
+        if image_urls or media_items:
+            # Albums cannot be edited as a whole
+            tracked_kind = None
+        elif upload is not None or image_url or document_url:
+            tracked_kind = "caption"
+        else:
+            tracked_kind = "text"
+
+        async def edit_or_send(chat_id):
+            """Edit the message sent for this correlation id, or send a new one"""
+            key = f"{endpoint_config.path}:{correlation_id}:{chat_id}"
+            digest = content_digest(formatted_message, parse_mode, reply_markup)
+            tracked = await messages.get(key)
+            if tracked is not None and tracked.kind == tracked_kind:
+                existing = {"ok": True, "result": {"message_id": tracked.message_id}}
+                if tracked.digest == digest:
+                    return {**existing, "action": "unchanged"}
+                bot = pool.for_chat(chat_id)
+                edit = bot.edit_message_text if tracked_kind == "text" else bot.edit_message_caption
+                try:
+                    await edit(
+                        chat_id, tracked.message_id, formatted_message, parse_mode, reply_markup
+                    )
+                except TelegramAPIError as e:
+                    # The message was deleted or is too old to edit
+                    if "not modified" not in e.description:
+                        if e.status != 400:
+                            raise
+                        logger.warning(
+                            "Cannot edit message %s in %s: %s", tracked.message_id, chat_id, e
+                        )
+                        tracked = None
+                if tracked is not None:
+                    await messages.set(key, tracked._replace(digest=digest))
+                    return {**existing, "action": "edited"}
+
+            result = await send_to(chat_id)
+            message_id = result["result"]["message_id"]
+            await messages.set(key, TrackedMessage(message_id, tracked_kind, digest))
+            return result
+
+        deliver = edit_or_send if correlation_id is not None and tracked_kind else send_to
+        if delivery_log is None and report_url is None:
+            return deliver
+        digest = payload_digest(payload)
+
+        def report(
+            chat_id,
+            status: str,
+            message_id,
+            latency: float,
+            retried: int,
+            error: str | None = None,
+        ) -> None:
+            if delivery_log is not None:
+                delivery_log.record(
+                    endpoint_config.path, chat_id, status, message_id, latency, digest, error
+                )
+            if report_url is not None:
+                event = {
+                    "endpoint": endpoint_config.path,
+                    "chat_id": chat_id,
+                    "status": status,
+                    "message_id": message_id,
+                    "retried": retried,
+                    "error": error,
+                    "correlation_id": correlation_id,
+                    "payload_hash": digest,
+                    "timestamp": time.time(),
+                }
+                forwarder.submit(
+                    report_url,
+                    event,
+                    batch_size=endpoint_config.delivery_report_batch_size,
+                    batch_interval=endpoint_config.delivery_report_interval,
+                )
+
+        async def observed(chat_id):
+            """Deliver to a chat, recording and reporting the outcome"""
+            start = time.perf_counter()
+            with count_retries() as retries:
+                try:
+                    result = await deliver(chat_id)
+                except Exception as e:
+                    report(chat_id, "failed", None, time.perf_counter() - start, retries[0], str(e))
+                    raise
+            sent = result.get("result")
+            if isinstance(sent, list):
+                sent = sent[0] if sent else None
+            message_id = sent.get("message_id") if isinstance(sent, dict) else None
+            latency = time.perf_counter() - start
+            report(chat_id, result.get("action", "sent"), message_id, latency, retries[0])
+            return result
+
+        return observed
+
+    async def process(
+        payload: dict[str, Any],
+        x_api_key: str | None,
+        upload: tuple[str, MediaFile] | None = None,
+        scheduled: bool = False,
+    ) -> dict:
+        timing.mark("parse")
+        if not scheduled:
+            if api_key and x_api_key != api_key:
+                raise HTTPException(
+                    status_code=401,
+                    detail={"error": "invalid_api_key", "message": "Invalid or missing API key"},
+                )
+
+            if validate_payload is not None and upload is None:
+                with timing.stage("validate"):
+                    errors = validate_payload(payload)
+                if errors:
+                    raise HTTPException(
+                        status_code=422,
+                        detail={
+                            "error": "invalid_payload",
+                            "message": "Payload does not match the endpoint schema",
+                            "errors": errors,
+                        },
+                    )
+
+            try:
+                due = parse_due_time(get_field(payload, "send_at"), get_field(payload, "delay"))
+            except (TypeError, ValueError) as e:
+                raise HTTPException(
+                    status_code=400, detail={"error": "invalid_send_at", "message": str(e)}
+                )
+            if due is not None and due > time.time():
+                if delayed is None or upload is not None:
+                    raise HTTPException(
+                        status_code=400,
+                        detail={
+                            "error": "scheduling_unavailable",
+                            "message": "This notification cannot be scheduled",
+                        },
+                    )
+                job_id = await delayed.add(endpoint_config.path, payload, due)
+                return {
+                    "status": "scheduled",
+                    "job_id": job_id,
+                    "send_at": datetime.fromtimestamp(due, timezone.utc).isoformat(),
+                }
 
         try:
             # Get chat IDs from payload or config
             payload_chat_id = get_field(payload, "chat_id")
             payload_chat_ids = get_field(payload, "chat_ids", [])
-            
+
             if payload_chat_ids:
                 target_chat_ids = payload_chat_ids
             elif payload_chat_id:
                 target_chat_ids = [payload_chat_id]
             else:
                 target_chat_ids = endpoint_config.get_chat_ids()
-            
+
             if not target_chat_ids:
-                raise HTTPException(status_code=400, detail={"error": "no_chat_id", "message": "No chat_id specified in config or request"})
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "error": "no_chat_id",
+                        "message": "No chat_id specified in config or request",
+                    },
+                )
 
-            # Use template if specified, otherwise use formatter
-            parse_mode = get_field(payload, "parse_mode") or endpoint_config.parse_mode
-            
-            if endpoint_config.template and endpoint_config.template in templates:
-                formatted_message = render_template(templates[endpoint_config.template], payload, parse_mode)
-            else:
-                formatter = registry.get_formatter(endpoint_config.formatter)
-                if not formatter:
-                    raise HTTPException(
-                        status_code=500,
-                        detail={"error": "formatter_not_found", "message": f"Formatter '{endpoint_config.formatter}' not found"},
-                    )
+            priority = payload_priority(payload)
+            deliver = prepare(payload, upload)
 
-                if hasattr(formatter, "labels"):
-                    formatter.labels = endpoint_config.labels
+            # Send to all target chats (in parallel across chats, in order within a chat),
+            # logging, tracing and timing from the scheduler's workers under this request
+            request_id = logs.current_request_id()
+            parent = tracing.current_span()
+            timings = timing.current()
 
-                if isinstance(formatter, IPlugin):
-                    formatted_message = formatter.format(payload, endpoint_config.plugin_config)
-                else:
-                    formatted_message = formatter.format(payload)
-
-            image_url = get_field(payload, "image_url")
-            image_urls = get_field(payload, "image_urls", [])
-            
-            # Build inline keyboard if buttons configured
-            reply_markup = build_inline_keyboard(endpoint_config.buttons, payload)
+            def send(chat_id):
+                work = deliver(chat_id)
+                if parent is not None:
+                    work = tracing.run_in(parent, "deliver", work, chat_id=str(chat_id))
+                return timing.with_timings(timings, logs.with_request_id(request_id, work))
 
-            # Send to all target chats
+            futures = [
+                scheduler.submit(chat_id, lambda chat_id=chat_id: send(chat_id), priority)
+                for chat_id in target_chat_ids
+            ]
             results = []
-            for chat_id in target_chat_ids:
-                if image_urls:
-                    result = await bot.send_media_group(
-                        chat_id=chat_id,
-                        photo_urls=image_urls,
-                        caption=formatted_message,
-                        parse_mode=parse_mode,
-                    )
-                elif image_url:
-                    result = await bot.send_photo(
-                        chat_id=chat_id,
-                        photo_url=image_url,
-                        caption=formatted_message,
-                        parse_mode=parse_mode,
+            for chat_id, result in zip(target_chat_ids, await asyncio.gather(*futures)):
+                sent = result.get("result")
+                if isinstance(sent, list):
+                    message_ids = [message.get("message_id") for message in sent]
+                    results.append(
+                        {
+                            "chat_id": chat_id,
+                            "message_id": message_ids[0],
+                            "message_ids": message_ids,
+                        }
                     )
                 else:
-                    result = await bot.send_message(
-                        chat_id=chat_id,
-                        text=formatted_message,
-                        parse_mode=parse_mode,
-                        reply_markup=reply_markup,
-                    )
-                
-                msg_id = result.get("result", {}).get("message_id") if isinstance(result.get("result"), dict) else result.get("result", [{}])[0].get("message_id")
-                results.append({"chat_id": chat_id, "message_id": msg_id})
-                logger.info(f"Notification sent to {chat_id}")
+                    msg_id = sent.get("message_id") if isinstance(sent, dict) else None
+                    results.append({"chat_id": chat_id, "message_id": msg_id})
+                if "action" in result:
+                    results[-1]["action"] = result["action"]
+                logger.info(
+                    "Notification sent to %s",
+                    chat_id,
+                    extra={"endpoint": endpoint_config.path, "chat_id": chat_id, "sample": True},
+                )
 
             return {
                 "status": "sent",
@@ -169,87 +616,64 @@ def create_endpoint_handler(
         except HTTPException:
             raise
         except Exception as e:
-            logger.error(f"Failed to send notification: {e}", exc_info=True)
+            logger.error(
+                "Failed to send notification: %s",
+                e,
+                exc_info=True,
+                extra={"endpoint": endpoint_config.path},
+            )
             raise HTTPException(status_code=500, detail={"error": "send_failed", "message": str(e)})
 
-    app.post(endpoint_config.path)(handler)
-    logger.info(f"Registered endpoint: {endpoint_config.path}")
+    if delayed is not None:
+        delayed.register(endpoint_config.path, lambda payload: run(payload, None, scheduled=True))
+    if broadcasts is not None:
+        broadcasts.register(
+            endpoint_config.path,
+            lambda payload: (prepare(payload), payload_priority(payload)),
+            validate_payload,
+        )
+
+    return handler, upload_handler if endpoint_config.uploads else None
 
 
 def setup_webhook_handler(app: FastAPI, bot, config) -> None:
-    """Setup webhook endpoint for receiving Telegram updates"""
-    
+    """Setup webhook endpoint for receiving Telegram updates
+
+    Updates are acknowledged immediately and processed by a bounded worker
+    pool. Redelivered updates are dropped by update_id.
+    """
+    update_handler = UpdateHandler(bot, config, app.state.forwarder)
+    pool = UpdateWorkerPool(
+        update_handler,
+        workers=config.bot.update_workers,
+        queue_size=config.bot.update_queue_size,
+    )
+    seen = UpdateDeduplicator(config.bot.update_dedup_window)
+    app.state.update_pool = pool
+    app.state.shutdown_hooks.append(pool.stop)
+
     async def webhook_handler(request: Request):
         """Handle incoming Telegram webhook updates"""
         try:
             update = await request.json()
-            logger.debug(f"Received webhook update: {update}")
-            
-            # Handle callback queries (button clicks)
-            if "callback_query" in update:
-                callback = update["callback_query"]
-                callback_id = callback["id"]
-                callback_data = callback.get("data", "")
-                user = callback.get("from", {})
-                
-                logger.info(f"Callback query: {callback_data} from user {user.get('id')}")
-                
-                # Find matching callback handler
-                for handler in config.callbacks:
-                    if handler.data == callback_data:
-                        await bot.answer_callback_query(callback_id, handler.response)
-                        
-                        if handler.url:
-                            async with aiohttp.ClientSession() as session:
-                                await session.post(handler.url, json={
-                                    "callback_data": callback_data,
-                                    "user": user,
-                                    "message": callback.get("message", {}),
-                                })
-                        break
-                else:
-                    await bot.answer_callback_query(callback_id)
-            
-            # Handle messages (including commands)
-            elif "message" in update:
-                message = update["message"]
-                chat_id = str(message["chat"]["id"])
-                user = message.get("from", {})
-                text = message.get("text", "")
-                
-                # Check for commands
-                if text.startswith("/"):
-                    command = text.split()[0].split("@")[0]  # Handle /cmd@botname
-                    logger.info(f"Command: {command} from user {user.get('id')}")
-                    
-                    for handler in config.commands:
-                        if handler.command == command:
-                            # Render response with user context
-                            context = {
-                                "user": user,
-                                "chat_id": chat_id,
-                                "first_name": user.get("first_name", ""),
-                                "username": user.get("username", ""),
-                                "command": command,
-                            }
-                            
-                            response_text = Template(handler.response).render(**context) if handler.response else None
-                            
-                            if response_text:
-                                reply_markup = build_inline_keyboard(handler.buttons, context) if handler.buttons else None
-                                await bot.send_message(
-                                    chat_id=chat_id,
-                                    text=response_text,
-                                    parse_mode=handler.parse_mode,
-                                    reply_markup=reply_markup,
-                                )
-                            break
-            
-            return {"ok": True}
-            
         except Exception as e:
-            logger.error(f"Webhook error: {e}", exc_info=True)
+            logger.error("Webhook error: %s", e, exc_info=True)
             return {"ok": False, "error": str(e)}
-    
+
+        logger.debug("Received webhook update: %s", update)
+
+        update_id = update.get("update_id")
+        if update_id is not None and update_id in seen:
+            logger.info("Dropping duplicate update %s", update_id)
+            return {"ok": True}
+
+        if not pool.submit_nowait(update):
+            logger.warning("Update queue is full, asking Telegram to redeliver later")
+            return JSONResponse({"ok": False, "error": "overloaded"}, status_code=503)
+
+        if update_id is not None:
+            seen.add(update_id)
+        return {"ok": True}
+
     app.post(config.bot.webhook_path)(webhook_handler)
-    logger.info(f"Registered webhook endpoint: {config.bot.webhook_path}")
+    logger.info("Registered webhook endpoint: %s", config.bot.webhook_path)
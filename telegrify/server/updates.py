@@ -0,0 +1,261 @@
+"""Processing of incoming Telegram updates"""
+
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from jinja2 import Template
+
+from telegrify.core import logs, tracing
+from telegrify.core.forwarder import Forwarder
+from telegrify.core.metrics import QUEUE_DEPTH
+from telegrify.server.dispatch import HandlerTable
+from telegrify.server.keyboard import build_inline_keyboard
+
+logger = logging.getLogger(__name__)
+
+UpdateCallback = Callable[[dict], Awaitable[None]]
+
+
+def update_chat_key(update: dict) -> str | None:
+    """Get the chat an update belongs to, used to keep per-chat ordering"""
+    if "message" in update:
+        return str(update["message"].get("chat", {}).get("id"))
+    if "callback_query" in update:
+        callback = update["callback_query"]
+        chat = callback.get("message", {}).get("chat")
+        if chat:
+            return str(chat.get("id"))
+        return str(callback.get("from", {}).get("id"))
+    return None
+
+
+class UpdateDeduplicator:
+    """Remember the most recent update_ids in a fixed-size window"""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self._order: deque[int] = deque()
+        self._seen: set[int] = set()
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, update_id: int) -> None:
+        """Record an update_id, evicting the oldest one when the window is full"""
+        if update_id in self._seen:
+            return
+        self._seen.add(update_id)
+        self._order.append(update_id)
+        if len(self._order) > self.window:
+            self._seen.discard(self._order.popleft())
+
+
+class UpdateWorkerPool:
+    """Bounded pool of workers processing updates in the background
+
+    Updates are sharded onto workers by chat, so updates from one chat are
+    processed in the order they arrived while different chats run in parallel.
+    Workers start on first use, and handle each update under the request id and
+    span it was submitted with.
+    """
+
+    def __init__(self, callback: UpdateCallback, workers: int = 4, queue_size: int = 1000):
+        self.callback = callback
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queues: list[asyncio.Queue] = []
+        self._tasks: list[asyncio.Task] = []
+
+    def qsize(self) -> int:
+        """Number of updates waiting to be processed"""
+        return sum(queue.qsize() for queue in self._queues)
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        shard_size = max(1, self.queue_size // self.workers)
+        self._queues = [asyncio.Queue(maxsize=shard_size) for _ in range(self.workers)]
+        # Workers must not inherit the context of the request that started them
+        self._tasks = [
+            contextvars.Context().run(
+                asyncio.create_task, self._worker(queue), name=f"telegrify-updates-{i}"
+            )
+            for i, queue in enumerate(self._queues)
+        ]
+        QUEUE_DEPTH.set_function(self.qsize, queue="updates")
+
+    def _queue_for(self, update: dict) -> asyncio.Queue:
+        key = update_chat_key(update)
+        shard = hash(key) if key is not None else update.get("update_id", 0)
+        return self._queues[shard % len(self._queues)]
+
+    def submit_nowait(self, update: dict) -> bool:
+        """Queue update for processing, returning False if the pool is saturated"""
+        self._ensure_started()
+        try:
+            self._queue_for(update).put_nowait(self._item(update))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def submit(self, update: dict) -> None:
+        """Queue update for processing, waiting while the pool is saturated"""
+        self._ensure_started()
+        await self._queue_for(update).put(self._item(update))
+
+    @staticmethod
+    def _item(update: dict) -> tuple[dict, str | None, tracing.Span | None]:
+        return update, logs.current_request_id(), tracing.current_span()
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            update, request_id, parent = await queue.get()
+            # Records logged while handling an update are tagged with the request
+            # that delivered it, or the update's id when it was polled
+            logs.set_request_id(request_id or f"update-{update.get('update_id')}")
+            try:
+                await tracing.run_in(
+                    parent,
+                    "webhook.dispatch",
+                    self.callback(update),
+                    tracing.SPAN_KIND_SERVER,
+                    update_id=update.get("update_id", 0),
+                )
+            except Exception as e:
+                logger.error("Update processing error: %s", e, exc_info=True)
+            finally:
+                queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until all queued updates are processed"""
+        for queue in self._queues:
+            await queue.join()
+
+    async def stop(self) -> None:
+        """Finish queued updates and stop workers"""
+        if not self._tasks:
+            return
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+        QUEUE_DEPTH.remove_function(queue="updates")
+
+
+class UpdateHandler:
+    """Run command and callback handlers for a single update
+
+    Handlers are indexed once at setup time: exact commands and callback data
+    are looked up in a dict, ``{param}`` patterns through a prefix trie.
+    Parameters extracted from a pattern are added to the template context.
+    """
+
+    def __init__(self, bot, config, forwarder: Forwarder | None = None):
+        self.bot = bot
+        self.config = config
+        self.forwarder = forwarder or Forwarder.from_config(config.forwarding)
+        self.callbacks: HandlerTable = HandlerTable()
+        self.commands: HandlerTable = HandlerTable()
+        self._templates: dict[str, Template] = {}
+
+        for handler in config.callbacks:
+            self.callbacks.add(handler.data, handler)
+        for handler in config.commands:
+            self.commands.add(handler.command, handler)
+
+    def render(self, source: str, context: dict[str, Any]) -> str:
+        """Render a response template, compiling it on first use"""
+        template = self._templates.get(source)
+        if template is None:
+            template = self._templates[source] = Template(source)
+        return template.render(**context)
+
+    async def __call__(self, update: dict[str, Any]) -> None:
+        # Handle callback queries (button clicks)
+        if "callback_query" in update:
+            await self.handle_callback(update["callback_query"])
+
+        # Handle messages (including commands)
+        elif "message" in update:
+            await self.handle_message(update["message"])
+
+    async def handle_callback(self, callback: dict) -> None:
+        callback_id = callback["id"]
+        callback_data = callback.get("data", "")
+        user = callback.get("from", {})
+
+        logger.info("Callback query: %s from user %s", callback_data, user.get("id"))
+
+        match = self.callbacks.match(callback_data)
+        if match is None:
+            await self.bot.answer_callback_query(callback_id)
+            return
+
+        handler, params = match
+        context = {"callback_data": callback_data, "user": user, **params}
+        response_text = self.render(handler.response, context) if handler.response else None
+        await self.bot.answer_callback_query(callback_id, response_text)
+
+        if handler.url:
+            self.forwarder.submit(
+                handler.url,
+                {
+                    "callback_data": callback_data,
+                    "params": params,
+                    "user": user,
+                    "message": callback.get("message", {}),
+                },
+                batch_size=handler.batch_size,
+                batch_interval=handler.batch_interval,
+            )
+
+    async def handle_message(self, message: dict) -> None:
+        chat_id = str(message["chat"]["id"])
+        user = message.get("from", {})
+        text = message.get("text", "")
+
+        # Check for commands
+        if not text.startswith("/"):
+            return
+
+        parts = text.split(maxsplit=1)
+        command = parts[0].split("@")[0]  # Handle /cmd@botname
+        logger.info("Command: %s from user %s", command, user.get("id"))
+
+        match = self.commands.match(command)
+        if match is None and len(parts) > 1:
+            match = self.commands.match(f"{command} {parts[1].strip()}")
+        if match is None:
+            return
+
+        handler, params = match
+        # Render response with user context
+        context = {
+            "user": user,
+            "chat_id": chat_id,
+            "first_name": user.get("first_name", ""),
+            "username": user.get("username", ""),
+            "command": command,
+            **params,
+        }
+
+        response_text = self.render(handler.response, context) if handler.response else None
+
+        if response_text:
+            reply_markup = None
+            if handler.buttons:
+                reply_markup = build_inline_keyboard(handler.buttons, context)
+            await self.bot.send_message(
+                chat_id=chat_id,
+                text=response_text,
+                parse_mode=handler.parse_mode,
+                reply_markup=reply_markup,
+            )
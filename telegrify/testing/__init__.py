@@ -0,0 +1,6 @@
+"""Testing utilities"""
+
+from telegrify.testing.fake_api import FakeBotAPI, run_fake_api
+from telegrify.testing.loadgen import run_load
+
+__all__ = ["FakeBotAPI", "run_fake_api", "run_load"]
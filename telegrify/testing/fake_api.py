@@ -0,0 +1,319 @@
+"""Local fake of the Telegram Bot API for load tests and CI"""
+
+import asyncio
+import json
+import logging
+import random
+from collections import defaultdict
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+RESET = "reset"
+
+
+class FakeBotAPI:
+    """In-process HTTP server answering Bot API calls like Telegram does
+
+    Implements sendMessage, sendPhoto, sendDocument, sendVideo, sendAudio,
+    sendMediaGroup, editMessageText, editMessageCaption, getUpdates,
+    setWebhook, deleteWebhook, getWebhookInfo, getMe and answerCallbackQuery.
+    Other methods succeed with ``true``.
+
+    Faults can be injected on send and edit calls, either queued in
+    ``faults`` (HTTP status codes or ``"reset"``, consumed in order) or at
+    random with the ``*_rate`` probabilities. ``latency`` delays every answer.
+    Set ``record`` to False for long load tests so requests are only counted.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        error_rate: float = 0.0,
+        reset_rate: float = 0.0,
+        record: bool = True,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.record = record
+        self.faults: list[int | str] = []
+        self.requests: list[tuple[str, dict]] = []
+        self.counts: dict[str, int] = defaultdict(int)
+        self.uploads: list[bytes] = []
+        self.file_ids: set[str] = set()
+        self.messages: dict[tuple[str, int], dict] = {}
+        self.updates: list[dict] = []
+        self.webhook_url: str | None = None
+        self._last_message_id: dict[str, int] = defaultdict(int)
+        self._new_update = asyncio.Event()
+        self._random = random.Random(seed)
+        self._runner: web.AppRunner | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._deliveries: set[asyncio.Task] = set()
+        self.api_url: str | None = None
+        # Bot API method name -> handler
+        self._methods = {
+            "sendMessage": self._send_message,
+            "sendPhoto": self._send_photo,
+            "sendDocument": self._send_document,
+            "sendVideo": self._send_video,
+            "sendAudio": self._send_audio,
+            "sendMediaGroup": self._send_media_group,
+            "editMessageText": self._edit_message_text,
+            "editMessageCaption": self._edit_message_caption,
+            "getUpdates": self._get_updates,
+            "setWebhook": self._set_webhook,
+            "deleteWebhook": self._delete_webhook,
+            "getWebhookInfo": self._get_webhook_info,
+            "getMe": self._get_me,
+        }
+
+    def app(self) -> web.Application:
+        """aiohttp application serving the fake API"""
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        app.router.add_get("/_fake/stats", self.handle_stats)
+        app.router.add_post("/_fake/updates", self.handle_push_update)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on host:port (0 picks a free port), returning the base URL for ``bot.api_url``"""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.api_url = f"http://{host}:{bound_port}"
+        return self.api_url
+
+    def url(self, token: str) -> str:
+        """Bot method base URL for a token, as in ``TelegramBot.base_url``"""
+        return f"{self.api_url}/bot{token}/"
+
+    async def stop(self) -> None:
+        if self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+        if self._runner is not None:
+            # Answer pending long polls so shutdown does not wait for their timeout
+            self._new_update.set()
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeBotAPI":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def add_update(self, update: dict) -> None:
+        """Queue an update for getUpdates, or post it to the webhook if one is set"""
+        if self.webhook_url:
+            task = asyncio.create_task(self._post_webhook(update))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+            return
+        self.updates.append(update)
+        self._new_update.set()
+
+    async def _post_webhook(self, update: dict) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        try:
+            async with self._session.post(self.webhook_url, json=update) as response:
+                await response.read()
+        except aiohttp.ClientError as e:
+            logger.warning("Webhook delivery failed: %s", e)
+
+    def _next_fault(self) -> int | str | None:
+        if self.faults:
+            return self.faults.pop(0)
+        if self.reset_rate and self._random.random() < self.reset_rate:
+            return RESET
+        if self.rate_limit_rate and self._random.random() < self.rate_limit_rate:
+            return 429
+        if self.error_rate and self._random.random() < self.error_rate:
+            return 500
+        return None
+
+    async def _read_payload(self, request: web.Request) -> dict:
+        if request.content_type == "multipart/form-data":
+            payload = {}
+            for name, value in (await request.post()).items():
+                if isinstance(value, web.FileField):
+                    content = value.file.read()
+                    if self.record:
+                        self.uploads.append(content)
+                    value = None
+                elif name in ("media", "reply_markup"):
+                    value = json.loads(value)
+                payload[name] = value
+            return payload
+        if request.can_read_body:
+            if request.content_type == "application/json":
+                return await request.json()
+            return dict(await request.post())
+        return dict(request.query)
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        method = request.match_info["method"]
+        payload = await self._read_payload(request)
+        self.counts[method] += 1
+        if self.record:
+            self.requests.append((method, payload))
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method.startswith(("send", "edit")):
+            fault = self._next_fault()
+            if fault == RESET:
+                request.transport.close()
+                return web.Response()
+            if fault is not None:
+                return self._error(fault, "Injected error")
+
+        handler = self._methods.get(method)
+        if handler is None:
+            return self._ok(True)
+        return await handler(payload)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"requests": dict(self.counts), "messages": len(self.messages)})
+
+    async def handle_push_update(self, request: web.Request) -> web.Response:
+        self.add_update(await request.json())
+        return self._ok(True)
+
+    def _ok(self, result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    def _error(self, status: int, description: str) -> web.Response:
+        body = {"ok": False, "error_code": status, "description": description}
+        headers = {}
+        if status == 429:
+            body["description"] = f"Too Many Requests: retry after {self.retry_after}"
+            body["parameters"] = {"retry_after": self.retry_after}
+            headers["Retry-After"] = str(self.retry_after)
+        return web.json_response(body, status=status, headers=headers)
+
+    def _new_message(self, payload: dict, **content) -> dict:
+        chat_id = str(payload.get("chat_id"))
+        self._last_message_id[chat_id] += 1
+        message_id = self._last_message_id[chat_id]
+        message = {"message_id": message_id, "chat": {"id": chat_id}, **content}
+        self.messages[(chat_id, message_id)] = message
+        return message
+
+    def _file(self, value) -> str | None:
+        """file_id for media sent as an upload, URL or existing file_id"""
+        if isinstance(value, str) and value.startswith("file-"):
+            return value if value in self.file_ids else None
+        file_id = f"file-{len(self.file_ids)}"
+        self.file_ids.add(file_id)
+        return file_id
+
+    def _media_content(self, field: str, file_id: str) -> dict:
+        """Message content for sent media, photos being a list of sizes"""
+        return {field: [{"file_id": file_id}] if field == "photo" else {"file_id": file_id}}
+
+    async def _send_message(self, payload: dict) -> web.Response:
+        return self._ok(self._new_message(payload, text=payload.get("text")))
+
+    async def _send_media(self, payload: dict, field: str) -> web.Response:
+        file_id = self._file(payload.get(field))
+        if file_id is None:
+            return self._error(400, "Bad Request: wrong file identifier")
+        content = self._media_content(field, file_id)
+        return self._ok(self._new_message(payload, caption=payload.get("caption"), **content))
+
+    async def _send_photo(self, payload: dict) -> web.Response:
+        return await self._send_media(payload, "photo")
+
+    async def _send_document(self, payload: dict) -> web.Response:
+        return await self._send_media(payload, "document")
+
+    async def _send_video(self, payload: dict) -> web.Response:
+        return await self._send_media(payload, "video")
+
+    async def _send_audio(self, payload: dict) -> web.Response:
+        return await self._send_media(payload, "audio")
+
+    async def _send_media_group(self, payload: dict) -> web.Response:
+        media = payload.get("media") or []
+        if not 2 <= len(media) <= 10:
+            return self._error(400, "Bad Request: media group must include 2-10 items")
+        file_ids = [self._file(item.get("media")) for item in media]
+        if None in file_ids:
+            return self._error(400, "Bad Request: wrong file identifier")
+        return self._ok([
+            self._new_message(
+                payload,
+                caption=item.get("caption"),
+                **self._media_content(item.get("type", "photo"), file_id),
+            )
+            for item, file_id in zip(media, file_ids)
+        ])
+
+    async def _edit(self, payload: dict, field: str) -> web.Response:
+        key = (str(payload.get("chat_id")), int(payload.get("message_id", 0)))
+        message = self.messages.get(key)
+        if message is None:
+            return self._error(400, "Bad Request: message to edit not found")
+        if message.get(field) == payload.get(field):
+            return self._error(400, "Bad Request: message is not modified")
+        message[field] = payload.get(field)
+        return self._ok(message)
+
+    async def _edit_message_text(self, payload: dict) -> web.Response:
+        return await self._edit(payload, "text")
+
+    async def _edit_message_caption(self, payload: dict) -> web.Response:
+        return await self._edit(payload, "caption")
+
+    async def _get_updates(self, payload: dict) -> web.Response:
+        offset = int(payload.get("offset") or 0)
+        limit = int(payload.get("limit") or 100)
+        timeout = float(payload.get("timeout") or 0)
+        if self.webhook_url:
+            return self._error(409, "Conflict: can't use getUpdates method while webhook is active")
+
+        # Updates before the offset are confirmed and forgotten
+        self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._ok(self.updates[:limit])
+
+    async def _set_webhook(self, payload: dict) -> web.Response:
+        self.webhook_url = payload.get("url") or None
+        return self._ok(True)
+
+    async def _delete_webhook(self, payload: dict) -> web.Response:
+        self.webhook_url = None
+        return self._ok(True)
+
+    async def _get_webhook_info(self, payload: dict) -> web.Response:
+        return self._ok({"url": self.webhook_url or "", "pending_update_count": len(self.updates)})
+
+    async def _get_me(self, payload: dict) -> web.Response:
+        return self._ok({"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"})
+
+
+def run_fake_api(host: str = "127.0.0.1", port: int = 8081, **options) -> None:
+    """Serve the fake API until interrupted (used by ``telegrify fake-api``)"""
+    api = FakeBotAPI(record=False, **options)
+    web.run_app(api.app(), host=host, port=port, print=None)
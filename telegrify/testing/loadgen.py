@@ -0,0 +1,80 @@
+"""HTTP load generator behind ``telegrify bench``"""
+
+import asyncio
+import json
+import math
+import time
+from collections import Counter
+
+import aiohttp
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(samples)))
+    return samples[rank - 1]
+
+
+def summarize(latencies: list[float], elapsed: float, statuses: Counter, errors: Counter) -> dict:
+    """Latency percentiles (ms) and throughput for a finished run"""
+    latencies = sorted(latencies)
+    total = len(latencies)
+    return {
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "throughput": round(total / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, pct) * 1000, 2)
+            for name, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))
+        },
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "errors": dict(errors),
+    }
+
+
+async def run_load(
+    url: str,
+    payload: dict,
+    requests: int = 1000,
+    concurrency: int = 50,
+    api_key: str | None = None,
+    timeout: float = 30.0,
+) -> dict:
+    """POST payload to url requests times with up to concurrency in flight
+
+    Every request is timed from send to full response. Non-2xx answers are
+    counted by status and connection failures by exception type; both still
+    count towards latency and throughput.
+    """
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["X-API-Key"] = api_key
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    remaining = requests
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                async with session.post(url, data=body, headers=headers) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                errors[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(min(concurrency, requests))))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, elapsed, statuses, errors)
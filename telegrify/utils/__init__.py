@@ -1,5 +1,10 @@
 """Utility functions"""
 
-from telegrify.utils.validators import validate_chat_id, validate_parse_mode, sanitize_payload, escape_markdown_v2
+from telegrify.utils.validators import (
+    escape_markdown_v2,
+    sanitize_payload,
+    validate_chat_id,
+    validate_parse_mode,
+)
 
 __all__ = ["validate_chat_id", "validate_parse_mode", "sanitize_payload", "escape_markdown_v2"]
@@ -12,7 +12,6 @@ References:
 import re
 from typing import Optional, Union
 
-
 # MarkdownV2 special characters that MUST be escaped
 # According to Telegram Bot API docs:
 MARKDOWNV2_SPECIAL_CHARS = [
@@ -51,7 +50,7 @@ def escape_markdown_v2(text: Optional[Union[str, int, float]]) -> str:
     escaped_text = re.sub(r'\\(~)([^~]+?)\\(~)', r'\1\2\1', escaped_text)
     # Un-escape `code` - note: this is a simple version
     escaped_text = re.sub(r'\\(`)([^`]+?)\\(`)', r'\1\2\1', escaped_text)
-    
+
     return escaped_text
 
 
@@ -27,6 +27,6 @@ def sanitize_payload(payload: dict[str, Any]) -> dict[str, Any]:
 
 def escape_markdown_v2(text: str) -> str:
     """Escape special MarkdownV2 characters"""
-    for char in ["_", "*", "[", "]", "(", ")", "~", "`", ">", "#", "+", "-", "=", "|", "{", "}", ".", "!"]:
+    for char in "_*[]()~`>#+-=|{}.!":
         text = str(text).replace(char, f"\\{char}")
     return text
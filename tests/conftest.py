@@ -37,9 +37,50 @@ def config_file(sample_config):
         return f.name
 
 
+@pytest.fixture
+async def app_factory(sample_config, tmp_path):
+    """Build apps from sample_config, with sections updated by keyword overrides
+
+    ``app_factory(server={"api_key": "secret"})`` merges into the server
+    section; overrides that are not dicts replace the section. Bots and the
+    forwarder are closed at teardown, for tests that skip the lifespan.
+    """
+    from telegrify.server.app import create_app
+
+    apps = []
+
+    def make(**overrides):
+        config = dict(sample_config)
+        for section, value in overrides.items():
+            if isinstance(value, dict) and isinstance(config.get(section), dict):
+                value = {**config[section], **value}
+            config[section] = value
+        path = tmp_path / f"config-{len(apps)}.yaml"
+        path.write_text(yaml.dump(config))
+        app = create_app(str(path))
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        pools = [app.state.bot_pool, *app.state.bot_pools.values()]
+        for bot in {bot for pool in pools for bot in pool.bots}:
+            await bot.close()
+        await app.state.forwarder.close()
+
+
 @pytest.fixture
 def mock_bot():
     """Mock Telegram bot for testing"""
     from telegrify.core.bot import TelegramBot
 
     return TelegramBot(token="test_token", test_mode=True)
+
+
+@pytest.fixture
+async def fake_bot_api():
+    """Local fake Telegram Bot API served over HTTP"""
+    from telegrify.testing import FakeBotAPI
+
+    async with FakeBotAPI(retry_after=0) as api:
+        yield api
@@ -0,0 +1,94 @@
+"""Tests for admission limits and load shedding"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from telegrify.core.admission import AdmissionGate, OverloadedError
+
+
+async def test_gate_queues_then_refuses():
+    """Test requests wait in order up to max_queued and are refused after"""
+    gate = AdmissionGate(max_inflight=1, max_queued=1)
+    await gate.acquire()
+    waiting = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(OverloadedError):
+        await gate.acquire()
+    assert gate.full
+
+    gate.release()
+    await waiting
+    assert (gate.inflight, gate.queued) == (1, 0)
+    gate.release()
+    assert gate.inflight == 0
+
+
+async def test_gate_queue_timeout():
+    """Test a request waiting longer than queue_timeout is refused"""
+    gate = AdmissionGate(max_inflight=1, max_queued=5, queue_timeout=0.01)
+    await gate.acquire()
+    with pytest.raises(OverloadedError):
+        await gate.acquire()
+    assert gate.queued == 0
+
+
+async def test_retry_after_follows_drain_rate():
+    """Test the retry hint shrinks as requests complete faster"""
+    gate = AdmissionGate(max_inflight=1)
+    assert gate.retry_after() == AdmissionGate.MAX_RETRY_AFTER
+    for _ in range(50):
+        await gate.acquire()
+        gate.release()
+    assert gate.retry_after() == 1
+
+
+@pytest.fixture
+def limited_app(sample_config, app_factory, fake_bot_api):
+    """App whose endpoint handles one request at a time, sending to a slow fake API"""
+    sample_config["endpoints"][0]["max_inflight"] = 1
+    app = app_factory(
+        server={"max_inflight": 10},
+        bot={"test_mode": False, "api_url": fake_bot_api.api_url},
+    )
+    fake_bot_api.latency = 0.1
+    return app
+
+
+async def test_endpoint_over_quota_gets_429(limited_app):
+    """Test a second concurrent request to a full endpoint is shed with Retry-After"""
+    transport = httpx.ASGITransport(app=limited_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.post("/notify/test", json={"message": "one"}))
+        await asyncio.sleep(0.02)
+        second = await client.post("/notify/test", json={"message": "two"})
+        health = (await client.get("/health")).json()
+        assert (await first).status_code == 200
+
+    assert second.status_code == 429
+    assert second.json()["detail"]["error"] == "endpoint_busy"
+    assert int(second.headers["Retry-After"]) >= 1
+    assert health["saturation"]["inflight"] == 1
+    assert health["endpoint_saturation"]["/notify/test"]["saturation"] == 1.0
+
+
+async def test_trailing_slash_uses_endpoint_gate(sample_config, app_factory, fake_bot_api):
+    """Test /path/ in dispatch mode goes through the endpoint's admission gate"""
+    sample_config["endpoints"][0]["max_inflight"] = 1
+    app = app_factory(
+        server={"routing": "dispatch"},
+        bot={"test_mode": False, "api_url": fake_bot_api.api_url},
+    )
+    fake_bot_api.latency = 0.1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.post("/notify/test/", json={"message": "one"}))
+        await asyncio.sleep(0.02)
+        second = await client.post("/notify/test/", json={"message": "two"})
+        assert (await first).status_code == 200
+
+    assert second.status_code == 429
+    assert second.json()["detail"]["error"] == "endpoint_busy"
@@ -24,3 +24,35 @@ async def test_bot_send_photo_test_mode():
     )
 
     assert result["ok"] is True
+
+
+async def test_bot_closes_session_as_context_manager():
+    """Test the pooled HTTP session is closed when the bot is used with async with"""
+    async with TelegramBot(token="test_token") as bot:
+        session = bot._get_session()
+
+    assert session.closed
+
+
+async def test_webhook_commands_close_the_bot(fake_bot_api, sample_config, tmp_path, caplog):
+    """Test the webhook CLI commands leave no unclosed HTTP session behind"""
+    import asyncio
+    import gc
+
+    import yaml
+    from click.testing import CliRunner
+
+    from telegrify.cli.commands import cli
+
+    sample_config["bot"]["api_url"] = fake_bot_api.api_url
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.dump(sample_config))
+
+    commands = (["webhook", "setup", "--url", "https://example.com"], ["webhook", "info"], ["webhook", "delete"])
+    for command in commands:
+        result = await asyncio.to_thread(CliRunner().invoke, cli, [*command, "--config", str(path)])
+        assert result.exit_code == 0, result.output
+        assert "Failed" not in result.output
+    gc.collect()
+
+    assert "Unclosed" not in caplog.text
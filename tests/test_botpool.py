@@ -0,0 +1,83 @@
+"""Tests for multi-bot pools"""
+
+import pytest
+
+from telegrify.core.bot import TelegramBot
+from telegrify.core.botpool import BotPool, ChatAssignments
+
+
+def make_bots(count):
+    return [TelegramBot(token=f"{100 + i}:token") for i in range(count)]
+
+
+def test_affinity_is_stable_and_spread():
+    """Test chats keep their bot and adding a bot only moves chats to it"""
+    bots = make_bots(3)
+    pool = BotPool(bots)
+    chats = [str(-1000 - i) for i in range(900)]
+
+    before = {chat: pool.for_chat(chat) for chat in chats}
+    assert all(pool.for_chat(chat) is before[chat] for chat in chats)
+    assert all(sum(bot is chosen for chosen in before.values()) > 200 for bot in bots)
+
+    new_bot = TelegramBot(token="999:token")
+    grown = BotPool(bots + [new_bot])
+    moved = [chat for chat in chats if grown.for_chat(chat) is not before[chat]]
+    assert moved and all(grown.for_chat(chat) is new_bot for chat in moved)
+
+
+def test_pins_and_least_loaded():
+    """Test pinned chats use their bot and other chats stick to the least loaded bot"""
+    first, second = make_bots(2)
+    pool = BotPool([first, second], policy="least_loaded", pins={"-1": "100"})
+    first.inflight = 5
+
+    assert pool.for_chat("-2") is second
+    second.inflight = 10
+    assert pool.for_chat("-2") is second
+    assert pool.for_chat("-3") is first
+    assert pool.for_chat("-1") is first
+
+    with pytest.raises(ValueError):
+        BotPool([first], pins={"-1": "555"})
+
+
+async def test_least_loaded_assignments_survive_restart(tmp_path):
+    """Test stored least_loaded assignments are restored instead of chosen again"""
+    path = str(tmp_path / "assignments.db")
+    first, second = make_bots(2)
+    assignments = ChatAssignments(path)
+    pool = BotPool([first, second], policy="least_loaded", assignments=assignments)
+    await pool.start()
+    second.inflight = 1
+    chats = [str(n) for n in range(1000)]
+    assert all(pool.for_chat(chat) is first for chat in chats)
+    await assignments.close()
+
+    first, second = make_bots(2)
+    first.inflight = 1
+    assignments = ChatAssignments(path)
+    pool = BotPool([first, second], policy="least_loaded", assignments=assignments)
+    other = BotPool([first, second], policy="least_loaded", name="alerts", assignments=assignments)
+    await pool.start()
+    await other.start()
+    assert all(pool.for_chat(chat) is first for chat in chats)
+    assert other.for_chat("1") is second
+    await assignments.close()
+
+
+def test_app_builds_named_pools(sample_config, app_factory):
+    """Test endpoints use their named pool and shared tokens share one bot"""
+    token = sample_config["bot"]["token"]
+    sample_config["endpoints"].append({"path": "/notify/alerts", "chat_id": "1", "bot": "alerts"})
+
+    app = app_factory(
+        bot={"tokens": ["222:second"]},
+        bots={"alerts": {"tokens": ["333:alerts", "222:second"]}},
+    )
+
+    assert [bot.token for bot in app.state.bot_pool.bots] == [token, "222:second"]
+    alerts = app.state.bot_pools["alerts"]
+    assert alerts.bots[1] is app.state.bot_pool.bots[1]
+    assert alerts.bots[0].rate_limiter is not alerts.bots[1].rate_limiter
+    assert app.state.bot is app.state.bot_pool.primary
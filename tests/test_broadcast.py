@@ -0,0 +1,223 @@
+"""Tests for resumable broadcast jobs"""
+
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+
+from telegrify.core.broadcast import (
+    BroadcastJobs,
+    FileRecipients,
+    InvalidPayloadError,
+    RecipientError,
+)
+from telegrify.core.scheduler import DeliveryScheduler
+from telegrify.core.schema import compile_schema
+
+
+async def wait_for(jobs, job_id, status="done"):
+    for _ in range(200):
+        job = await jobs.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {job['status']}")
+
+
+def test_file_recipients_resume_from_cursor(tmp_path):
+    """Test CSV rows are read in chunks with extra columns as context"""
+    path = tmp_path / "subscribers.csv"
+    path.write_text("chat_id,lang\n1,en\n2,de\n\n3,en\n")
+    source = FileRecipients(path)
+    assert source.count() == 3
+
+    first, cursor = source.read(0, 2)
+    assert first == [("1", {"lang": "en"}), ("2", {"lang": "de"})]
+    rest, end = source.read(cursor, 2)
+    assert rest == [("3", {"lang": "en"})]
+    assert source.read(end, 2) == ([], end)
+
+
+async def test_job_renders_once_per_context(tmp_path):
+    """Test every recipient is sent to, rendering once per distinct context"""
+    (tmp_path / "subscribers.csv").write_text("chat_id,lang\n" + "".join(f"{n},{'en' if n % 2 else 'de'}\n" for n in range(25)))
+    scheduler = DeliveryScheduler(workers=4)
+    jobs = BroadcastJobs(str(tmp_path / "jobs.db"), str(tmp_path), scheduler, chunk_size=10)
+    renders, sent = [], []
+
+    def prepare(payload):
+        renders.append(payload["lang"])
+
+        async def deliver(chat_id):
+            sent.append((chat_id, payload["lang"]))
+            return {"ok": True}
+
+        return deliver, "low"
+
+    jobs.register("/notify", prepare)
+    job_id = await jobs.create("/notify", {"message": "hi"}, {"file": "subscribers.csv"})
+    job = await wait_for(jobs, job_id)
+    await jobs.stop()
+    await scheduler.stop()
+
+    assert sorted(renders) == ["de", "en"]
+    assert len(sent) == 25 and ("3", "en") in sent
+    assert (job["total"], job["processed"], job["sent"], job["failed"], job["percent"]) == (25, 25, 25, 0, 100.0)
+
+
+async def test_job_resumes_after_restart(tmp_path):
+    """Test a stopped job continues from its last checkpoint"""
+    db = tmp_path / "subscribers.db"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE subscribers (chat_id INTEGER, name TEXT)")
+        conn.executemany("INSERT INTO subscribers VALUES (?, NULL)", [(n,) for n in range(30)])
+    source = {"sqlite": "subscribers.db", "table": "subscribers"}
+    sent = []
+
+    def prepare(payload):
+        async def deliver(chat_id):
+            sent.append(chat_id)
+            await asyncio.sleep(0.01)
+            return {"ok": True}
+
+        return deliver, "normal"
+
+    scheduler = DeliveryScheduler(workers=1)
+    jobs = BroadcastJobs(str(tmp_path / "jobs.db"), str(tmp_path), scheduler, chunk_size=5, max_inflight=5)
+    jobs.register("/notify", prepare)
+    job_id = await jobs.create("/notify", {}, source)
+    await asyncio.sleep(0.08)
+    await jobs.stop()
+    await scheduler.stop()
+    checkpoint = (await BroadcastJobs(str(tmp_path / "jobs.db"), str(tmp_path), scheduler).get(job_id))["processed"]
+    assert 0 < checkpoint < 30
+
+    scheduler = DeliveryScheduler(workers=1)
+    jobs = BroadcastJobs(str(tmp_path / "jobs.db"), str(tmp_path), scheduler, chunk_size=5)
+    jobs.register("/notify", prepare)
+    await jobs.start_if_pending()
+    job = await wait_for(jobs, job_id)
+    await jobs.stop()
+    await scheduler.stop()
+
+    assert job["processed"] == 30
+    # Only sends in flight at the stop (at most chunk_size + max_inflight) are made twice
+    assert set(sent) == {str(n) for n in range(30)}
+    assert len(sent) <= 30 + 10
+
+
+async def test_slow_chat_does_not_stall_the_job(tmp_path):
+    """Test sends keep flowing past a chat whose send has not finished"""
+    (tmp_path / "subscribers.txt").write_text("".join(f"{n}\n" for n in range(1, 9)))
+    release = asyncio.Event()
+    sent = []
+
+    def prepare(payload):
+        async def deliver(chat_id):
+            if chat_id == "1":
+                await release.wait()
+            sent.append(chat_id)
+            return {"ok": True}
+
+        return deliver, "normal"
+
+    scheduler = DeliveryScheduler(workers=2)
+    jobs = BroadcastJobs(None, str(tmp_path), scheduler, chunk_size=2, max_inflight=4)
+    jobs.register("/notify", prepare)
+    job_id = await jobs.create("/notify", {}, {"file": "subscribers.txt"})
+    await asyncio.sleep(0.05)
+    assert sorted(sent) == [str(n) for n in range(2, 9)]
+    assert (await jobs.get(job_id))["processed"] == 0
+
+    release.set()
+    job = await wait_for(jobs, job_id)
+    await jobs.stop()
+    await scheduler.stop()
+    assert (job["processed"], job["sent"]) == (8, 8)
+
+
+async def test_cancelled_sends_count_as_failed(tmp_path):
+    """Test a send cancelled before it finished is not counted as sent"""
+    (tmp_path / "subscribers.txt").write_text("1\n2\n")
+
+    class CancellingScheduler:
+        def submit(self, chat_id, send, priority):
+            future = asyncio.get_running_loop().create_future()
+            future.cancel()
+            return future
+
+    jobs = BroadcastJobs(None, str(tmp_path), CancellingScheduler())
+    jobs.register("/notify", lambda payload: (None, "normal"))
+    job = await wait_for(jobs, await jobs.create("/notify", {}, {"file": "subscribers.txt"}))
+    await jobs.stop()
+
+    assert (job["sent"], job["failed"], job["last_error"]) == (0, 2, "Send cancelled")
+
+
+async def test_payload_is_validated_per_recipient(tmp_path):
+    """Test a job is refused up front if its first recipient fails the schema, later ones fail alone"""
+    (tmp_path / "subscribers.csv").write_text("chat_id,lang\n1,xx\n")
+    (tmp_path / "mixed.csv").write_text("chat_id,lang\n1,en\n2,fr\n")
+    sent = []
+
+    def prepare(payload):
+        async def deliver(chat_id):
+            sent.append(chat_id)
+            return {"ok": True}
+
+        return deliver, "normal"
+
+    scheduler = DeliveryScheduler(workers=1)
+    jobs = BroadcastJobs(None, str(tmp_path), scheduler)
+    schema = {"$schema": "", "required": ["message"], "properties": {"lang": {"enum": ["en", "de"]}}}
+    jobs.register("/notify", prepare, compile_schema(schema))
+    with pytest.raises(InvalidPayloadError):
+        await jobs.create("/notify", {"message": "hi"}, {"file": "subscribers.csv"})
+    with pytest.raises(InvalidPayloadError):
+        await jobs.create("/notify", {}, {"file": "mixed.csv"})
+
+    job = await wait_for(jobs, await jobs.create("/notify", {"message": "hi"}, {"file": "mixed.csv"}))
+    await jobs.stop()
+    await scheduler.stop()
+
+    assert sent == ["1"]
+    assert (job["sent"], job["failed"]) == (1, 1)
+
+
+async def test_recipients_must_stay_in_recipients_dir(tmp_path):
+    """Test job sources outside recipients_dir or with bad identifiers are refused"""
+    jobs = BroadcastJobs(None, str(tmp_path), DeliveryScheduler(workers=1))
+    jobs.register("/notify", lambda payload: None)
+    with pytest.raises(RecipientError):
+        await jobs.create("/notify", {}, {"file": "../etc/passwd"})
+    (tmp_path / "subs.db").touch()
+    with pytest.raises(RecipientError):
+        await jobs.create("/notify", {}, {"sqlite": "subs.db", "table": "x; DROP TABLE y"})
+    await jobs.stop()
+
+
+async def test_jobs_endpoint_reports_progress(app_factory, fake_bot_api, tmp_path):
+    """Test POST /jobs sends through the endpoint and GET /jobs/{id} reports it"""
+    (tmp_path / "subscribers.txt").write_text("".join(f"{n}\n" for n in range(1, 8)))
+    app = app_factory(
+        broadcast={"recipients_dir": str(tmp_path), "jobs_file": str(tmp_path / "jobs.db")},
+        server={"api_key": "secret"},
+        bot={"test_mode": False, "api_url": fake_bot_api.api_url},
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"X-API-Key": "secret"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        body = {"endpoint": "/notify/test", "payload": {"message": "Launch"}, "recipients": {"file": "subscribers.txt"}}
+        assert (await client.post("/jobs", json=body)).status_code == 401
+        created = (await client.post("/jobs", json=body, headers=headers)).json()
+        job = await wait_for(app.state.broadcasts, created["job_id"])
+        response = await client.get(f"/jobs/{created['job_id']}", headers=headers)
+        missing = await client.get("/jobs/999", headers=headers)
+    await app.state.broadcasts.stop()
+
+    assert job["sent"] == 7
+    assert response.json()["percent"] == 100.0
+    assert missing.status_code == 404
+    assert fake_bot_api.counts["sendMessage"] == 7
@@ -1,5 +1,7 @@
 """Tests for configuration loading and validation"""
 
+import pytest
+
 from telegrify.core.config import AppConfig, BotConfig, EndpointConfig
 
 
@@ -23,3 +25,21 @@ def test_app_config_loading(sample_config):
     assert len(config.endpoints) == 1
     assert config.server.port == 8000
     assert "test_template" in config.templates
+
+
+def test_endpoint_bot_must_exist(sample_config):
+    """Test endpoints can only reference configured bot pools"""
+    sample_config["endpoints"][0]["bot"] = "alerts"
+    with pytest.raises(ValueError, match="unknown bot"):
+        AppConfig(**sample_config)
+
+
+def test_priority_validation(sample_config):
+    """Test unknown priorities are rejected"""
+    sample_config["endpoints"][0]["priority"] = "urgent"
+    with pytest.raises(ValueError, match="priority"):
+        AppConfig(**sample_config)
+    sample_config["endpoints"][0]["priority"] = "high"
+    sample_config["delivery"] = {"priority_weights": {"high": 0}}
+    with pytest.raises(ValueError, match="at least 1"):
+        AppConfig(**sample_config)
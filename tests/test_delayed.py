@@ -0,0 +1,146 @@
+"""Tests for scheduled and delayed delivery"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from telegrify.core import logs, tracing
+from telegrify.core.delayed import DelayedDelivery, parse_due_time
+
+
+def test_parse_due_time():
+    """Test send_at and delay are converted to Unix time"""
+    assert parse_due_time(send_at="2030-01-01T00:00:00Z") == 1893456000
+    assert parse_due_time(send_at="2030-01-01T02:00:00+02:00") == 1893456000
+    assert parse_due_time(send_at=1893456000) == 1893456000
+    assert parse_due_time(delay=30, now=100) == 130
+    assert parse_due_time() is None
+    with pytest.raises(ValueError):
+        parse_due_time(send_at="tomorrow")
+    with pytest.raises(ValueError):
+        parse_due_time(delay=-5)
+    for flag in (True, False):
+        with pytest.raises(ValueError):
+            parse_due_time(delay=flag)
+        with pytest.raises(ValueError):
+            parse_due_time(send_at=flag)
+
+
+async def test_jobs_are_delivered_in_due_order(tmp_path):
+    """Test jobs fire when due, earliest first"""
+    delayed = DelayedDelivery(str(tmp_path / "schedule.db"))
+    delivered = []
+
+    async def deliver(payload):
+        delivered.append(payload["n"])
+
+    delayed.register("/notify", deliver)
+    now = time.time()
+    for n, delay in enumerate([0.15, 0.05, 0.1]):
+        await delayed.add("/notify", {"n": n}, now + delay)
+
+    await asyncio.sleep(0.02)
+    assert delivered == []
+    await asyncio.sleep(0.25)
+    await delayed.stop()
+
+    assert delivered == [1, 2, 0]
+    assert delayed.pending == 0
+
+
+async def test_pending_jobs_survive_restart(tmp_path):
+    """Test jobs stored before a restart are delivered afterwards"""
+    path = str(tmp_path / "schedule.db")
+    delayed = DelayedDelivery(path)
+    await delayed.add("/notify", {"message": "reminder"}, time.time() + 0.1)
+    await delayed.stop()
+
+    delivered = []
+
+    async def deliver(payload):
+        delivered.append(payload)
+
+    delayed = DelayedDelivery(path)
+    delayed.register("/notify", deliver)
+    await delayed.start_if_pending()
+    await asyncio.sleep(0.3)
+    await delayed.stop()
+
+    assert delivered == [{"message": "reminder"}]
+
+
+async def test_far_jobs_stay_on_disk(tmp_path):
+    """Test only jobs inside the horizon are held in memory"""
+    delayed = DelayedDelivery(str(tmp_path / "schedule.db"), horizon=60)
+    now = time.time()
+    for n in range(100):
+        await delayed.add("/notify", {"n": n}, now + 3600 + n)
+    await delayed.add("/notify", {"n": "soon"}, now + 30)
+    await asyncio.sleep(0.05)
+
+    assert delayed.pending == 101
+    assert len(delayed._heap) == 1
+    await delayed.stop()
+
+
+def test_endpoint_schedules_delayed_payload(app_factory, tmp_path):
+    """Test a payload with delay is accepted immediately and sent later"""
+    app = app_factory(delivery={"schedule_file": str(tmp_path / "schedule.db")})
+    sent = []
+
+    async def send_message(chat_id, text, parse_mode=None, reply_markup=None):
+        sent.append(text)
+        return {"ok": True, "result": {"message_id": 1}}
+
+    app.state.bot.send_message = send_message
+
+    with TestClient(app) as client:
+        response = client.post("/notify/test", json={"message": "later", "delay": 0.1})
+        assert response.status_code == 200
+        assert response.json()["status"] == "scheduled"
+        assert sent == []
+
+        time.sleep(0.4)
+        assert len(sent) == 1
+
+        assert client.post("/notify/test", json={"message": "x", "send_at": "soon"}).status_code == 400
+        response = client.post("/notify/test", json={"message": "x", "delay": True})
+        assert response.status_code == 400
+        assert response.json()["detail"]["error"] == "invalid_send_at"
+
+
+def test_delivery_is_attributed_to_the_scheduling_request(app_factory, tmp_path):
+    """Test each delayed send runs under the request id and trace of the request that scheduled it"""
+    traces = tmp_path / "traces.jsonl"
+    app = app_factory(
+        delivery={"schedule_file": str(tmp_path / "schedule.db")},
+        tracing={"enabled": True, "exporter": "file", "file": str(traces)},
+    )
+    sent = []
+
+    async def send_message(chat_id, text, parse_mode=None, reply_markup=None):
+        sent.append((logs.current_request_id(), tracing.current_span().trace_id))
+        return {"ok": True, "result": {"message_id": 1}}
+
+    app.state.bot.send_message = send_message
+
+    with TestClient(app) as client:
+        for n in (1, 2):
+            response = client.post(
+                "/notify/test", json={"message": f"m{n}", "delay": 0.1}, headers={"X-Request-ID": f"req-{n}"}
+            )
+            assert response.json()["status"] == "scheduled"
+        time.sleep(0.4)
+
+    scheduling = {}
+    with open(traces) as f:
+        for line in f:
+            for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]:
+                attributes = {each["key"]: next(iter(each["value"].values())) for each in span["attributes"]}
+                if span["name"] == "notify" and not attributes["scheduled"]:
+                    scheduling[attributes["request.id"]] = span["traceId"]
+
+    assert sorted(sent) == [("req-1", scheduling["req-1"]), ("req-2", scheduling["req-2"])]
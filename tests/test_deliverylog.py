@@ -0,0 +1,87 @@
+"""Tests for the delivery log"""
+
+import asyncio
+import time
+
+import pytest
+from click.testing import CliRunner
+from fastapi.testclient import TestClient
+
+from telegrify.cli.commands import cli
+from telegrify.core.deliverylog import DeliveryLog, parse_time, payload_digest
+
+
+def test_parse_time():
+    """Test absolute and relative times are converted to Unix time"""
+    assert parse_time("1893456000") == 1893456000
+    assert parse_time("2030-01-01T00:00:00Z") == 1893456000
+    assert parse_time("2h", now=10000) == 2800
+    with pytest.raises(ValueError):
+        parse_time("yesterday")
+
+
+def test_payload_digest_ignores_key_order():
+    """Test the same payload hashes the same whatever its key order"""
+    assert payload_digest({"a": 1, "b": 2}) == payload_digest({"b": 2, "a": 1})
+    assert payload_digest({"a": 1}) != payload_digest({"a": 2})
+
+
+async def test_records_are_written_in_batches(tmp_path):
+    """Test records are buffered until a batch fills, then queried by filter"""
+    log = DeliveryLog(str(tmp_path / "deliveries.db"), batch_size=3, flush_interval=60)
+    await log.start()
+    log.record("/orders", 1, "sent", 10, 0.05, "abc")
+    log.record("/orders", 2, "failed", None, 0.2, "abc", "Forbidden: bot was blocked")
+    await asyncio.sleep(0.01)
+    assert await log.query() == []
+    assert log.pending == 2
+
+    log.record("/alerts", 1, "sent", 11, 0.01, "def")
+    await asyncio.sleep(0.05)
+    assert log.pending == 0
+
+    chat = await log.query(chat_id=1)
+    assert [record["endpoint"] for record in chat] == ["/alerts", "/orders"]
+    assert chat[1]["latency_ms"] == 50.0
+    failed = await log.query(endpoint="/orders", status="failed")
+    assert failed[0]["error"] == "Forbidden: bot was blocked"
+    assert len(await log.query(payload_hash="abc", since=time.time() - 60)) == 2
+    await log.stop()
+
+
+async def test_prune_and_overflow(tmp_path):
+    """Test old records are pruned and records past max_pending are dropped"""
+    log = DeliveryLog(str(tmp_path / "deliveries.db"), retention_days=1, max_pending=2)
+    log.record("/orders", 1, "sent")
+    log.record("/orders", 2, "sent")
+    log.record("/orders", 3, "sent")
+    assert log.pending == 2
+    log._buffer[0] = (time.time() - 2 * 86400, *log._buffer[0][1:])
+    await log.flush()
+
+    assert await log.prune() == 1
+    assert [record["chat_id"] for record in await log.query()] == ["2"]
+    await log.stop()
+
+
+def test_sends_are_logged_and_queryable(app_factory, tmp_path):
+    """Test notification sends are recorded and found by the CLI"""
+    db = str(tmp_path / "deliveries.db")
+    app = app_factory(delivery_log={"enabled": True, "file": db}, server={"admin_key": "admin"})
+
+    payload = {"message": "Order #123 shipped"}
+    with TestClient(app) as client:
+        assert client.post("/notify/test", json=payload).status_code == 200
+        response = client.get("/admin/deliveries", params={"chat_id": "123456789"}, headers={"X-Admin-Key": "admin"})
+
+    records = response.json()["deliveries"]
+    assert len(records) == 1
+    assert records[0]["endpoint"] == "/notify/test"
+    assert records[0]["status"] == "sent"
+    assert records[0]["payload_hash"] == payload_digest(payload)
+
+    payload_file = tmp_path / "payload.json"
+    payload_file.write_text('{"message": "Order #123 shipped"}')
+    result = CliRunner().invoke(cli, ["deliveries", "--db", db, "--payload", str(payload_file), "--json"])
+    assert result.exit_code == 0
+    assert '"chat_id": "123456789"' in result.output
@@ -0,0 +1,70 @@
+"""Tests for command and callback dispatch tables"""
+
+from telegrify.core.config import AppConfig
+from telegrify.server.dispatch import HandlerTable
+from telegrify.server.updates import UpdateHandler
+
+
+def test_exact_and_pattern_match():
+    """Test exact lookups and parameter extraction"""
+    table = HandlerTable()
+    table.add("approve", "exact")
+    table.add("approve:{order_id}", "approve")
+    table.add("approve:{order_id}:{step}", "approve_step")
+    table.add("reject:{order_id}", "reject")
+
+    assert table.match("approve") == ("exact", {})
+    assert table.match("approve:42") == ("approve", {"order_id": "42"})
+    assert table.match("reject:7") == ("reject", {"order_id": "7"})
+    assert table.match("approve:") is None
+    assert table.match("unknown:1") is None
+    assert len(table) == 4
+
+
+def test_longest_prefix_wins():
+    """Test the most specific literal prefix is tried first"""
+    table = HandlerTable()
+    table.add("{anything}", "catch_all")
+    table.add("order:{id}", "order")
+
+    assert table.match("order:5") == ("order", {"id": "5"})
+    assert table.match("other") == ("catch_all", {"anything": "other"})
+
+
+def test_first_exact_handler_is_kept():
+    """Test duplicate exact values keep the first handler, like the old linear scan"""
+    table = HandlerTable()
+    table.add("/start", "first")
+    table.add("/start", "second")
+
+    assert table.match("/start") == ("first", {})
+
+
+async def test_command_parameters_in_template_context(sample_config):
+    """Test parameters from a command pattern reach the response template"""
+    sample_config["commands"] = [
+        {"command": "/start", "response": "Welcome"},
+        {"command": "/order {order_id}", "response": "Order {{ order_id }} for {{ first_name }}"},
+    ]
+    sample_config["callbacks"] = [{"data": "approve:{order_id}", "response": "Approved {{ order_id }}"}]
+    config = AppConfig(**sample_config)
+
+    sent, answered = [], []
+
+    class Bot:
+        async def send_message(self, chat_id, text, **kwargs):
+            sent.append(text)
+
+        async def answer_callback_query(self, callback_id, text=None):
+            answered.append(text)
+
+    handler = UpdateHandler(Bot(), config)
+    user = {"id": 1, "first_name": "Ada"}
+
+    await handler({"message": {"chat": {"id": 1}, "from": user, "text": "/order@my_bot 123"}})
+    await handler({"message": {"chat": {"id": 1}, "from": user, "text": "/start ref"}})
+    await handler({"callback_query": {"id": "c1", "from": user, "data": "approve:99"}})
+    await handler({"callback_query": {"id": "c2", "from": user, "data": "unknown"}})
+
+    assert sent == ["Order 123 for Ada", "Welcome"]
+    assert answered == ["Approved 99", None]
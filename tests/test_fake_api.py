@@ -0,0 +1,78 @@
+"""Tests for the local fake Bot API"""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from telegrify.core.bot import TelegramBot
+from telegrify.testing import FakeBotAPI
+
+
+async def test_bot_talks_to_fake_api():
+    """Test a bot pointed at the fake API sends and edits messages"""
+    async with FakeBotAPI() as api:
+        bot = TelegramBot("123:abc", api_url=api.api_url)
+        sent = await bot.send_message("42", "queued")
+        await bot.edit_message_text("42", sent["result"]["message_id"], "running")
+        await bot.close()
+
+    assert sent["result"]["message_id"] == 1
+    assert api.messages[("42", 1)]["text"] == "running"
+    assert dict(api.counts) == {"sendMessage": 1, "editMessageText": 1}
+
+
+async def test_injected_rate_limit():
+    """Test a 429 carries retry_after in the body and header"""
+    async with FakeBotAPI(retry_after=7) as api, aiohttp.ClientSession() as session:
+        api.faults = [429]
+        async with session.post(f"{api.url('1:a')}sendMessage", json={"chat_id": 1, "text": "x"}) as response:
+            body = await response.json()
+
+    assert response.status == 429
+    assert response.headers["Retry-After"] == "7"
+    assert body["parameters"] == {"retry_after": 7}
+
+
+async def test_injected_connection_reset():
+    """Test a reset fault drops the connection"""
+    async with FakeBotAPI() as api, aiohttp.ClientSession() as session:
+        api.faults = ["reset"]
+        with pytest.raises(aiohttp.ClientError):
+            async with session.post(f"{api.url('1:a')}sendMessage", json={"chat_id": 1, "text": "x"}):
+                pass
+
+
+async def test_get_updates_long_polls():
+    """Test getUpdates waits for an update instead of returning empty"""
+    async with FakeBotAPI() as api, aiohttp.ClientSession() as session:
+        asyncio.get_running_loop().call_later(0.05, api.add_update, {"update_id": 5})
+        async with session.post(f"{api.url('1:a')}getUpdates", json={"timeout": 5}) as response:
+            body = await response.json()
+
+    assert body["result"] == [{"update_id": 5}]
+
+
+async def test_updates_go_to_webhook():
+    """Test updates are posted to the webhook once one is set"""
+    received = []
+
+    async def hook(request):
+        received.append(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post("/hook", hook)
+    server = TestServer(app)
+    await server.start_server()
+
+    async with FakeBotAPI() as api:
+        bot = TelegramBot("1:a", api_url=api.api_url)
+        await bot.set_webhook(str(server.make_url("/hook")))
+        await bot.close()
+        api.add_update({"update_id": 1, "message": {"text": "hi"}})
+    await server.close()
+
+    assert received == [{"update_id": 1, "message": {"text": "hi"}}]
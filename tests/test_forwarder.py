@@ -0,0 +1,106 @@
+"""Tests for outgoing event forwarding"""
+
+import asyncio
+
+import httpx
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from telegrify.core.forwarder import Forwarder
+from telegrify.core.metrics import QUEUE_DEPTH
+
+
+@pytest.fixture
+async def receiver():
+    """HTTP server recording received JSON bodies, failing the first `fail` requests"""
+    state = {"bodies": [], "fail": 0}
+
+    async def handle(request):
+        if state["fail"]:
+            state["fail"] -= 1
+            return web.Response(status=503)
+        state["bodies"].append(await request.json())
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_post("/hook", handle)
+    server = TestServer(app)
+    await server.start_server()
+    state["url"] = str(server.make_url("/hook"))
+    yield state
+    await server.close()
+
+
+async def test_forward_retries_until_accepted(receiver):
+    """Test transient failures are retried with backoff"""
+    receiver["fail"] = 2
+    forwarder = Forwarder(retry_backoff=0.01)
+
+    assert forwarder.submit(receiver["url"], {"n": 1})
+    await forwarder.close()
+
+    assert receiver["bodies"] == [{"n": 1}]
+    assert forwarder.pending == 0
+
+
+async def test_forward_batches_by_count_and_time(receiver):
+    """Test events are combined into batches flushed by size or interval"""
+    forwarder = Forwarder()
+
+    for n in range(5):
+        forwarder.submit(receiver["url"], {"n": n}, batch_size=2, batch_interval=0.05)
+    await asyncio.sleep(0.2)
+    await forwarder.close()
+
+    assert receiver["bodies"] == [
+        {"events": [{"n": 0}, {"n": 1}]},
+        {"events": [{"n": 2}, {"n": 3}]},
+        {"events": [{"n": 4}]},
+    ]
+
+
+async def test_forward_drops_when_saturated(receiver):
+    """Test excess events are dropped instead of piling up"""
+    forwarder = Forwarder(max_pending=2)
+
+    results = [forwarder.submit(receiver["url"], {"n": n}) for n in range(3)]
+    await forwarder.close()
+
+    assert results == [True, True, False]
+    assert len(receiver["bodies"]) == 2
+
+
+async def test_queue_depth_is_reported_while_started():
+    """Test the forwarding queue depth gauge is only registered between start and close"""
+    forwarder = Forwarder()
+    assert 'queue="forwarding"' not in QUEUE_DEPTH.render()
+
+    await forwarder.start()
+    assert 'telegrify_queue_depth{queue="forwarding"} 0' in QUEUE_DEPTH.render()
+
+    await forwarder.close()
+    assert 'queue="forwarding"' not in QUEUE_DEPTH.render()
+
+
+async def test_delivery_reports_are_batched(receiver, sample_config, app_factory, fake_bot_api):
+    """Test each send's outcome is posted to the endpoint's delivery_report_url"""
+    sample_config["endpoints"][0].update(
+        delivery_report_url=receiver["url"], delivery_report_batch_size=2, delivery_report_interval=10
+    )
+    app = app_factory(bot={"test_mode": False, "api_url": fake_bot_api.api_url})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        fake_bot_api.faults = [429]
+        assert (await client.post("/notify/test", json={"message": "one"})).status_code == 200
+        fake_bot_api.faults = [400]
+        assert (await client.post("/notify/test", json={"message": "two"})).status_code == 500
+    await app.state.forwarder.close()
+
+    assert len(receiver["bodies"]) == 1
+    sent, failed = receiver["bodies"][0]["events"]
+    assert (sent["status"], sent["message_id"], sent["retried"]) == ("sent", 1, 1)
+    assert (failed["status"], failed["message_id"], failed["retried"]) == ("failed", None, 0)
+    assert failed["error"] == "Injected error"
+    assert sent["chat_id"] == "123456789" and sent["endpoint"] == "/notify/test"
@@ -0,0 +1,36 @@
+"""Tests for the bench load generator"""
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from telegrify.testing.loadgen import percentile, run_load
+
+
+def test_percentile_nearest_rank():
+    """Test percentiles pick the nearest-rank sample"""
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile(samples, 100) == 100.0
+    assert percentile([], 50) == 0.0
+
+
+async def test_run_load_reports_statuses():
+    """Test every request is sent with the payload and API key and counted"""
+    seen = []
+
+    async def notify(request):
+        seen.append((request.headers.get("X-API-Key"), await request.json()))
+        return web.json_response({"status": "sent"}, status=200 if len(seen) % 2 else 500)
+
+    app = web.Application()
+    app.router.add_post("/notify", notify)
+    server = TestServer(app)
+    await server.start_server()
+    results = await run_load(str(server.make_url("/notify")), {"message": "hi"}, requests=10, concurrency=3, api_key="k")
+    await server.close()
+
+    assert seen == [("k", {"message": "hi"})] * 10
+    assert results["requests"] == 10
+    assert results["statuses"] == {"200": 5, "500": 5}
+    assert results["latency_ms"]["p50"] <= results["latency_ms"]["p99"] <= results["latency_ms"]["max"]
@@ -0,0 +1,67 @@
+"""Tests for queued, structured logging"""
+
+import json
+import logging
+
+from fastapi.testclient import TestClient
+
+from telegrify.core import logs
+from telegrify.core.config import LoggingConfig
+from telegrify.server.app import create_app
+
+
+def make_record(message="Notification sent to %s", args=("42",), **extra):
+    record = logging.LogRecord("telegrify.test", logging.INFO, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extras():
+    """Test records become one JSON object with extra= fields"""
+    record = make_record(request_id="abc123", chat_id="42", endpoint="/orders", sample=True)
+    entry = json.loads(logs.JSONFormatter().format(record))
+
+    assert entry["message"] == "Notification sent to 42"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "abc123"
+    assert (entry["chat_id"], entry["endpoint"]) == ("42", "/orders")
+    assert "sample" not in entry and "args" not in entry
+
+
+async def test_filter_tags_and_samples_records():
+    """Test records get the current request id and flagged info records are sampled"""
+    keep_all, keep_none = logs.RequestContextFilter(1.0), logs.RequestContextFilter(0.0)
+
+    async def log_in_request():
+        record = make_record()
+        keep_all.filter(record)
+        return record.request_id
+
+    assert await logs.with_request_id("req-1", log_in_request()) == "req-1"
+    assert not keep_none.filter(make_record(sample=True))
+    assert keep_none.filter(make_record())
+    warning = make_record(sample=True)
+    warning.levelno = logging.WARNING
+    assert keep_none.filter(warning)
+
+
+def test_records_are_written_by_background_thread(capsys):
+    """Test logged records reach stderr as JSON after going through the queue"""
+    logs.setup_logging(LoggingConfig(structured=True))
+    logs.set_request_id("req-2")
+    logging.getLogger("telegrify.test").warning("Queue %s", "works", extra={"chat_id": 7})
+    logs.set_request_id(None)
+    logs.stop_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith("{")]
+    assert {"message": "Queue works", "request_id": "req-2", "chat_id": 7}.items() <= lines[-1].items()
+
+
+def test_request_id_header(config_file):
+    """Test responses carry the client's X-Request-ID or a generated one"""
+    with TestClient(create_app(config_file)) as client:
+        given = client.get("/health", headers={"X-Request-ID": "trace-7"})
+        generated = client.get("/health")
+
+    assert given.headers["X-Request-ID"] == "trace-7"
+    assert len(generated.headers["X-Request-ID"]) == 16
@@ -0,0 +1,187 @@
+"""Tests for media uploads and the file_id cache"""
+
+import asyncio
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from telegrify.core.bot import TelegramBot, split_media_group
+from telegrify.core.media import FileIdCache, MediaFile
+
+
+def make_bot(api, file_ids=None):
+    bot = TelegramBot(token="test", file_ids=file_ids)
+    bot.base_url = api.url("test")
+    return bot
+
+
+async def test_repeat_send_reuses_file_id(fake_bot_api):
+    """Test identical content is uploaded once and then sent by file_id"""
+    bot = make_bot(fake_bot_api)
+
+    first = await bot.send_photo("1", MediaFile(b"chart-bytes", filename="chart.png"))
+    second = await bot.send_photo("2", MediaFile(b"chart-bytes", filename="chart.png"))
+    await bot.close()
+
+    assert fake_bot_api.uploads == [b"chart-bytes"]
+    assert fake_bot_api.requests[1] == ("sendPhoto", {"chat_id": "2", "photo": "file-0"})
+    assert second["result"]["photo"] == first["result"]["photo"]
+
+
+async def test_url_file_id_is_reused(fake_bot_api):
+    """Test media sent by URL is fetched by Telegram only once"""
+    bot = make_bot(fake_bot_api)
+
+    await bot.send_document("1", "https://example.com/report.pdf")
+    await bot.send_document("1", "https://example.com/report.pdf")
+    await bot.close()
+
+    assert [payload["document"] for _, payload in fake_bot_api.requests] == [
+        "https://example.com/report.pdf",
+        "file-0",
+    ]
+
+
+async def test_file_id_cache_persists(fake_bot_api, tmp_path):
+    """Test file_ids stored in SQLite are used after a restart"""
+    path = str(tmp_path / "file_ids.db")
+    with open(tmp_path / "report.csv", "wb") as f:
+        f.write(b"a,b\n1,2\n")
+
+    bot = make_bot(fake_bot_api, FileIdCache(path))
+    await bot.send_document("1", MediaFile(tmp_path / "report.csv"))
+    await bot.close()
+
+    bot = make_bot(fake_bot_api, FileIdCache(path))
+    await bot.send_document("1", MediaFile(tmp_path / "report.csv"))
+    await bot.close()
+
+    assert fake_bot_api.uploads == [b"a,b\n1,2\n"]
+
+
+async def test_rejected_file_id_is_uploaded_again(fake_bot_api):
+    """Test a file_id Telegram no longer accepts is replaced"""
+    bot = make_bot(fake_bot_api)
+    await bot.send_photo("1", MediaFile(b"img"))
+
+    fake_bot_api.file_ids.clear()
+    result = await bot.send_photo("1", MediaFile(b"img"))
+    await bot.close()
+
+    assert fake_bot_api.uploads == [b"img", b"img"]
+    assert result["ok"]
+
+
+async def test_bots_upload_one_spooled_file_concurrently(fake_bot_api):
+    """Test bots sharing a spooled upload each send the whole content"""
+    content = bytes(range(256)) * 1024
+    spooled = tempfile.SpooledTemporaryFile()
+    spooled.write(content)
+    bots = []
+    for token in ("first", "second"):
+        bot = TelegramBot(token=token)
+        bot.base_url = fake_bot_api.url(token)
+        bots.append(bot)
+    media = MediaFile(spooled, filename="report.pdf")
+
+    await asyncio.gather(*(bot.send_document("1", media) for bot in bots))
+    for bot in bots:
+        await bot.close()
+
+    assert fake_bot_api.uploads == [content, content]
+
+
+@pytest.fixture
+def upload_app(sample_config, app_factory, tmp_path):
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "chart.png").write_bytes(b"png")
+    sample_config["endpoints"].append(
+        {"path": "/notify/media", "chat_id": "42", "uploads": True, "media_dir": str(tmp_path / "media")}
+    )
+
+    def make(**server):
+        app = app_factory(server=server)
+        sent = []
+
+        async def send_photo(chat_id, photo, caption=None, parse_mode=None):
+            sent.append((chat_id, b"".join(photo._chunks()), caption))
+            return {"ok": True, "result": {"message_id": 1}}
+
+        app.state.bot.send_photo = send_photo
+        return TestClient(app), sent
+
+    return make
+
+
+@pytest.mark.parametrize("routing", ["routes", "dispatch"])
+def test_endpoint_accepts_raw_upload(upload_app, routing):
+    """Test a raw request body is sent as an uploaded photo"""
+    client, sent = upload_app(routing=routing)
+
+    response = client.post(
+        "/notify/media/upload?message=Daily+chart",
+        content=b"\x89PNG-data",
+        headers={"Content-Type": "image/png"},
+    )
+
+    assert response.status_code == 200
+    assert sent == [("42", b"\x89PNG-data", "Daily chart")]
+
+
+def test_endpoint_sends_local_file(upload_app):
+    """Test image_file is read from media_dir and paths outside it are refused"""
+    client, sent = upload_app()
+
+    assert client.post("/notify/media", json={"message": "hi", "image_file": "chart.png"}).status_code == 200
+    assert [(chat_id, content) for chat_id, content, _ in sent] == [("42", b"png")]
+
+    response = client.post("/notify/media", json={"message": "hi", "image_file": "../media/../../etc/passwd"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["error"] == "invalid_media_path"
+
+
+def test_split_media_group_keeps_albums_valid():
+    """Test large sets become ordered albums of 2-10 items"""
+    photos = [{"type": "photo", "media": f"p{i}"} for i in range(21)]
+    docs = [{"type": "document", "media": f"d{i}"} for i in range(3)]
+
+    items = photos + [{"type": "video", "media": "v"}] + docs
+    chunks = split_media_group(items)
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 2, 3]
+    assert [item for chunk in chunks for item in chunk] == items
+    assert split_media_group(docs[:1] + photos[:2])[0] == docs[:1]
+
+
+async def test_large_media_group_is_split(fake_bot_api):
+    """Test every screenshot is sent with the caption on the first album"""
+    bot = make_bot(fake_bot_api)
+    urls = [f"https://example.com/{i}.png" for i in range(25)]
+
+    result = await bot.send_media_group("1", urls, caption="Incident 42")
+    await bot.close()
+
+    groups = [payload["media"] for _, payload in fake_bot_api.requests]
+    assert [len(group) for group in groups] == [10, 10, 5]
+    assert [item["media"] for group in groups for item in group] == urls
+    assert groups[0][0]["caption"] == "Incident 42"
+    assert [item for group in groups for item in group if "caption" in item] == [groups[0][0]]
+    assert len(result["result"]) == 25
+
+
+async def test_album_reuses_file_ids(fake_bot_api):
+    """Test album uploads are cached and a rejected cached file_id is uploaded again"""
+    bot = make_bot(fake_bot_api)
+    photos = [{"type": "photo", "media": MediaFile(f"img{i}".encode())} for i in range(3)]
+
+    await bot.send_media_group("1", media=photos)
+    await bot.send_media_group("1", media=photos)
+    fake_bot_api.file_ids.discard("file-1")
+    await bot.send_media_group("1", media=photos)
+    await bot.close()
+
+    groups = [payload["media"] for _, payload in fake_bot_api.requests]
+    assert [item["media"] for item in groups[1]] == ["file-0", "file-1", "file-2"]
+    assert [item["media"] for item in groups[3]] == ["attach://file0", "attach://file1", "attach://file2"]
+    assert fake_bot_api.uploads == [b"img0", b"img1", b"img2"] * 2
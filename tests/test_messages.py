@@ -0,0 +1,52 @@
+"""Tests for edit-in-place status messages"""
+
+import httpx
+import pytest
+
+from telegrify.core.messages import MessageStore, TrackedMessage
+
+
+@pytest.fixture
+def status_client(sample_config, app_factory, fake_bot_api):
+    """Client for an endpoint editing messages by job_id, sending to the fake API"""
+    sample_config["endpoints"].append({"path": "/notify/job", "chat_id": "42", "correlation_key": "job_id"})
+    app = app_factory(bot={"test_mode": False, "api_url": fake_bot_api.api_url})
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+async def test_same_key_edits_message(status_client, fake_bot_api):
+    """Test later notifications edit the first message and skip no-op edits"""
+    async with status_client as client:
+        statuses = ["queued", "running", "running", "done"]
+        responses = [
+            (await client.post("/notify/job", json={"job_id": "build-7", "status": status})).json()
+            for status in statuses
+        ]
+
+    assert [method for method, _ in fake_bot_api.requests] == ["sendMessage", "editMessageText", "editMessageText"]
+    assert [r["results"][0].get("action") for r in responses] == [None, "edited", "unchanged", "edited"]
+    assert {r["results"][0]["message_id"] for r in responses} == {1}
+
+
+async def test_deleted_message_is_sent_again(status_client, fake_bot_api):
+    """Test a message that can no longer be edited is replaced by a new one"""
+    async with status_client as client:
+        await client.post("/notify/job", json={"job_id": "build-8", "status": "queued"})
+        fake_bot_api.messages.clear()
+        response = await client.post("/notify/job", json={"job_id": "build-8", "status": "running"})
+
+    assert [method for method, _ in fake_bot_api.requests] == ["sendMessage", "editMessageText", "sendMessage"]
+    assert response.json()["results"][0]["message_id"] == 2
+
+
+async def test_message_store_persists(tmp_path):
+    """Test tracked messages are read back from SQLite"""
+    path = str(tmp_path / "messages.db")
+    store = MessageStore(path)
+    await store.set("/notify/job:build-7:42", TrackedMessage(5, "text", "abc"))
+    await store.close()
+
+    store = MessageStore(path)
+    assert await store.get("/notify/job:build-7:42") == TrackedMessage(5, "text", "abc")
+    assert await store.get("/notify/job:other:42") is None
+    await store.close()
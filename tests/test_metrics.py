@@ -0,0 +1,57 @@
+"""Tests for metrics collection and exposition"""
+
+from fastapi.testclient import TestClient
+
+from telegrify.core.metrics import MetricsRegistry, metrics
+
+
+def test_counter_and_histogram_render():
+    """Test Prometheus text output for counters and histograms"""
+    registry = MetricsRegistry(enabled=True)
+    requests = registry.counter("requests_total", "Requests", ("endpoint",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    requests.inc(endpoint="/a")
+    requests.inc(2, endpoint="/a")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    output = registry.render()
+    assert 'requests_total{endpoint="/a"} 3.0' in output
+    assert 'latency_seconds_bucket{le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{le="1.0"} 2' in output
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in output
+    assert "latency_seconds_count 3" in output
+
+
+def test_disabled_registry_records_nothing():
+    """Test updates are dropped while collection is disabled"""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("endpoint",))
+    gauge = registry.gauge("depth", "Depth", ("queue",))
+
+    requests.inc(endpoint="/a")
+    with registry.histogram("latency_seconds", "Latency").time():
+        pass
+    gauge.set_function(lambda: 7, queue="updates")
+
+    output = registry.render()
+    assert "requests_total{" not in output
+    assert "latency_seconds_count" not in output
+    assert 'depth{queue="updates"} 7.0' in output
+
+
+def test_metrics_endpoint(app_factory):
+    """Test /metrics exposes per-endpoint request counters"""
+    metrics.reset()
+    try:
+        client = TestClient(app_factory(metrics={"enabled": True}))
+        assert client.post("/notify/test", json={"message": "hi"}).status_code == 200
+
+        output = client.get("/metrics").text
+        assert 'telegrify_requests_total{endpoint="/notify/test",status="sent"} 1.0' in output
+        assert 'telegrify_format_duration_seconds_count{endpoint="/notify/test",formatter="plain"} 1' in output
+    finally:
+        metrics.enabled = False
+        metrics.reset()
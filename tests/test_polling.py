@@ -0,0 +1,123 @@
+"""Tests for long-polling mode"""
+
+import asyncio
+
+from telegrify.core.bot import TelegramBot
+from telegrify.core.config import AppConfig
+from telegrify.server.polling import OffsetStore, UpdatePoller, create_poller
+from telegrify.server.updates import UpdateWorkerPool
+
+
+def command_update(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "text": text},
+    }
+
+
+async def test_poller_dispatches_and_persists_offset(sample_config, fake_bot_api, tmp_path):
+    """Test polled updates reach command handlers in per-chat order"""
+    offset_file = tmp_path / "offset"
+    sample_config["bot"].update({"test_mode": False, "offset_file": str(offset_file), "poll_timeout": 0})
+    sample_config["commands"] = [{"command": "/echo {text}", "response": "{{ text }}"}]
+    config = AppConfig(**sample_config)
+
+    bot = TelegramBot(config.bot.token)
+    bot.base_url = fake_bot_api.url(config.bot.token)
+    fake_bot_api.updates = [
+        command_update(10, 1, "/echo a1"),
+        command_update(11, 2, "/echo b1"),
+        command_update(12, 1, "/echo a2"),
+        command_update(13, 1, "/echo a3"),
+    ]
+
+    poller = create_poller(bot, config)
+    assert await poller.poll_once() == 4
+    await poller.pool.join()
+
+    sent = [(p["chat_id"], p["text"]) for m, p in fake_bot_api.requests if m == "sendMessage"]
+    assert [text for chat, text in sent if chat == "1"] == ["a1", "a2", "a3"]
+    assert [text for chat, text in sent if chat == "2"] == ["b1"]
+    assert offset_file.read_text() == "14"
+
+    # Next poll starts after the persisted offset
+    assert await poller.poll_once() == 0
+    assert fake_bot_api.requests[-1] == ("getUpdates", {"timeout": 0, "limit": 100, "offset": 14})
+
+    restarted = create_poller(bot, config)
+    assert restarted.offset == 14
+
+    await poller.stop()
+    await bot.close()
+
+
+async def wait_until(condition, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+async def test_run_loop_advances_offset_and_retries_errors(sample_config, fake_bot_api, tmp_path):
+    """Test the run loop keeps polling after a failed getUpdates, from the next offset each time"""
+    offset_file = tmp_path / "offset"
+    sample_config["bot"].update({"test_mode": False, "offset_file": str(offset_file), "poll_timeout": 1})
+    sample_config["commands"] = [{"command": "/echo {text}", "response": "{{ text }}"}]
+    config = AppConfig(**sample_config)
+
+    bot = TelegramBot(config.bot.token)
+    bot.base_url = fake_bot_api.url(config.bot.token)
+    # getUpdates is refused with 409 while a webhook is set
+    fake_bot_api.webhook_url = "https://example.com/hook"
+    poller = create_poller(bot, config)
+    poller.retry_delay = 0.01
+    await poller.start()
+
+    def sent():
+        return [p["text"] for m, p in fake_bot_api.requests if m == "sendMessage"]
+
+    await wait_until(lambda: fake_bot_api.counts["getUpdates"] >= 2)
+    fake_bot_api.webhook_url = None
+    fake_bot_api.add_update(command_update(10, 1, "/echo first"))
+    await wait_until(lambda: sent() == ["first"])
+    fake_bot_api.add_update(command_update(11, 1, "/echo second"))
+    await wait_until(lambda: sent() == ["first", "second"])
+    await poller.stop()
+    await bot.close()
+
+    offsets = [p.get("offset") for m, p in fake_bot_api.requests if m == "getUpdates"]
+    assert offsets[:2] == [None, None]
+    assert offsets.index(11) < offsets.index(12)
+    assert offset_file.read_text() == "12"
+
+
+async def test_full_pool_pauses_polling(fake_bot_api):
+    """Test the poller stops fetching while the update workers are busy and resumes after"""
+    release = asyncio.Event()
+    handled = []
+
+    async def callback(update):
+        await release.wait()
+        handled.append(update["update_id"])
+
+    bot = TelegramBot("1:token")
+    bot.base_url = fake_bot_api.url("1:token")
+    pool = UpdateWorkerPool(callback, workers=1, queue_size=1)
+    poller = UpdatePoller(bot, pool, OffsetStore(None), timeout=0)
+    fake_bot_api.updates = [command_update(update_id, 1, "/start") for update_id in (10, 11, 12)]
+
+    polling = asyncio.create_task(poller.poll_once())
+    await wait_until(lambda: poller.offset == 12)
+    await asyncio.sleep(0.05)
+    # One update is being handled, one is queued and the last waits for room
+    assert not polling.done()
+    assert poller.offset == 12
+    assert fake_bot_api.counts["getUpdates"] == 1
+
+    release.set()
+    assert await polling == 3
+    assert poller.offset == 13
+    await pool.stop()
+    await bot.close()
+    assert handled == [10, 11, 12]
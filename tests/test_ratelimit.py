@@ -0,0 +1,36 @@
+"""Tests for outgoing rate limiting"""
+
+import asyncio
+
+from telegrify.core.ratelimit import RateLimiter
+
+
+async def test_chat_limit_spaces_sends():
+    """Test sends to one chat are spaced once the burst is used"""
+    limiter = RateLimiter(rate=0, chat_rate=20, chat_burst=1)
+
+    assert [round(limiter.reserve("1"), 2) for _ in range(3)] == [0, 0.05, 0.1]
+    assert limiter.reserve("2") == 0
+
+
+async def test_global_limit_applies_across_chats():
+    """Test the global rate holds back sends to different chats"""
+    limiter = RateLimiter(rate=10, chat_rate=0)
+
+    delays = [limiter.reserve(str(chat)) for chat in range(12)]
+
+    assert delays[:10] == [0] * 10
+    assert round(delays[10], 1) == 0.1
+
+
+async def test_pause_holds_back_chat():
+    """Test a 429 pauses further sends to that chat"""
+    limiter = RateLimiter(rate=0, chat_rate=100, chat_burst=5)
+    loop = asyncio.get_running_loop()
+
+    limiter.pause("1", 0.05)
+    start = loop.time()
+    await limiter.acquire("1")
+
+    assert loop.time() - start >= 0.04
+    assert limiter.reserve("2") == 0
@@ -1,5 +1,7 @@
 """Tests for plugin registry"""
 
+import sys
+
 from telegrify.core.registry import PluginRegistry
 from telegrify.formatters.plain import PlainFormatter
 
@@ -25,3 +27,62 @@ def test_list_formatters():
     assert "plain" in formatters
     assert "custom" in formatters
     assert len(formatters) == 2
+
+
+def test_lazy_formatter_loads_on_first_use():
+    """Test a "module:Class" formatter is only imported when requested"""
+    registry = PluginRegistry()
+    registry.register_lazy("lazy", "telegrify.formatters.plain:PlainFormatter")
+
+    assert "lazy" in registry.list_formatters()
+    assert "lazy" not in registry._formatters
+    assert isinstance(registry.get_formatter("lazy"), PlainFormatter)
+    assert registry.load(["lazy", "missing"]) == ["missing"]
+
+
+def test_manifest_plugins_import_only_used(tmp_path, monkeypatch):
+    """Test manifest plugins are imported when used and unused ones never are"""
+    plugins = tmp_path / "manifest_plugins"
+    plugins.mkdir()
+    (plugins / "used.py").write_text(
+        "from telegrify import IFormatter\n\n"
+        "class Used(IFormatter):\n"
+        "    def format(self, payload):\n"
+        "        return 'used'\n"
+    )
+    (plugins / "broken.py").write_text("raise RuntimeError('should not be imported')\n")
+    (plugins / "manifest.yaml").write_text("formatters:\n  used: 'used:Used'\n  broken: 'broken:Broken'\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    registry = PluginRegistry()
+    registry.discover_plugins(str(plugins))
+
+    assert registry.load(["used"]) == []
+    assert registry.get_formatter("used").format({}) == "used"
+    assert "manifest_plugins.broken" not in sys.modules
+
+
+def test_plugin_dir_without_manifest_is_scanned_on_demand(tmp_path, monkeypatch):
+    """Test plugin files are imported only when an unknown formatter is requested"""
+    plugins = tmp_path / "scanned_plugins"
+    plugins.mkdir()
+    (plugins / "order.py").write_text(
+        "from telegrify import IPlugin\n\n"
+        "class Order(IPlugin):\n"
+        "    name = 'order'\n\n"
+        "    def format(self, payload, config):\n"
+        "        return 'order'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    registry = PluginRegistry()
+    registry.discover_plugins(str(plugins))
+    assert "scanned_plugins.order" not in sys.modules
+
+    assert registry.get_formatter("order").format({}, {}) == "order"
+    assert registry.get_formatter("unknown") is None
+
+    # A second registry in the same process finds the already imported plugin
+    second = PluginRegistry()
+    second.discover_plugins(str(plugins))
+    assert second.get_formatter("order").format({}, {}) == "order"
@@ -0,0 +1,58 @@
+"""Tests for endpoint dispatch routing"""
+
+from fastapi.testclient import TestClient
+
+from telegrify.server.router import EndpointRouter
+
+
+def make_app(sample_config, app_factory, **server):
+    sample_config["endpoints"].append({"path": "/notify/other", "chat_id": "42"})
+    return app_factory(server=server)
+
+
+def test_router_resolves_exact_path():
+    """Test handler lookup by exact path and trailing slash"""
+    router = EndpointRouter()
+
+    async def handler(payload, x_api_key=None):
+        return {}
+
+    router.add("/notify/test", handler)
+
+    assert router.resolve("/notify/test") is handler
+    assert router.resolve("/notify/test/") is handler
+    assert router.resolve("/notify/missing") is None
+
+
+def test_dispatch_mode_sends_notification(sample_config, app_factory):
+    """Test endpoints are served through the single dispatch route"""
+    client = TestClient(make_app(sample_config, app_factory, routing="dispatch"))
+
+    response = client.post("/notify/other", json={"message": "hi"})
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"chat_id": "42", "message_id": 0}]
+
+    assert client.post("/notify/missing", json={}).status_code == 404
+    assert client.get("/notify/other").status_code == 405
+    assert client.post("/notify/other", content=b"[1]").status_code == 422
+    assert client.get("/health").status_code == 200
+
+
+def test_dispatch_mode_requires_api_key(sample_config, app_factory):
+    """Test API key check applies in dispatch mode"""
+    client = TestClient(make_app(sample_config, app_factory, routing="dispatch", api_key="secret"))
+
+    response = client.post("/notify/test", json={"message": "hi"})
+    assert response.status_code == 401
+    assert response.json()["detail"]["error"] == "invalid_api_key"
+
+    response = client.post("/notify/test", json={"message": "hi"}, headers={"X-API-Key": "secret"})
+    assert response.status_code == 200
+
+
+def test_docs_can_be_disabled(sample_config, app_factory):
+    """Test OpenAPI docs are optional"""
+    client = TestClient(make_app(sample_config, app_factory, docs=False))
+
+    assert client.get("/openapi.json").status_code == 404
+    assert client.post("/notify/other", json={"message": "hi"}).status_code == 200
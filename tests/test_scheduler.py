@@ -0,0 +1,144 @@
+"""Tests for the per-chat delivery scheduler"""
+
+import asyncio
+
+from telegrify.core.bot import TelegramBot
+from telegrify.core.scheduler import DeliveryScheduler
+
+
+async def test_chats_are_sent_in_parallel():
+    """Test sends to different chats overlap"""
+    scheduler = DeliveryScheduler(workers=4)
+    running, peak = 0, 0
+
+    async def send():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    await asyncio.gather(*(scheduler.submit(chat, send) for chat in range(4)))
+    await scheduler.stop()
+
+    assert peak == 4
+
+
+async def test_hot_chat_does_not_starve_others():
+    """Test a chat with a long backlog shares its worker fairly"""
+    scheduler = DeliveryScheduler(workers=1)
+    order = []
+
+    def send(label):
+        async def run():
+            order.append(label)
+        return run
+
+    for i in range(5):
+        scheduler.submit("hot", send(f"hot-{i}"))
+    scheduler.submit("quiet", send("quiet"))
+    await scheduler.join()
+    await scheduler.stop()
+
+    assert order.index("quiet") < order.index("hot-2")
+    assert [label for label in order if label.startswith("hot")] == [f"hot-{i}" for i in range(5)]
+
+
+async def test_order_kept_under_retries(fake_bot_api):
+    """Test a retried message still arrives before later messages to the same chat"""
+    bot = TelegramBot(token="test")
+    bot.base_url = fake_bot_api.url("test")
+    scheduler = DeliveryScheduler(workers=4)
+
+    # "deploy started" is rate limited twice before it goes through
+    fake_bot_api.faults = [429, 429]
+    started = scheduler.submit("1", lambda: bot.send_message("1", "deploy started"))
+    finished = scheduler.submit("1", lambda: bot.send_message("1", "deploy finished"))
+
+    results = await asyncio.gather(started, finished)
+    await scheduler.stop()
+    await bot.close()
+
+    assert all(result["ok"] for result in results)
+    delivered = [p["text"] for m, p in fake_bot_api.requests if m == "sendMessage"]
+    assert delivered == ["deploy started"] * 3 + ["deploy finished"]
+
+
+async def test_errors_are_returned_to_the_caller():
+    """Test a failing send rejects its future without stopping the lane"""
+    scheduler = DeliveryScheduler(workers=2)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def ok():
+        return "ok"
+
+    failed = scheduler.submit("1", fail)
+    succeeded = scheduler.submit("1", ok)
+    results = await asyncio.gather(failed, succeeded, return_exceptions=True)
+    await scheduler.stop()
+
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] == "ok"
+
+
+async def test_high_priority_skips_bulk_backlog():
+    """Test a high priority send starts before a long low priority backlog drains"""
+    scheduler = DeliveryScheduler(workers=1)
+    order = []
+
+    def send(label):
+        async def run():
+            await asyncio.sleep(0)
+            order.append(label)
+        return run
+
+    for i in range(50):
+        scheduler.submit(f"user-{i}", send(f"bulk-{i}"), priority="low")
+    await asyncio.sleep(0)
+    scheduler.submit("oncall", send("alert"), priority="high")
+    await scheduler.join()
+    await scheduler.stop()
+
+    assert order.index("alert") <= 2
+
+
+async def test_weighted_priorities_share_sends():
+    """Test backlogged priorities are served in proportion to their weights"""
+    scheduler = DeliveryScheduler(workers=1, weights={"high": 3, "normal": 1, "low": 1})
+    order = []
+
+    def send(label):
+        async def run():
+            order.append(label)
+        return run
+
+    for priority in ("high", "normal", "low"):
+        for i in range(20):
+            scheduler.submit(f"{priority}-{i}", send(priority), priority=priority)
+    await scheduler.join()
+    await scheduler.stop()
+
+    assert order[:10].count("high") == 6
+    assert order[:10].count("normal") == 2
+    assert order[:10].count("low") == 2
+
+
+async def test_strict_priority_drains_higher_first():
+    """Test strict policy serves lower priorities only when higher ones are empty"""
+    scheduler = DeliveryScheduler(workers=1, policy="strict")
+    order = []
+
+    def send(label):
+        async def run():
+            order.append(label)
+        return run
+
+    scheduler.submit("a", send("low"), priority="low")
+    scheduler.submit("b", send("normal"), priority="normal")
+    scheduler.submit("c", send("high"), priority="high")
+    await scheduler.join()
+    await scheduler.stop()
+
+    assert order == ["high", "normal", "low"]
@@ -0,0 +1,84 @@
+"""Tests for compiled payload schemas"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from telegrify.core.schema import SchemaError, compile_schema
+
+
+def test_shorthand_fields():
+    """Test a field list checks types and required fields"""
+    validate = compile_schema({"order_id": "int", "total": "float", "note": "str?"})
+
+    assert validate({"order_id": 7, "total": 9.5}) == []
+    assert validate({"order_id": "7", "total": 9}) == [
+        {"loc": ["body", "order_id"], "msg": "Expected integer", "type": "type_error.integer"}
+    ]
+    assert validate({"total": 1, "note": 3}) == [
+        {"loc": ["body", "order_id"], "msg": "Field required", "type": "missing"},
+        {"loc": ["body", "note"], "msg": "Expected string", "type": "type_error.string"},
+    ]
+
+
+def test_json_schema_subset():
+    """Test nested JSON Schema keywords report the failing location"""
+    validate = compile_schema(
+        {
+            "$schema": "https://json-schema.org/draft/2020-12/schema",
+            "type": "object",
+            "required": ["status", "items"],
+            "properties": {
+                "status": {"enum": ["queued", "running", "done"]},
+                "items": {"type": "array", "minItems": 1, "items": {"type": "object", "required": ["sku"]}},
+                "email": {"type": "string", "pattern": "@"},
+                "count": {"type": "integer", "minimum": 0},
+            },
+            "additionalProperties": False,
+        }
+    )
+
+    assert validate({"status": "done", "items": [{"sku": "a"}]}) == []
+    errors = validate({"status": "lost", "items": [{}], "email": "x", "count": -1, "extra": 1})
+    assert [(e["loc"], e["type"]) for e in errors] == [
+        (["body", "status"], "enum"),
+        (["body", "items", 0, "sku"], "missing"),
+        (["body", "email"], "pattern"),
+        (["body", "count"], "minimum"),
+        (["body", "extra"], "additionalProperties"),
+    ]
+
+
+def test_unsupported_schema_is_rejected():
+    """Test schemas that cannot be compiled fail at startup"""
+    with pytest.raises(SchemaError, match="oneOf"):
+        compile_schema({"$schema": "", "type": "object", "oneOf": []})
+    with pytest.raises(SchemaError, match="Unknown type"):
+        compile_schema({"order_id": "uuid"})
+    with pytest.raises(SchemaError, match="properties must be an object"):
+        compile_schema({"$schema": "", "properties": "str"})
+    with pytest.raises(SchemaError, match="must be an object"):
+        compile_schema({"$schema": "", "properties": {"name": "str"}})
+    with pytest.raises(SchemaError, match="must be a string"):
+        compile_schema({"properties": {"name": {"type": "string"}}})
+
+
+def test_shorthand_fields_may_be_named_like_keywords():
+    """Test shorthand fields called type or properties are not read as JSON Schema"""
+    validate = compile_schema({"type": "str", "message": "str", "properties": "dict?"})
+
+    assert validate({"type": "alert", "message": "hi"}) == []
+    assert [e["loc"] for e in validate({"type": 1})] == [["body", "message"], ["body", "type"]]
+
+
+def test_endpoint_returns_422(sample_config, app_factory):
+    """Test an invalid payload is rejected before formatting and sending"""
+    sample_config["endpoints"][0]["schema"] = {"message": "str", "level": "int?"}
+    client = TestClient(app_factory())
+
+    response = client.post("/notify/test", json={"level": "high"})
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["error"] == "invalid_payload"
+    assert [e["loc"] for e in detail["errors"]] == [["body", "message"], ["body", "level"]]
+
+    assert client.post("/notify/test", json={"message": "ok", "level": 2}).status_code == 200
@@ -0,0 +1,72 @@
+"""Tests for incoming request rate limits"""
+
+import httpx
+
+from telegrify.core.throttle import InboundLimiter, SlidingWindowSketch
+
+
+def test_sketch_slides_previous_window_out():
+    """Test counts from the previous window fade as the window slides"""
+    sketch = SlidingWindowSketch(window=10)
+    for _ in range(10):
+        sketch.add("ip:1", now=5)
+    assert sketch.count("ip:1", now=9) == 10
+    assert sketch.count("ip:1", now=15) == 5
+    assert sketch.count("ip:1", now=25) == 0
+    assert sketch.count("ip:2", now=9) == 0
+
+
+def test_sketch_memory_is_fixed():
+    """Test many distinct keys do not grow the sketch"""
+    sketch = SlidingWindowSketch(window=10, width=256, depth=4)
+    for i in range(10000):
+        sketch.add(f"ip:{i}", now=1)
+    assert len(sketch._current) == 4
+    assert all(len(row) == 256 for row in sketch._current)
+    assert sketch.count("ip:42", now=1) >= 1
+
+
+def test_limiter_rejects_without_counting():
+    """Test a request over any limit is refused and not counted against the others"""
+    limiter = InboundLimiter(window=60)
+    checks = [("endpoint:/a", 100), ("ip:1", 2)]
+    assert limiter.acquire(checks) is None
+    assert limiter.acquire(checks) is None
+
+    key, retry_after = limiter.acquire(checks)
+    assert key == "ip:1"
+    assert 1 <= retry_after <= 120
+    assert limiter.acquire([("endpoint:/a", 100), ("ip:2", 2)]) is None
+    assert limiter.sketch.count("endpoint:/a") == 3
+
+
+async def test_requests_over_ip_limit_get_429(app_factory):
+    """Test the middleware answers 429 before the endpoint runs"""
+    app = app_factory(limits={"per_ip": 2})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        statuses = [(await client.post("/notify/test", json={"message": "hi"})).status_code for _ in range(3)]
+        limited = await client.post("/notify/test", content=b"not json")
+        health = await client.get("/health")
+
+    assert statuses == [200, 200, 429]
+    assert limited.status_code == 429
+    assert limited.json()["detail"]["error"] == "rate_limited"
+    assert "Retry-After" in limited.headers
+    assert health.status_code == 200
+
+
+async def test_trailing_slash_counts_against_endpoint_limit(sample_config, app_factory):
+    """Test /path/ in dispatch mode is limited as the endpoint it resolves to"""
+    sample_config["endpoints"][0]["request_limit"] = 1
+    app = app_factory(server={"routing": "dispatch"})
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/notify/test/", json={"message": "hi"})
+        second = await client.post("/notify/test/", json={"message": "hi"})
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.json()["detail"]["error"] == "rate_limited"
@@ -0,0 +1,72 @@
+"""Tests for stage timing and profiling hooks"""
+
+import httpx
+from fastapi.testclient import TestClient
+
+from telegrify.core import timing
+
+
+def test_stage_is_noop_outside_request():
+    """Test stage timing records nothing without a request context"""
+    assert timing.current() is None
+    with timing.stage("format"):
+        pass
+    timing.mark("parse")
+    assert timing.current() is None
+
+
+def test_server_timing_header(app_factory):
+    """Test stage timings are returned in the Server-Timing header"""
+    client = TestClient(app_factory(server={"server_timing": True}))
+
+    response = client.post("/notify/test", json={"message": "hi"})
+    header = response.headers["server-timing"]
+    assert "parse;dur=" in header
+    assert "format;dur=" in header
+    assert "total;dur=" in header
+
+
+async def test_server_timing_of_every_request_includes_telegram(app_factory, fake_bot_api):
+    """Test sends made by the delivery workers are timed in the request that queued them"""
+    app = app_factory(
+        server={"server_timing": True},
+        bot={"test_mode": False, "api_url": fake_bot_api.api_url},
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = [await client.post("/notify/test", json={"message": f"hi {n}"}) for n in range(3)]
+
+    for response in responses:
+        assert response.status_code == 200
+        assert "telegram;dur=" in response.headers["server-timing"]
+
+
+def test_server_timing_disabled_by_default(app_factory):
+    """Test no header is added unless enabled"""
+    client = TestClient(app_factory())
+
+    response = client.post("/notify/test", json={"message": "hi"})
+    assert "server-timing" not in response.headers
+
+
+def test_profile_endpoint_requires_admin_key(app_factory):
+    """Test profiling is admin-protected and returns collapsed stacks"""
+    client = TestClient(app_factory(server={"admin_key": "admin"}))
+
+    assert client.post("/admin/profile?seconds=0.05").status_code == 401
+
+    response = client.post("/admin/profile?seconds=0.05", headers={"X-Admin-Key": "admin"})
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_profile_endpoint_pstats_text(app_factory):
+    """Test cProfile output rendered as text"""
+    client = TestClient(app_factory(server={"admin_key": "admin"}))
+
+    response = client.post("/admin/profile?seconds=0.05&format=text", headers={"X-Admin-Key": "admin"})
+    assert response.status_code == 200
+    assert "function calls" in response.text
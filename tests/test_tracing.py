@@ -0,0 +1,84 @@
+"""Tests for request tracing"""
+
+import json
+
+import httpx
+
+from telegrify.core import tracing
+from telegrify.core.config import TracingConfig
+
+
+def read_spans(path) -> list[dict]:
+    spans = []
+    with open(path) as f:
+        for line in f:
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+    return spans
+
+
+def attributes(span: dict) -> dict:
+    return {each["key"]: next(iter(each["value"].values())) for each in span["attributes"]}
+
+
+async def test_disabled_tracing_is_a_no_op():
+    """Test spans cost nothing and are not exported while tracing is off"""
+    await tracing.shutdown()
+    assert not tracing.enabled()
+    with tracing.span("notify", endpoint="/x") as span:
+        span.set_attribute("ignored", True)
+        assert tracing.current_span() is None
+    assert span is tracing.span("other")
+
+
+async def test_nested_spans_share_a_trace(tmp_path):
+    """Test child spans get the parent's trace id and errors set the status"""
+    path = tmp_path / "traces.jsonl"
+    tracing.configure(TracingConfig(enabled=True, exporter="file", file=str(path)))
+    with tracing.span("outer"):
+        try:
+            with tracing.span("inner", n=1):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+    await tracing.shutdown()
+
+    inner, outer = read_spans(path)
+    assert inner["traceId"] == outer["traceId"]
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert "parentSpanId" not in outer
+    assert inner["status"] == {"code": tracing.STATUS_ERROR, "message": "ValueError: boom"}
+    assert attributes(inner) == {"n": "1"}
+
+
+async def test_notification_is_traced_through_retries(app_factory, fake_bot_api, tmp_path):
+    """Test a notification's format step, delivery and each send attempt are one trace"""
+    path = tmp_path / "traces.jsonl"
+    app = app_factory(
+        tracing={"enabled": True, "exporter": "file", "file": str(path)},
+        bot={"test_mode": False, "api_url": fake_bot_api.api_url},
+    )
+    fake_bot_api.faults = [429]
+
+    assert not tracing.enabled()
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/notify/test", json={"message": "hi"}, headers={"X-Request-ID": "req-9"})
+    assert response.status_code == 200
+    assert not tracing.enabled()
+
+    spans = {(span["name"], attributes(span).get("attempt")): span for span in read_spans(path)}
+    notify = spans[("notify", None)]
+    first, second = spans[("telegram.sendMessage", "1")], spans[("telegram.sendMessage", "2")]
+    deliver = spans[("deliver", None)]
+
+    assert {span["traceId"] for span in spans.values()} == {notify["traceId"]}
+    assert spans[("format", None)]["parentSpanId"] == notify["spanId"]
+    assert deliver["parentSpanId"] == notify["spanId"]
+    assert first["parentSpanId"] == second["parentSpanId"] == deliver["spanId"]
+    assert first["status"]["code"] == tracing.STATUS_ERROR
+    assert attributes(second)["http.status_code"] == "200"
+    assert attributes(notify)["request.id"] == "req-9"
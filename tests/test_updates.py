@@ -0,0 +1,99 @@
+"""Tests for incoming update processing"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from telegrify.core import logs, timing
+from telegrify.server.updates import UpdateDeduplicator, UpdateWorkerPool
+
+
+def command_update(update_id: int, chat_id: int, text: str = "/start") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "text": text},
+    }
+
+
+def test_deduplicator_window_is_bounded():
+    """Test oldest update_ids are evicted once the window is full"""
+    seen = UpdateDeduplicator(window=3)
+    for update_id in range(5):
+        seen.add(update_id)
+
+    assert len(seen) == 3
+    assert 0 not in seen
+    assert 4 in seen
+
+
+async def test_pool_keeps_per_chat_order():
+    """Test updates from one chat are processed in arrival order"""
+    processed = []
+
+    async def callback(update):
+        await asyncio.sleep(0.01 if update["update_id"] % 2 else 0)
+        processed.append(update["update_id"])
+
+    pool = UpdateWorkerPool(callback, workers=4)
+    for update_id in range(10):
+        await pool.submit(command_update(update_id, chat_id=1))
+    await pool.stop()
+
+    assert processed == list(range(10))
+
+
+async def test_pool_rejects_when_saturated():
+    """Test submit_nowait reports a full queue"""
+    release = asyncio.Event()
+
+    async def callback(update):
+        await release.wait()
+
+    pool = UpdateWorkerPool(callback, workers=1, queue_size=1)
+    assert pool.submit_nowait(command_update(1, chat_id=1))
+    await asyncio.sleep(0)
+    assert pool.submit_nowait(command_update(2, chat_id=1))
+    assert not pool.submit_nowait(command_update(3, chat_id=1))
+
+    release.set()
+    await pool.stop()
+
+
+async def test_pool_handles_each_update_in_its_own_context():
+    """Test workers do not keep the context of the request that started them"""
+    handled = []
+
+    async def callback(update):
+        handled.append((update["update_id"], logs.current_request_id(), timing.current()))
+
+    pool = UpdateWorkerPool(callback, workers=1)
+    timing.start_request()
+    logs.set_request_id("req-a")
+    await pool.submit(command_update(1, chat_id=1))
+    logs.set_request_id(None)
+    await pool.submit(command_update(2, chat_id=1))
+    await pool.stop()
+
+    assert handled == [(1, "req-a", None), (2, "update-2", None)]
+
+
+def test_webhook_drops_duplicate_updates(app_factory):
+    """Test redelivered updates are acknowledged but processed once"""
+    app = app_factory(
+        bot={"webhook_url": "https://example.com"},
+        commands=[{"command": "/start", "response": "Hi {{ first_name }}"}],
+    )
+    sent = []
+
+    async def send_message(chat_id, text, **kwargs):
+        sent.append((chat_id, text))
+        return {"ok": True, "result": {"message_id": 1}}
+
+    app.state.bot.send_message = send_message
+
+    with TestClient(app) as client:
+        for _ in range(3):
+            response = client.post("/bot/webhook", json=command_update(100, chat_id=7))
+            assert response.json() == {"ok": True}
+
+    assert sent == [("7", "Hi ")]